@@ -14,11 +14,17 @@ import os
 import json
 import logging
 import argparse
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Tuple, Union
 import warnings
 warnings.filterwarnings('ignore')
 
+# Compiled tree-ensemble inference shared with the orchestrator (aura_common)
+from aura_common.forest import compile_estimator, predict_one
+
 # Paths
 MODEL_PATH = 'models/agentcore_production.joblib'
 VECTORIZER_PATH = 'models/agentcore_vectorizer.joblib'
@@ -26,6 +32,14 @@ ENCODER_PATH = 'models/agentcore_encoder.joblib'
 METRICS_PATH = 'models/training_metrics.json'
 INFERENCE_LOG = 'models/inference.log'
 
+# Below this many rows the flattened forest beats sklearn's per-call overhead;
+# above it sklearn's per-tree C loops win
+COMPILED_BATCH_MAX_ROWS = 128
+
+# Rows per chunk when streaming an evaluation CSV
+EVAL_CHUNK_SIZE = 5000
+EVAL_COLUMNS = ['texto_mensaje', 'clase_emergencia']
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -43,6 +57,7 @@ class EmergencyInferenceEngine:
     
     def __init__(self):
         self.model = None
+        self.compiled_model = None
         self.vectorizer = None
         self.label_encoder = None
         self.metrics = None
@@ -67,6 +82,10 @@ class EmergencyInferenceEngine:
             self.vectorizer = joblib.load(VECTORIZER_PATH)
             self.label_encoder = joblib.load(ENCODER_PATH)
             
+            # Flatten the forest for single-sample inference (other models,
+            # e.g. a VotingClassifier ensemble, are used as they are)
+            self.compiled_model = compile_estimator(self.model)
+            
             # Load metrics if available
             if os.path.exists(METRICS_PATH):
                 with open(METRICS_PATH, 'r') as f:
@@ -102,8 +121,8 @@ class EmergencyInferenceEngine:
         # Vectorize input
         X = self.vectorizer.transform([text])
         
-        # Predict
-        prediction_encoded = self.model.predict(X)[0]
+        # Predict (class, probabilities and confidence in one pass)
+        prediction_encoded, probas, confidence = predict_one(self.compiled_model, X)
         prediction = self.label_encoder.inverse_transform([prediction_encoded])[0]
         
         result = {
@@ -113,16 +132,14 @@ class EmergencyInferenceEngine:
         }
         
         # Add probabilities if requested
-        if return_probabilities and hasattr(self.model, 'predict_proba'):
-            probas = self.model.predict_proba(X)[0]
-            
+        if return_probabilities:
             # Create probability distribution
             prob_dist = {
                 cls: float(prob) 
                 for cls, prob in zip(self.label_encoder.classes_, probas)
             }
             
-            result['confidence'] = float(probas[prediction_encoded])
+            result['confidence'] = confidence
             result['all_probabilities'] = prob_dist
             
             # Sort by probability
@@ -138,6 +155,25 @@ class EmergencyInferenceEngine:
         
         return result
     
+    def predict_matrix(self, X) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Predict a whole vectorized batch with a single probability call
+        
+        Args:
+            X: Vectorized messages (n_samples x n_features)
+            
+        Returns:
+            (encoded classes, probability matrix, confidence of each class)
+        """
+        if X.shape[0] < COMPILED_BATCH_MAX_ROWS:
+            probas = self.compiled_model.predict_proba(X)
+        else:
+            probas = self.model.predict_proba(X)
+        
+        best = np.argmax(probas, axis=1)
+        confidences = probas[np.arange(len(best)), best]
+        return self.model.classes_.take(best), probas, confidences
+    
     def predict_batch(self, texts: List[str], 
                      return_probabilities: bool = True) -> List[Dict]:
         """
@@ -155,80 +191,102 @@ class EmergencyInferenceEngine:
         
         logger.info("Processing batch of %d samples", len(texts))
         
-        # Vectorize all inputs
+        # Vectorize and predict all inputs at once
         X = self.vectorizer.transform(texts)
+        predictions_encoded, probas, confidences = self.predict_matrix(X)
+        predictions = self.label_encoder.inverse_transform(predictions_encoded).tolist()
+        
+        # One timestamp per batch
+        timestamp = datetime.now().isoformat()
+        results = [
+            {'id': i, 'text': text, 'predicted_class': pred, 'timestamp': timestamp}
+            for i, (text, pred) in enumerate(zip(texts, predictions))
+        ]
         
-        # Predict
-        predictions_encoded = self.model.predict(X)
-        predictions = self.label_encoder.inverse_transform(predictions_encoded)
-        
-        results = []
-        
-        for i, (text, pred) in enumerate(zip(texts, predictions)):
-            result = {
-                'id': i,
-                'text': text,
-                'predicted_class': pred,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            if return_probabilities and hasattr(self.model, 'predict_proba'):
-                probas = self.model.predict_proba(X[i:i+1])[0]
-                pred_idx = predictions_encoded[i]
-                
-                result['confidence'] = float(probas[pred_idx])
-                result['all_probabilities'] = {
-                    cls: float(prob) 
-                    for cls, prob in zip(self.label_encoder.classes_, probas)
-                }
-            
-            results.append(result)
+        if return_probabilities:
+            classes = self.label_encoder.classes_.tolist()
+            for result, confidence, row in zip(results, confidences.tolist(), probas.tolist()):
+                result['confidence'] = confidence
+                result['all_probabilities'] = dict(zip(classes, row))
         
         logger.info("Batch processing completed")
         return results
     
-    def evaluate_dataset(self, csv_path: str) -> Dict:
+    def evaluate_dataset(self, csv_path: str, chunk_size: int = EVAL_CHUNK_SIZE,
+                         n_jobs: int = 1) -> Dict:
         """
-        Evaluate model on a labeled dataset
+        Evaluate model on a labeled dataset of any size
+        
+        The CSV is read in chunks and each chunk only adds to a confusion
+        matrix, so memory does not grow with the file. With n_jobs > 1 the
+        chunks are scored in worker processes, with at most two chunks per
+        worker in flight.
         
         Args:
             csv_path: Path to CSV with 'texto_mensaje' and 'clase_emergencia'
+            chunk_size: Rows read and scored at a time
+            n_jobs: Worker processes (1 = score in this process)
             
         Returns:
             Evaluation metrics dictionary
         """
         logger.info("Evaluating on dataset: %s", csv_path)
         
-        df = pd.read_csv(csv_path)
-        
-        if 'texto_mensaje' not in df.columns or 'clase_emergencia' not in df.columns:
+        header = pd.read_csv(csv_path, nrows=0)
+        if not all(col in header.columns for col in EVAL_COLUMNS):
             raise ValueError("CSV must contain 'texto_mensaje' and 'clase_emergencia' columns")
         
-        X = self.vectorizer.transform(df['texto_mensaje'])
-        y_true_encoded = self.label_encoder.transform(df['clase_emergencia'])
-        y_pred_encoded = self.model.predict(X)
+        n_classes = len(self.label_encoder.classes_)
+        cm = np.zeros((n_classes, n_classes), dtype=np.int64)
+        chunks = pd.read_csv(csv_path, usecols=EVAL_COLUMNS, chunksize=chunk_size)
+        
+        start = time.perf_counter()
+        if n_jobs <= 1:
+            for chunk in chunks:
+                cm += _score_chunk(self, chunk['texto_mensaje'].tolist(), chunk['clase_emergencia'].tolist())
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                     initargs=(self,)) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(
+                        _score_worker_chunk,
+                        chunk['texto_mensaje'].tolist(), chunk['clase_emergencia'].tolist()
+                    ))
+                    if len(pending) >= 2 * n_jobs:
+                        cm += pending.popleft().result()
+                while pending:
+                    cm += pending.popleft().result()
+        wall_time = time.perf_counter() - start
         
         from sklearn.metrics import (
             accuracy_score, precision_recall_fscore_support,
-            classification_report, confusion_matrix
+            classification_report
         )
         
-        accuracy = accuracy_score(y_true_encoded, y_pred_encoded)
+        # Every (true, predicted) cell of the matrix weighted by its count
+        # gives the same scores as the full label arrays
+        y_true_encoded, y_pred_encoded = (idx.ravel() for idx in np.indices(cm.shape))
+        counts = cm.ravel()
+        
+        accuracy = accuracy_score(y_true_encoded, y_pred_encoded, sample_weight=counts)
         precision, recall, f1, _ = precision_recall_fscore_support(
-            y_true_encoded, y_pred_encoded, average='weighted', zero_division=0
+            y_true_encoded, y_pred_encoded, average='weighted',
+            sample_weight=counts, zero_division=0
         )
         
         results = {
             'dataset': csv_path,
-            'n_samples': len(df),
+            'n_samples': int(cm.sum()),
             'accuracy': float(accuracy),
             'precision': float(precision),
             'recall': float(recall),
             'f1_score': float(f1),
+            'wall_time_seconds': wall_time,
             'timestamp': datetime.now().isoformat()
         }
         
-        logger.info("Evaluation Results:")
+        logger.info("Evaluation Results (%d samples in %.1fs):", results['n_samples'], wall_time)
         logger.info("  Accuracy:  %.4f", accuracy)
         logger.info("  Precision: %.4f", precision)
         logger.info("  Recall:    %.4f", recall)
@@ -237,7 +295,9 @@ class EmergencyInferenceEngine:
         # Detailed report
         report = classification_report(
             y_true_encoded, y_pred_encoded,
+            labels=np.arange(n_classes),
             target_names=self.label_encoder.classes_,
+            sample_weight=counts,
             zero_division=0
         )
         logger.info("\nDetailed Classification Report:\n%s", report)
@@ -310,6 +370,30 @@ class EmergencyInferenceEngine:
                 print(f"\nError: {str(e)}")
 
 
+def _score_chunk(engine: EmergencyInferenceEngine, texts: List[str], labels: List[str]) -> np.ndarray:
+    """Confusion matrix (true x predicted, encoded) of one chunk"""
+    y_true = engine.label_encoder.transform(labels)
+    y_pred, _, _ = engine.predict_matrix(engine.vectorizer.transform(texts))
+    
+    n_classes = len(engine.label_encoder.classes_)
+    cm = np.zeros((n_classes, n_classes), dtype=np.int64)
+    np.add.at(cm, (y_true, y_pred), 1)
+    return cm
+
+
+# Engine of each evaluate_dataset worker process
+_worker_engine = None
+
+
+def _init_worker(engine: EmergencyInferenceEngine):
+    global _worker_engine
+    _worker_engine = engine
+
+
+def _score_worker_chunk(texts: List[str], labels: List[str]) -> np.ndarray:
+    return _score_chunk(_worker_engine, texts, labels)
+
+
 def run_demo_predictions():
     """Run demo predictions with sample emergency messages"""
     demo_cases = [
@@ -360,6 +444,18 @@ def main():
         type=str,
         help='Path to CSV for evaluation (for evaluate mode)'
     )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=EVAL_CHUNK_SIZE,
+        help='Rows read and scored at a time (for evaluate mode)'
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        help='Worker processes for scoring chunks (for evaluate mode)'
+    )
     
     args = parser.parse_args()
     
@@ -385,7 +481,7 @@ def main():
             if not args.csv:
                 raise ValueError("--csv argument required for evaluate mode")
             
-            results = engine.evaluate_dataset(args.csv)
+            results = engine.evaluate_dataset(args.csv, chunk_size=args.chunk_size, n_jobs=args.jobs)
             print("\nEvaluation Results:")
             print(json.dumps(results, indent=2, ensure_ascii=False))
         
@@ -11,7 +11,7 @@ import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, VotingClassifier
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.model_selection import train_test_split, GridSearchCV, StratifiedKFold
+from sklearn.model_selection import train_test_split, StratifiedKFold
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import (
     classification_report, 
@@ -30,6 +30,9 @@ from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+# Hyperparameter search and core budget shared by the trainers
+from aura_common.training import HyperparameterSearch, SEARCH_CONFIG, split_jobs
+
 # Configuration
 CONFIG = {
     'random_state': 42,
@@ -48,6 +51,8 @@ CONFIG = {
     'min_samples_leaf': 2,
     'class_weight': 'balanced',
     'enable_hyperparameter_tuning': True,
+    # search_mode, compare_modes, halving_*, n_jobs (see aura_common.training)
+    **SEARCH_CONFIG,
     'use_ensemble': True
 }
 
@@ -78,6 +83,7 @@ class EmergencyClassifier:
         self.config = config
         self.model = None
         self.vectorizer = None
+        self.search = HyperparameterSearch(config)
         self.label_encoder = None
         self.metrics = {}
         
@@ -138,6 +144,13 @@ class EmergencyClassifier:
     
     def build_ensemble_model(self):
         """Create ensemble model with multiple classifiers"""
+        n_jobs = self.config['n_jobs']
+        if self.config['use_ensemble']:
+            # The two members fit in parallel; the forest gets the cores left
+            outer_jobs, rf_jobs = split_jobs(n_jobs, 2)
+        else:
+            outer_jobs, rf_jobs = 1, n_jobs
+        
         rf = RandomForestClassifier(
             n_estimators=self.config['n_estimators'],
             max_depth=self.config['max_depth'],
@@ -145,7 +158,7 @@ class EmergencyClassifier:
             min_samples_leaf=self.config['min_samples_leaf'],
             class_weight=self.config['class_weight'],
             random_state=self.config['random_state'],
-            n_jobs=-1,
+            n_jobs=rf_jobs,
             bootstrap=True,
             oob_score=True
         )
@@ -161,7 +174,7 @@ class EmergencyClassifier:
             ensemble = VotingClassifier(
                 estimators=[('rf', rf), ('gb', gb)],
                 voting='soft',
-                n_jobs=-1
+                n_jobs=outer_jobs
             )
             logger.info("Using ensemble model: RandomForest + GradientBoosting")
             return ensemble
@@ -170,7 +183,7 @@ class EmergencyClassifier:
         return rf
     
     def hyperparameter_tuning(self, X_train, y_train):
-        """Perform grid search for optimal hyperparameters"""
+        """Search for optimal hyperparameters (see search_mode)"""
         logger.info("Starting hyperparameter optimization...")
         
         param_grid = {
@@ -182,34 +195,20 @@ class EmergencyClassifier:
         
         rf_base = RandomForestClassifier(
             class_weight=self.config['class_weight'],
-            random_state=self.config['random_state'],
-            n_jobs=-1
+            random_state=self.config['random_state']
         )
         
         cv = StratifiedKFold(n_splits=self.config['n_splits'], shuffle=True, 
                             random_state=self.config['random_state'])
         
-        grid_search = GridSearchCV(
-            rf_base, 
-            param_grid, 
-            cv=cv, 
-            scoring='f1_weighted',
-            n_jobs=-1,
-            verbose=2
-        )
-        
-        grid_search.fit(X_train, y_train)
-        
-        logger.info("Best parameters found: %s", grid_search.best_params_)
-        logger.info("Best cross-validation score: %.4f", grid_search.best_score_)
-        
-        return grid_search.best_estimator_
+        return self.search.run(rf_base, param_grid, cv, X_train, y_train)
     
     def train(self, X_text, y):
         """Main training pipeline with validation"""
         logger.info("=" * 80)
         logger.info("TRAINING PIPELINE STARTED")
         logger.info("=" * 80)
+        logger.info("CPU budget: %d cores", self.config['n_jobs'])
         
         # Encode labels
         self.label_encoder = LabelEncoder()
@@ -235,6 +234,8 @@ class EmergencyClassifier:
         # Train model
         if self.config['enable_hyperparameter_tuning']:
             self.model = self.hyperparameter_tuning(X_train, y_train)
+            if self.config['search_mode'] == 'compare':
+                self.search.compare_on_test(X_test, y_test)
         else:
             self.model = self.build_ensemble_model()
             self.model.fit(X_train, y_train)
@@ -278,6 +279,8 @@ class EmergencyClassifier:
             'n_train_samples': int(X_train.shape[0]),
             'n_test_samples': int(X_test.shape[0])
         }
+        if self.search.report is not None:
+            self.metrics['hyperparameter_search'] = self.search.report
         
         # Logging results
         logger.info("PERFORMANCE METRICS:")
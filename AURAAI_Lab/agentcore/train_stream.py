@@ -0,0 +1,289 @@
+"""
+AuraAgentCore - Streaming Emergency Classifier Training
+Out-of-core training pipeline for large transcript archives: the CSV is read
+in chunks, messages are hashed into a fixed n-gram space and a linear model
+is updated chunk by chunk, so memory is bounded by chunk_size and n_features
+instead of by the size of the dataset.
+
+The artifacts are saved next to the production forest (stream_* files), not
+over it; the model is a linear classifier with predict / predict_proba.
+
+Author: AuraAI_Lab
+Version: 1.0.0
+"""
+
+import os
+import json
+import time
+import zlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import LabelEncoder
+
+from train import EmergencyClassifier, CONFIG, DATA_PATH, logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Configuration
+STREAM_CONFIG = {
+    'random_state': CONFIG['random_state'],
+    'test_size': CONFIG['test_size'],
+    'chunk_size': 5000,          # rows held in memory at a time
+    'n_features': 2 ** 20,       # hashed n-gram space (fixed, no vocabulary)
+    'ngram_range': CONFIG['ngram_range'],
+    'n_epochs': 5,               # passes over the training split
+    'alpha': 1e-5,
+    'class_weight': 'balanced'   # from the label counts of the first pass
+}
+
+# Paths
+STREAM_MODEL_PATH = 'models/agentcore_stream_model.joblib'
+STREAM_VECTORIZER_PATH = 'models/agentcore_stream_vectorizer.joblib'
+STREAM_ENCODER_PATH = 'models/agentcore_stream_encoder.joblib'
+STREAM_METRICS_PATH = 'models/training_stream_metrics.json'
+
+REQUIRED_COLS = ['texto_mensaje', 'clase_emergencia']
+
+# Resolution of the hash-based train/test split
+SPLIT_BUCKETS = 10000
+
+
+def weighted_scores(cm):
+    """Accuracy, weighted precision/recall/F1 and MCC from a confusion matrix"""
+    cm = cm.astype(np.float64)
+    total = cm.sum()
+    correct = np.trace(cm)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(predicted > 0, np.diag(cm) / predicted, 0.0)
+        recall = np.where(support > 0, np.diag(cm) / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    weights = support / total if total else support
+
+    # Multiclass Matthews correlation (same formula as matthews_corrcoef)
+    denominator = np.sqrt((total ** 2 - predicted @ predicted) * (total ** 2 - support @ support))
+    mcc = (correct * total - support @ predicted) / denominator if denominator else 0.0
+
+    return {
+        'accuracy': float(correct / total) if total else 0.0,
+        'precision': float(precision @ weights),
+        'recall': float(recall @ weights),
+        'f1_score': float(f1 @ weights),
+        'matthews_corrcoef': float(mcc),
+        'per_class': (precision, recall, f1, support)
+    }
+
+
+class StreamingEmergencyClassifier(EmergencyClassifier):
+    """Out-of-core variant of EmergencyClassifier (hashing + partial_fit)"""
+
+    def __init__(self, config, data_path=DATA_PATH):
+        super().__init__(config)
+        self.data_path = data_path
+        self.class_weights = None
+        self.n_rows = {'train': 0, 'test': 0}
+
+    def create_advanced_vectorizer(self):
+        """Stateless hashed n-grams with the same text preprocessing as TF-IDF"""
+        return HashingVectorizer(
+            n_features=self.config['n_features'],
+            ngram_range=self.config['ngram_range'],
+            strip_accents='unicode',
+            lowercase=True,
+            analyzer='word',
+            token_pattern=r'\b[a-záéíóúñ]+\b',
+            stop_words=self._get_spanish_stopwords(),
+            alternate_sign=False,
+            norm='l2'
+        )
+
+    def iter_chunks(self):
+        """
+        Yield (texts, labels, is_test) per chunk of the CSV.
+
+        Each row goes to the test split by a hash of its text, so every pass
+        over the file gets the same split without keeping row indices, and
+        repeated messages never straddle train and test. Duplicates are only
+        dropped within a chunk; dropping them across the whole file would
+        need memory proportional to it.
+        """
+        header = pd.read_csv(self.data_path, nrows=0)
+        if not all(col in header.columns for col in REQUIRED_COLS):
+            raise ValueError(f"Dataset must contain columns: {REQUIRED_COLS}")
+
+        threshold = self.config['test_size'] * SPLIT_BUCKETS
+        for chunk in pd.read_csv(self.data_path, usecols=REQUIRED_COLS, dtype=str,
+                                 chunksize=self.config['chunk_size']):
+            chunk = chunk.dropna(subset=REQUIRED_COLS).drop_duplicates(subset=['texto_mensaje'])
+            texts = chunk['texto_mensaje'].to_numpy()
+            buckets = np.fromiter(
+                (zlib.crc32(text.encode('utf-8')) % SPLIT_BUCKETS for text in texts),
+                dtype=np.int64, count=len(texts)
+            )
+            yield texts, chunk['clase_emergencia'].to_numpy(), buckets < threshold
+
+    def scan_labels(self):
+        """First pass: classes and training-split counts (labels only)"""
+        logger.info("Scanning labels in: %s", self.data_path)
+
+        counts = {}
+        for _, labels, is_test in self.iter_chunks():
+            self.n_rows['test'] += int(is_test.sum())
+            classes, n = np.unique(labels[~is_test], return_counts=True)
+            for label, count in zip(classes, n):
+                counts[label] = counts.get(label, 0) + int(count)
+        self.n_rows['train'] = sum(counts.values())
+
+        if not counts:
+            raise ValueError(f"No training rows found in {self.data_path}")
+
+        self.label_encoder = LabelEncoder().fit(sorted(counts))
+        if self.config['class_weight'] == 'balanced':
+            # Same weights as class_weight='balanced', which partial_fit rejects
+            n_classes = len(counts)
+            self.class_weights = {
+                int(self.label_encoder.transform([label])[0]): self.n_rows['train'] / (n_classes * count)
+                for label, count in counts.items()
+            }
+
+        logger.info("Rows - Train: %d, Test: %d", self.n_rows['train'], self.n_rows['test'])
+        logger.info("Class distribution (train):\n%s",
+                    '\n'.join(f"{label:<20} {count}" for label, count in sorted(counts.items())))
+
+    def train(self):
+        """Stream the training split n_epochs times through partial_fit"""
+        logger.info("=" * 80)
+        logger.info("STREAMING TRAINING PIPELINE STARTED")
+        logger.info("=" * 80)
+
+        self.scan_labels()
+        self.vectorizer = self.create_advanced_vectorizer()
+        self.model = SGDClassifier(
+            loss='log_loss',
+            alpha=self.config['alpha'],
+            class_weight=self.class_weights,
+            average=True,
+            random_state=self.config['random_state']
+        )
+        classes = np.arange(len(self.label_encoder.classes_))
+        rng = np.random.default_rng(self.config['random_state'])
+
+        start = time.perf_counter()
+        for epoch in range(1, self.config['n_epochs'] + 1):
+            for texts, labels, is_test in self.iter_chunks():
+                if is_test.all():
+                    continue
+                # Shuffle inside the chunk; the file order is kept across chunks
+                order = rng.permutation(np.flatnonzero(~is_test))
+                X = self.vectorizer.transform(texts[order])
+                y = self.label_encoder.transform(labels[order])
+                self.model.partial_fit(X, y, classes=classes)
+            logger.info("Epoch %d/%d done (%.1fs)", epoch, self.config['n_epochs'],
+                        time.perf_counter() - start)
+        train_time = time.perf_counter() - start
+
+        self.evaluate()
+        self.metrics['train_time_seconds'] = train_time
+        self.metrics['train_rows_per_second'] = self.n_rows['train'] * self.config['n_epochs'] / train_time
+
+        logger.info("=" * 80)
+        logger.info("TRAINING COMPLETED SUCCESSFULLY")
+        logger.info("=" * 80)
+
+    def evaluate(self):
+        """Stream the file once more, accumulating train and test confusion matrices"""
+        logger.info("Evaluating model performance (streaming)...")
+
+        n_classes = len(self.label_encoder.classes_)
+        cms = {split: np.zeros((n_classes, n_classes), dtype=np.int64) for split in ('train', 'test')}
+        for texts, labels, is_test in self.iter_chunks():
+            y_true = self.label_encoder.transform(labels)
+            y_pred = self.model.predict(self.vectorizer.transform(texts))
+            np.add.at(cms['test'], (y_true[is_test], y_pred[is_test]), 1)
+            np.add.at(cms['train'], (y_true[~is_test], y_pred[~is_test]), 1)
+
+        train_scores = weighted_scores(cms['train'])
+        test_scores = weighted_scores(cms['test'])
+
+        self.metrics = {
+            'timestamp': datetime.now().isoformat(),
+            'mode': 'streaming',
+            'train_accuracy': train_scores['accuracy'],
+            'test_accuracy': test_scores['accuracy'],
+            'precision': test_scores['precision'],
+            'recall': test_scores['recall'],
+            'f1_score': test_scores['f1_score'],
+            'matthews_corrcoef': test_scores['matthews_corrcoef'],
+            'classes': self.label_encoder.classes_.tolist(),
+            'n_features': int(self.config['n_features']),
+            'n_train_samples': int(cms['train'].sum()),
+            'n_test_samples': int(cms['test'].sum()),
+            'chunk_size': int(self.config['chunk_size']),
+            'n_epochs': int(self.config['n_epochs'])
+        }
+        if resource is not None:
+            # ru_maxrss is in KB on Linux
+            self.metrics['peak_memory_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        logger.info("PERFORMANCE METRICS:")
+        logger.info("  Train Accuracy: %.4f", train_scores['accuracy'])
+        logger.info("  Test Accuracy:  %.4f", test_scores['accuracy'])
+        logger.info("  Precision:      %.4f", test_scores['precision'])
+        logger.info("  Recall:         %.4f", test_scores['recall'])
+        logger.info("  F1-Score:       %.4f", test_scores['f1_score'])
+        logger.info("  MCC:            %.4f", test_scores['matthews_corrcoef'])
+
+        logger.info("\nPER-CLASS METRICS (test):")
+        precision, recall, f1, support = test_scores['per_class']
+        for i, label in enumerate(self.label_encoder.classes_):
+            logger.info("  %-20s precision %.4f  recall %.4f  f1 %.4f  support %d",
+                        label, precision[i], recall[i], f1[i], support[i])
+
+        logger.info("\nCONFUSION MATRIX:")
+        logger.info("\n%s", cms['test'])
+
+    def save(self):
+        """Save all model artifacts"""
+        logger.info("Saving model artifacts...")
+
+        os.makedirs('models', exist_ok=True)
+
+        joblib.dump(self.model, STREAM_MODEL_PATH, compress=3)
+        joblib.dump(self.vectorizer, STREAM_VECTORIZER_PATH, compress=3)
+        joblib.dump(self.label_encoder, STREAM_ENCODER_PATH, compress=3)
+
+        with open(STREAM_METRICS_PATH, 'w') as f:
+            json.dump(self.metrics, f, indent=2)
+
+        logger.info("Model saved to: %s", STREAM_MODEL_PATH)
+        logger.info("Vectorizer saved to: %s", STREAM_VECTORIZER_PATH)
+        logger.info("Label encoder saved to: %s", STREAM_ENCODER_PATH)
+        logger.info("Metrics saved to: %s", STREAM_METRICS_PATH)
+
+
+def main():
+    """Main execution pipeline"""
+    try:
+        classifier = StreamingEmergencyClassifier(STREAM_CONFIG)
+        classifier.train()
+        classifier.save()
+
+        logger.info("Pipeline completed successfully")
+
+    except Exception as e:
+        logger.error("Training failed with error: %s", str(e), exc_info=True)
+        raise
+
+
+if __name__ == "__main__":
+    main()
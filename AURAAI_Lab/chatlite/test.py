@@ -12,13 +12,19 @@ import numpy as np
 import joblib
 import os
 import json
+import random
 import logging
 import argparse
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 import warnings
 warnings.filterwarnings('ignore')
 
+# Compiled tree-ensemble inference and conversation sessions shared with the
+# orchestrator (aura_common)
+from aura_common.forest import compile_estimator, predict_one
+from aura_common.sessions import ConversationSession
+
 # Paths
 MODEL_PATH = 'models/chatlite_classifier.joblib'
 VECTORIZER_PATH = 'models/chatlite_vectorizer.joblib'
@@ -111,6 +117,7 @@ class ChatIntentEngine:
     
     def __init__(self):
         self.model = None
+        self.compiled_model = None
         self.vectorizer = None
         self.label_encoder = None
         self.metrics = None
@@ -133,6 +140,10 @@ class ChatIntentEngine:
             self.vectorizer = joblib.load(VECTORIZER_PATH)
             self.label_encoder = joblib.load(ENCODER_PATH)
             
+            # Flatten the forest for single-sample inference (other models,
+            # e.g. a VotingClassifier ensemble, are used as they are)
+            self.compiled_model = compile_estimator(self.model)
+            
             if os.path.exists(METRICS_PATH):
                 with open(METRICS_PATH, 'r') as f:
                     self.metrics = json.load(f)
@@ -167,8 +178,8 @@ class ChatIntentEngine:
         # Vectorize
         X = self.vectorizer.transform([text])
         
-        # Predict
-        prediction_encoded = self.model.predict(X)[0]
+        # Predict (class, probabilities and confidence in one pass)
+        prediction_encoded, probas, confidence = predict_one(self.compiled_model, X)
         prediction = self.label_encoder.inverse_transform([prediction_encoded])[0]
         
         result = {
@@ -179,27 +190,24 @@ class ChatIntentEngine:
         }
         
         # Add probabilities
-        if hasattr(self.model, 'predict_proba'):
-            probas = self.model.predict_proba(X)[0]
-            
-            prob_dist = {
-                intent: float(prob)
-                for intent, prob in zip(self.label_encoder.classes_, probas)
+        prob_dist = {
+            intent: float(prob)
+            for intent, prob in zip(self.label_encoder.classes_, probas)
+        }
+        
+        result['confidence'] = confidence
+        result['all_probabilities'] = prob_dist
+        
+        # Top 3
+        sorted_probs = sorted(prob_dist.items(), key=lambda x: x[1], reverse=True)
+        result['top_3_intents'] = [
+            {
+                'intent': intent,
+                'probability': prob,
+                'description': self.INTENT_DESCRIPTIONS.get(intent, '')
             }
-            
-            result['confidence'] = float(probas[prediction_encoded])
-            result['all_probabilities'] = prob_dist
-            
-            # Top 3
-            sorted_probs = sorted(prob_dist.items(), key=lambda x: x[1], reverse=True)
-            result['top_3_intents'] = [
-                {
-                    'intent': intent,
-                    'probability': prob,
-                    'description': self.INTENT_DESCRIPTIONS.get(intent, '')
-                }
-                for intent, prob in sorted_probs[:3]
-            ]
+            for intent, prob in sorted_probs[:3]
+        ]
         
         # Add suggested responses
         if return_suggestions:
@@ -210,12 +218,14 @@ class ChatIntentEngine:
         
         return result
     
-    def predict_conversation(self, messages: List[str]) -> List[Dict]:
+    def predict_conversation(self, messages: List[str], history_size: Optional[int] = None) -> List[Dict]:
         """
         Predict intents for a conversation sequence
         
         Args:
             messages: List of user messages in order
+            history_size: Previous intents kept in each result's intent_history
+                          (None keeps the whole conversation)
             
         Returns:
             List of prediction dictionaries with conversation context
@@ -225,30 +235,19 @@ class ChatIntentEngine:
         
         logger.info("Analyzing conversation with %d messages", len(messages))
         
-        results = []
-        intent_history = []
+        # Same emotional-state rules as the orchestrator's sessions; with a
+        # history_size each message costs O(1) regardless of conversation length
+        session = ConversationSession('conversation', history_size=history_size)
         
-        for i, message in enumerate(messages):
+        results = []
+        for message in messages:
             result = self.predict_intent(message, return_suggestions=True)
-            result['message_index'] = i
-            result['intent_history'] = intent_history.copy()
-            
-            # Detect emotional progression
-            if i > 0:
-                prev_intent = results[-1]['predicted_intent']
-                curr_intent = result['predicted_intent']
-                
-                # Check if user is calming down
-                if prev_intent == 'expresion_miedo' and curr_intent in ['confirmacion', 'agradecimiento']:
-                    result['emotional_state'] = 'mejorando'
-                elif prev_intent == 'solicitud_calma' and curr_intent == 'confirmacion':
-                    result['emotional_state'] = 'respondiendo_bien'
-                elif curr_intent == 'expresion_miedo':
-                    result['emotional_state'] = 'necesita_apoyo'
-                else:
-                    result['emotional_state'] = 'estable'
+            context = session.add(result['predicted_intent'])
             
-            intent_history.append(result['predicted_intent'])
+            result['message_index'] = context['message_index']
+            result['intent_history'] = context['intent_history']
+            if context['emotional_state'] is not None:
+                result['emotional_state'] = context['emotional_state']
             results.append(result)
         
         return results
@@ -441,5 +440,4 @@ def main():
 
 
 if __name__ == "__main__":
-    import random
     main()
@@ -11,7 +11,7 @@ import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.model_selection import train_test_split, GridSearchCV, StratifiedKFold
+from sklearn.model_selection import train_test_split, StratifiedKFold
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import (
     classification_report,
@@ -27,6 +27,9 @@ from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+# Hyperparameter search shared by the trainers
+from aura_common.training import HyperparameterSearch, SEARCH_CONFIG
+
 # Configuration
 CONFIG = {
     'random_state': 42,
@@ -44,7 +47,9 @@ CONFIG = {
     'min_samples_split': 3,
     'min_samples_leaf': 1,
     'class_weight': 'balanced',
-    'enable_hyperparameter_tuning': False
+    'enable_hyperparameter_tuning': False,
+    # search_mode, compare_modes, halving_*, n_jobs (see aura_common.training)
+    **SEARCH_CONFIG
 }
 
 # Paths
@@ -74,6 +79,7 @@ class ChatIntentClassifier:
         self.config = config
         self.model = None
         self.vectorizer = None
+        self.search = HyperparameterSearch(config)
         self.label_encoder = None
         self.metrics = {}
         
@@ -140,7 +146,7 @@ class ChatIntentClassifier:
             min_samples_leaf=self.config['min_samples_leaf'],
             class_weight=self.config['class_weight'],
             random_state=self.config['random_state'],
-            n_jobs=-1,
+            n_jobs=self.config['n_jobs'],
             bootstrap=True,
             oob_score=True,
             max_features='sqrt'
@@ -154,6 +160,7 @@ class ChatIntentClassifier:
         logger.info("=" * 80)
         logger.info("CHATLITE TRAINING PIPELINE STARTED")
         logger.info("=" * 80)
+        logger.info("CPU budget: %d cores", self.config['n_jobs'])
         
         # Encode labels
         self.label_encoder = LabelEncoder()
@@ -179,6 +186,8 @@ class ChatIntentClassifier:
         # Train model
         if self.config['enable_hyperparameter_tuning']:
             self.model = self.hyperparameter_tuning(X_train, y_train)
+            if self.config['search_mode'] == 'compare':
+                self.search.compare_on_test(X_test, y_test)
         else:
             self.model = self.build_model()
             logger.info("Training model...")
@@ -193,7 +202,7 @@ class ChatIntentClassifier:
         logger.info("=" * 80)
     
     def hyperparameter_tuning(self, X_train, y_train):
-        """Optimize hyperparameters with grid search"""
+        """Optimize hyperparameters (see search_mode)"""
         logger.info("Starting hyperparameter optimization...")
         
         param_grid = {
@@ -205,25 +214,13 @@ class ChatIntentClassifier:
         
         rf_base = RandomForestClassifier(
             class_weight=self.config['class_weight'],
-            random_state=self.config['random_state'],
-            n_jobs=-1
+            random_state=self.config['random_state']
         )
         
         cv = StratifiedKFold(n_splits=self.config['n_splits'], shuffle=True,
                             random_state=self.config['random_state'])
         
-        grid_search = GridSearchCV(
-            rf_base, param_grid, cv=cv,
-            scoring='f1_weighted',
-            n_jobs=-1, verbose=2
-        )
-        
-        grid_search.fit(X_train, y_train)
-        
-        logger.info("Best parameters: %s", grid_search.best_params_)
-        logger.info("Best CV score: %.4f", grid_search.best_score_)
-        
-        return grid_search.best_estimator_
+        return self.search.run(rf_base, param_grid, cv, X_train, y_train)
     
     def evaluate(self, X_train, y_train, X_test, y_test):
         """Comprehensive evaluation"""
@@ -251,6 +248,8 @@ class ChatIntentClassifier:
             'n_train_samples': int(X_train.shape[0]),
             'n_test_samples': int(X_test.shape[0])
         }
+        if self.search.report is not None:
+            self.metrics['hyperparameter_search'] = self.search.report
         
         logger.info("PERFORMANCE METRICS:")
         logger.info("  Train Accuracy: %.4f", train_acc)
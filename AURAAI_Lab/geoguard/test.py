@@ -19,15 +19,21 @@ from typing import Dict, List, Tuple
 import warnings
 warnings.filterwarnings('ignore')
 
+# Shared nearest-facility index and cell cache from the orchestrator (aura_common)
+from aura_common.spatial_index import FacilityIndex
+from aura_common.facility_cache import FacilityCellCache
+
 # Paths
 CLUSTERS_MODEL_PATH = 'models/geoguard_clusters.joblib'
-NEIGHBORS_MODEL_PATH = 'models/geoguard_neighbors.joblib'
 SCALER_PATH = 'models/geoguard_scaler.joblib'
 FACILITIES_PATH = 'models/facilities_database.json'
 ZONES_PATH = 'models/geographic_zones.json'
 METRICS_PATH = 'models/training_metrics.json'
 INFERENCE_LOG = 'models/inference.log'
 
+# Side of the coordinate cell used to cache nearest-facility lookups (~1 block)
+FACILITY_CELL_METERS = 50
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -60,9 +66,9 @@ class GeoGuardEngine:
     
     def __init__(self):
         self.kmeans_model = None
-        self.nn_model = None
         self.scaler = None
         self.facilities_db = None
+        self.facility_cache = None
         self.zones = None
         self.metrics = None
         self.is_loaded = False
@@ -74,7 +80,6 @@ class GeoGuardEngine:
         try:
             required_files = [
                 CLUSTERS_MODEL_PATH,
-                NEIGHBORS_MODEL_PATH,
                 SCALER_PATH,
                 FACILITIES_PATH
             ]
@@ -87,12 +92,19 @@ class GeoGuardEngine:
             
             # Load models
             self.kmeans_model = joblib.load(CLUSTERS_MODEL_PATH)
-            self.nn_model = joblib.load(NEIGHBORS_MODEL_PATH)
             self.scaler = joblib.load(SCALER_PATH)
             
             # Load facilities database
-            with open(FACILITIES_PATH, 'r', encoding='utf-8') as f:
-                self.facilities_db = json.load(f)
+            index = self._load_facilities()
+            
+            # Nearest-facility answers per ~50 m cell; editing the facilities
+            # file invalidates the cache and rebuilds the index
+            self.facility_cache = FacilityCellCache(
+                index,
+                cell_meters=FACILITY_CELL_METERS,
+                sources=[FACILITIES_PATH],
+                reload=self._load_facilities
+            )
             
             # Load zones
             if os.path.exists(ZONES_PATH):
@@ -115,19 +127,15 @@ class GeoGuardEngine:
             logger.error("Failed to load artifacts: %s", str(e))
             raise
     
-    def haversine_distance(self, lat1, lon1, lat2, lon2):
-        """Calculate haversine distance in kilometers"""
-        R = 6371  # Earth radius in km
-        
-        lat1_rad = np.radians(lat1)
-        lat2_rad = np.radians(lat2)
-        delta_lat = np.radians(lat2 - lat1)
-        delta_lon = np.radians(lon2 - lon1)
-        
-        a = np.sin(delta_lat/2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(delta_lon/2)**2
-        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
-        
-        return R * c
+    def _load_facilities(self) -> FacilityIndex:
+        """Read the facilities database and build its haversine index"""
+        with open(FACILITIES_PATH, 'r', encoding='utf-8') as f:
+            self.facilities_db = json.load(f)
+        return FacilityIndex(self.facilities_db)
+    
+    def cache_stats(self) -> Dict:
+        """Hit rate of the nearest-facility cell cache"""
+        return self.facility_cache.stats() if self.facility_cache is not None else {}
     
     def find_nearest_facilities(self, lat: float, lon: float,
                                facility_type: str = None,
@@ -147,51 +155,21 @@ class GeoGuardEngine:
         if not self.is_loaded:
             raise RuntimeError("Model not loaded. Call load_artifacts() first.")
         
-        # Convert to radians for haversine
-        query_point = np.radians([[lat, lon]])
-        
-        # Find k nearest neighbors
-        distances, indices = self.nn_model.kneighbors(query_point, n_neighbors=k)
-        
-        # Convert distances from radians to kilometers
-        distances_km = distances[0] * 6371
+        # Candidates cached per coordinate cell and type; distances are
+        # recomputed from the exact location, so results match a full search
+        nearest = self.facility_cache.nearest(lat, lon, tipo=facility_type, k=k)
         
         results = []
-        for i, (idx, dist) in enumerate(zip(indices[0], distances_km)):
-            facility = self.facilities_db[idx].copy()
+        for i, (dist, facility) in enumerate(nearest):
+            facility = facility.copy()
             facility['distance_km'] = float(dist)
             facility['rank'] = i + 1
             
             # Calculate estimated time (assuming 40 km/h average in city)
             facility['estimated_time_minutes'] = float(dist / 40 * 60)
-            
-            # Filter by type if specified
-            if facility_type and facility['tipo'] != facility_type:
-                continue
-            
             results.append(facility)
         
-        # If filtered, get more results
-        if facility_type and len(results) < k:
-            all_distances = []
-            for facility in self.facilities_db:
-                if facility['tipo'] == facility_type:
-                    dist = self.haversine_distance(
-                        lat, lon,
-                        facility['latitud'], facility['longitud']
-                    )
-                    facility_copy = facility.copy()
-                    facility_copy['distance_km'] = dist
-                    facility_copy['estimated_time_minutes'] = dist / 40 * 60
-                    all_distances.append(facility_copy)
-            
-            all_distances.sort(key=lambda x: x['distance_km'])
-            results = all_distances[:k]
-            
-            for i, facility in enumerate(results):
-                facility['rank'] = i + 1
-        
-        return results[:k]
+        return results
     
     def find_zone(self, lat: float, lon: float) -> Dict:
         """Find which geographic zone contains the location"""
@@ -403,6 +381,10 @@ def run_demo_search():
             print(f"\n{i}. {facility['nombre']}")
             print(f"   Distancia: {facility['distance_km']:.2f} km")
             print(f"   Tiempo: ~{facility['estimated_time_minutes']:.0f} min")
+    
+    stats = engine.cache_stats()
+    logger.info("Facility cache: %d hits, %d misses (hit rate %.2f)",
+                stats['hits'], stats['misses'], stats['hit_rate'])
 
 
 def main():
@@ -0,0 +1,202 @@
+"""
+Formato de artefactos sin pickle para AgentCore, ChatLite y ResourceHub.
+
+Cada modelo se guarda como un directorio de arreglos .npy (nodos de los
+árboles, vocabulario, idf y clases) más un meta.json con los parámetros del
+vectorizador. Todo se abre con np.load(mmap_mode='r'): varios procesos del
+orquestador en el mismo host comparten una sola copia física de los bosques
+(page cache) y el tiempo de carga es casi constante.
+
+Uso:
+    python artifacts.py            # convierte los .joblib actuales
+    python artifacts.py --only agentcore
+"""
+
+import os
+import json
+import argparse
+import numpy as np
+from typing import Optional, Dict, Any, Tuple
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import LabelEncoder
+
+from aura_common.files import file_sha256
+from aura_common.forest import FlatForest
+
+FORMAT_VERSION = 1
+META_FILE = "meta.json"
+
+# Parámetros del TfidfVectorizer que afectan a transform()
+VECTORIZER_PARAMS = [
+    "lowercase", "strip_accents", "token_pattern", "ngram_range", "stop_words",
+    "analyzer", "norm", "use_idf", "smooth_idf", "sublinear_tf"
+]
+
+
+def save_vectorizer(vectorizer: TfidfVectorizer, directory: str) -> Dict[str, Any]:
+    """Guarda vocabulario (arreglo de términos por índice) e idf"""
+    terms = np.empty(len(vectorizer.vocabulary_), dtype=object)
+    for term, idx in vectorizer.vocabulary_.items():
+        terms[idx] = term
+
+    np.save(os.path.join(directory, "vocab_terms.npy"), terms.astype(str))
+    np.save(os.path.join(directory, "idf.npy"), np.asarray(vectorizer.idf_, dtype=np.float64))
+
+    params = {name: getattr(vectorizer, name) for name in VECTORIZER_PARAMS}
+    params["ngram_range"] = list(params["ngram_range"])
+    if params["stop_words"] is not None and not isinstance(params["stop_words"], str):
+        params["stop_words"] = list(params["stop_words"])
+    params["dtype"] = np.dtype(vectorizer.dtype).name
+    return params
+
+
+def load_vectorizer(directory: str, params: Dict[str, Any],
+                    mmap_mode: Optional[str] = "r") -> TfidfVectorizer:
+    """Reconstruye un TfidfVectorizer listo para transform()"""
+    params = dict(params)
+    params["ngram_range"] = tuple(params["ngram_range"])
+    params["dtype"] = np.dtype(params["dtype"]).type
+
+    vectorizer = TfidfVectorizer(**params)
+    terms = np.load(os.path.join(directory, "vocab_terms.npy"), mmap_mode=mmap_mode)
+    vectorizer.vocabulary_ = {str(term): idx for idx, term in enumerate(terms)}
+    vectorizer.idf_ = np.load(os.path.join(directory, "idf.npy"), mmap_mode=mmap_mode)
+    return vectorizer
+
+
+def convert(model_path: str, encoder_path: str, output_dir: str,
+            vectorizer_path: Optional[str] = None) -> Dict[str, Any]:
+    """Convierte los .joblib de un motor al formato memory-mapped"""
+    import joblib
+
+    model = joblib.load(model_path)
+    if not FlatForest.supports(model):
+        raise ValueError(f"{os.path.basename(model_path)} ({type(model).__name__}) no es un "
+                         f"bosque ni un árbol; el formato mmap solo los soporta")
+    encoder = joblib.load(encoder_path)
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    sources = {"model": model_path, "encoder": encoder_path}
+    if vectorizer_path is not None:
+        sources["vectorizer"] = vectorizer_path
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "model_type": type(model).__name__,
+        "source": os.path.basename(model_path),
+        "source_sha256": source_digests(sources),
+        "forest": FlatForest.from_estimator(model).save(output_dir)
+    }
+    np.save(os.path.join(output_dir, "classes.npy"), np.asarray(encoder.classes_).astype(str))
+
+    if vectorizer_path is not None:
+        meta["vectorizer"] = save_vectorizer(joblib.load(vectorizer_path), output_dir)
+
+    with open(os.path.join(output_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    return meta
+
+
+def has_artifacts(directory: str) -> bool:
+    """True si el directorio contiene artefactos convertidos"""
+    return os.path.exists(os.path.join(directory, META_FILE))
+
+
+# ruta -> (mtime_ns, tamaño, sha256): el watcher pregunta cada pocos segundos
+_digest_cache: Dict[str, Tuple[int, int, str]] = {}
+
+
+def source_digests(sources: Dict[str, str]) -> Dict[str, str]:
+    """sha256 de cada .joblib de origen (solo se recalcula si cambia su mtime o tamaño)"""
+    digests = {}
+    for role, path in sources.items():
+        stat = os.stat(path)
+        cached = _digest_cache.get(path)
+        if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+            cached = (stat.st_mtime_ns, stat.st_size, file_sha256(path))
+            _digest_cache[path] = cached
+        digests[role] = cached[2]
+    return digests
+
+
+def is_current(directory: str, sources: Dict[str, str]) -> bool:
+    """
+    True si los artefactos del directorio se convirtieron de exactamente
+    esos .joblib (p. ej. False después de reentrenar con train.py, o si
+    se convirtieron sin registrar el hash).
+    """
+    try:
+        with open(os.path.join(directory, META_FILE), "r", encoding="utf-8") as f:
+            recorded = json.load(f).get("source_sha256")
+        return recorded == source_digests(sources)
+    except (OSError, ValueError):
+        return False
+
+
+def load(directory: str, mmap_mode: Optional[str] = "r") -> Tuple[FlatForest, LabelEncoder, Optional[TfidfVectorizer]]:
+    """
+    Carga un motor convertido.
+
+    Returns:
+        (modelo, label_encoder, vectorizer o None si el motor no usa texto)
+    """
+    with open(os.path.join(directory, META_FILE), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    if meta.get("format_version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Versión de formato no soportada en {directory}: {meta.get('format_version')}"
+        )
+
+    model = FlatForest.load(directory, meta["forest"], mmap_mode=mmap_mode)
+
+    encoder = LabelEncoder()
+    encoder.classes_ = np.load(os.path.join(directory, "classes.npy"), mmap_mode=mmap_mode)
+
+    vectorizer = None
+    if "vectorizer" in meta:
+        vectorizer = load_vectorizer(directory, meta["vectorizer"], mmap_mode=mmap_mode)
+
+    return model, encoder, vectorizer
+
+
+def main():
+    """Convierte los artefactos joblib del orquestador"""
+    from main import MODELS, MMAP_DIRS
+
+    parser = argparse.ArgumentParser(
+        description="Convierte modelos .joblib al formato memory-mapped sin pickle"
+    )
+    parser.add_argument("--only", choices=sorted(MMAP_DIRS), help="Convertir un solo motor")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("CONVERSIÓN DE ARTEFACTOS A FORMATO MEMORY-MAPPED")
+    print("=" * 80)
+
+    for name, output_dir in MMAP_DIRS.items():
+        if args.only and name != args.only:
+            continue
+
+        try:
+            meta = convert(
+                MODELS[name],
+                MODELS[f"{name}_encoder"],
+                output_dir,
+                vectorizer_path=MODELS.get(f"{name}_vectorizer")
+            )
+        except ValueError as e:
+            # El orquestador carga ese motor de joblib
+            print(f"[WARN] {name}: {e}")
+            continue
+        size = sum(
+            os.path.getsize(os.path.join(output_dir, f)) for f in os.listdir(output_dir)
+        )
+        print(f"✓ {name}: {meta['forest']['n_trees']} árboles, "
+              f"{meta['forest']['n_nodes']} nodos, {size / 1024:.1f} KB -> {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
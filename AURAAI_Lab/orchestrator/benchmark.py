@@ -0,0 +1,342 @@
+"""
+Benchmark reproducible de toda la pila de inferencia de AuraOrchestrator.
+
+Reproduce emergencias.csv, chat_intents.csv y medical_profiles.csv con
+ubicaciones aleatorias en Durango (semilla fija) y mide:
+    - Arranque en frío (proceso nuevo: import + carga + primera respuesta)
+    - Latencia de handle_input (p50/p95/p99) y por etapa
+    - Throughput de handle_batch con varios tamaños de lote
+    - RSS máximo
+
+Los resultados se escriben como benchmark_metrics.json junto a cada
+training_metrics.json (models/ de cada motor) y el resumen completo en
+orchestrator/benchmark_metrics.json.
+
+Uso:
+    python benchmark.py                       # mide y guarda
+    python benchmark.py --compare             # compara contra el último resumen guardado
+    python benchmark.py --compare base.json --threshold 0.15
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import platform
+import resource
+import argparse
+import subprocess
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from main import AuraOrchestrator, BASE_DIR, PARENT_DIR
+
+DATASETS = {
+    "emergencias": os.path.join(PARENT_DIR, "agentcore/data/emergencias.csv"),
+    "chat_intents": os.path.join(PARENT_DIR, "chatlite/data/chat_intents.csv"),
+    "medical_profiles": os.path.join(PARENT_DIR, "resourcehub/data/medical_profiles.csv"),
+}
+
+# Zona urbana de Durango (lat, lon)
+DURANGO_BOUNDS = {"lat": (23.98, 24.08), "lon": (-104.72, -104.58)}
+
+SUMMARY_PATH = os.path.join(BASE_DIR, "benchmark_metrics.json")
+
+# Etapas que se reportan junto a los artefactos de cada motor
+ENGINE_STAGES = {
+    "agentcore": ["agentcore_vectorize", "agentcore_score"],
+    "chatlite": ["chatlite_vectorize", "chatlite_score"],
+    "resourcehub": ["resourcehub_lookup", "resourcehub_features", "resourcehub_score"],
+    "geoguard": ["facility_lookup"],
+}
+
+BATCH_SIZES = [1, 8, 32, 128, 512]
+
+COLD_START_SCRIPT = """
+import time, json, resource, sys
+start = time.perf_counter()
+sys.path.insert(0, {base_dir!r})
+import warnings
+warnings.filterwarnings("ignore")
+from main import AuraOrchestrator
+imported = time.perf_counter()
+orchestrator = AuraOrchestrator()
+loaded = time.perf_counter()
+orchestrator.handle_input(texto="Ayuda, hay un incendio en mi casa",
+                          ubicacion={{"lat": 24.027, "lon": -104.653}})
+answered = time.perf_counter()
+print("__BENCH__" + json.dumps({{
+    "import_seconds": imported - start,
+    "load_seconds": loaded - imported,
+    "first_response_seconds": answered - loaded,
+    "total_seconds": answered - start,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+}}))
+"""
+
+
+def build_records(n: int, seed: int = 42) -> List[Dict]:
+    """Registros reproducibles: texto de emergencias/chat, perfil y ubicación"""
+    rng = random.Random(seed)
+
+    emergencias = pd.read_csv(DATASETS["emergencias"])["texto_mensaje"].dropna().tolist()
+    chats = pd.read_csv(DATASETS["chat_intents"])["texto_usuario"].dropna().tolist()
+    profiles = pd.read_csv(DATASETS["medical_profiles"]).to_dict("records")
+
+    records = []
+    for i in range(n):
+        texts = emergencias if i % 2 == 0 else chats
+        profile = rng.choice(profiles)
+        record = {
+            "texto": rng.choice(texts),
+            "ubicacion": {
+                "lat": rng.uniform(*DURANGO_BOUNDS["lat"]),
+                "lon": rng.uniform(*DURANGO_BOUNDS["lon"])
+            }
+        }
+        if rng.random() < 0.5:
+            record["perfil"] = {
+                "edad": int(profile["edad"]),
+                "tiene_alergias": bool(profile["tiene_alergias"]),
+                "condicion_cronica": bool(profile["condicion_cronica"]),
+                "toma_medicamentos": bool(profile["toma_medicamentos"]),
+                "tipo_sangre": profile["tipo_sangre"]
+            }
+        records.append(record)
+    return records
+
+
+def percentiles_ms(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/media/máximo en ms de una lista de duraciones (s)"""
+    values = np.asarray(samples) * 1000
+    return {
+        "count": int(len(values)),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max())
+    }
+
+
+def measure_cold_start(runs: int = 3) -> Dict[str, Any]:
+    """Arranque en frío en procesos nuevos (mediana de varias corridas)"""
+    results = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", COLD_START_SCRIPT.format(base_dir=BASE_DIR)],
+            capture_output=True, text=True, check=True
+        )
+        line = next(l for l in completed.stdout.splitlines() if l.startswith("__BENCH__"))
+        results.append(json.loads(line[len("__BENCH__"):]))
+
+    cold_start = {key: float(np.median([r[key] for r in results])) for key in results[0]}
+    cold_start["runs"] = runs
+    return cold_start
+
+
+def measure_single(orchestrator: AuraOrchestrator, records: List[Dict],
+                   warmup: int = 50) -> Dict[str, Any]:
+    """Latencia de handle_input registro por registro"""
+    for record in records[:warmup]:
+        orchestrator.handle_input(**record)
+    orchestrator.metrics.reset()
+
+    samples = []
+    for record in records:
+        start = time.perf_counter()
+        orchestrator.handle_input(**record)
+        samples.append(time.perf_counter() - start)
+
+    return {**percentiles_ms(samples), "stages": orchestrator.latency_stats()}
+
+
+def measure_batches(orchestrator: AuraOrchestrator, records: List[Dict],
+                    batch_sizes: List[int]) -> Dict[str, Any]:
+    """Throughput de handle_batch para cada tamaño de lote (y latencia por registro de cada etapa)"""
+    results = {}
+    for size in batch_sizes:
+        orchestrator.handle_batch(records[:size])  # calentamiento
+        orchestrator.metrics.reset()
+
+        samples = []
+        start = time.perf_counter()
+        for i in range(0, len(records), size):
+            batch_start = time.perf_counter()
+            orchestrator.handle_batch(records[i:i + size])
+            samples.append(time.perf_counter() - batch_start)
+        elapsed = time.perf_counter() - start
+
+        results[str(size)] = {
+            "records_per_second": len(records) / elapsed,
+            "batch_latency": percentiles_ms(samples),
+            "stages": orchestrator.latency_stats()
+        }
+    return results
+
+
+def run_benchmark(n_records: int = 1000, seed: int = 42, use_cache: bool = False,
+                  cold_start_runs: int = 3, batch_sizes: Optional[List[int]] = None) -> Dict[str, Any]:
+    """Ejecuta todas las mediciones y devuelve el resumen"""
+    batch_sizes = batch_sizes or BATCH_SIZES
+    records = build_records(n_records, seed)
+
+    print("[Benchmark] Arranque en frío...")
+    cold_start = measure_cold_start(cold_start_runs)
+
+    orchestrator = AuraOrchestrator(lazy=False, watch=False)
+    if not use_cache:
+        # Sin caché: cada registro pasa por los modelos y por el índice
+        # completo de instalaciones (sin la caché por celda de GeoGuard)
+        orchestrator.result_caches.clear()
+        orchestrator.bundle.facility_cache = None
+
+    print(f"[Benchmark] Latencia de handle_input ({n_records} registros)...")
+    single = measure_single(orchestrator, records)
+
+    print(f"[Benchmark] Throughput de handle_batch (lotes {batch_sizes})...")
+    batches = measure_batches(orchestrator, records, batch_sizes)
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "config": {
+            "n_records": n_records,
+            "seed": seed,
+            "use_cache": use_cache,
+            "artifact_format": orchestrator.artifact_format,
+            "model_versions": orchestrator.bundle.versions,
+            "batch_sizes": batch_sizes
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "scikit_learn": sklearn.__version__,
+            "cpu_count": os.cpu_count(),
+            "machine": platform.machine()
+        },
+        "cold_start": cold_start,
+        "load_seconds": orchestrator.load_times,
+        "single_request": single,
+        "batch": batches,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+
+def save_results(summary: Dict[str, Any], summary_path: str = SUMMARY_PATH):
+    """Guarda el resumen y un benchmark_metrics.json por motor"""
+    stages = summary["single_request"]["stages"]
+    for engine, engine_stages in ENGINE_STAGES.items():
+        path = os.path.join(PARENT_DIR, engine, "models", "benchmark_metrics.json")
+        if not os.path.isdir(os.path.dirname(path)):
+            continue
+        engine_metrics = {
+            "timestamp": summary["timestamp"],
+            "config": summary["config"],
+            "load_seconds": summary["load_seconds"].get(engine),
+            "stages": {stage: stages[stage] for stage in engine_stages if stage in stages}
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(engine_metrics, f, indent=2)
+        print(f"✓ {path}")
+
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    print(f"✓ {summary_path}")
+
+
+def comparable_metrics(summary: Dict[str, Any]) -> Dict[str, tuple]:
+    """Métricas comparables: nombre -> (valor, True si más alto es mejor)"""
+    metrics = {
+        "cold_start.total_seconds": (summary["cold_start"]["total_seconds"], False),
+        "peak_rss_mb": (summary["peak_rss_mb"], False),
+    }
+    for key in ("p50_ms", "p95_ms", "p99_ms"):
+        metrics[f"single_request.{key}"] = (summary["single_request"][key], False)
+    for size, result in summary["batch"].items():
+        metrics[f"batch.{size}.records_per_second"] = (result["records_per_second"], True)
+    return metrics
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Compara dos resúmenes.
+
+    Returns:
+        Lista de métricas que empeoraron más que threshold (fracción relativa)
+    """
+    old_metrics = comparable_metrics(baseline)
+    new_metrics = comparable_metrics(current)
+
+    regressions = []
+    print(f"\n{'métrica':<36}{'base':>12}{'actual':>12}{'cambio':>10}")
+    for name, (new_value, higher_is_better) in new_metrics.items():
+        if name not in old_metrics or not old_metrics[name][0]:
+            continue
+        old_value = old_metrics[name][0]
+        change = (new_value - old_value) / old_value
+        worse = -change if higher_is_better else change
+
+        flag = ""
+        if worse > threshold:
+            regressions.append(name)
+            flag = "  ✗ regresión"
+        print(f"{name:<36}{old_value:>12.3f}{new_value:>12.3f}{change:>+10.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la pila de inferencia AURA")
+    parser.add_argument("--records", type=int, default=1000, help="Registros a reproducir")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cache", action="store_true", help="Medir con las cachés de resultados y de instalaciones activas")
+    parser.add_argument("--cold-start-runs", type=int, default=3)
+    parser.add_argument("--compare", nargs="?", const=SUMMARY_PATH, metavar="BASELINE",
+                        help="Comparar contra un resumen previo (por defecto el último guardado)")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Regresión relativa tolerada en --compare (0.10 = 10%%)")
+    parser.add_argument("--save", action="store_true",
+                        help="En --compare, guardar también los nuevos resultados")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print("=" * 80)
+    print("AURA SENTINEL - BENCHMARK DE INFERENCIA")
+    print("=" * 80)
+
+    summary = run_benchmark(
+        n_records=args.records,
+        seed=args.seed,
+        use_cache=args.cache,
+        cold_start_runs=args.cold_start_runs
+    )
+
+    single = summary["single_request"]
+    print(f"\nArranque en frío: {summary['cold_start']['total_seconds']:.3f}s")
+    print(f"handle_input: p50 {single['p50_ms']:.2f} ms | p95 {single['p95_ms']:.2f} ms | "
+          f"p99 {single['p99_ms']:.2f} ms")
+    for size, result in summary["batch"].items():
+        print(f"handle_batch[{size}]: {result['records_per_second']:.0f} registros/s")
+    print(f"RSS máximo: {summary['peak_rss_mb']:.1f} MB")
+
+    if baseline is None or args.save:
+        save_results(summary)
+
+    if baseline is not None:
+        regressions = compare(baseline, summary, args.threshold)
+        if regressions:
+            print(f"\n✗ {len(regressions)} métricas empeoraron más de {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"\n✓ Sin regresiones mayores a {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
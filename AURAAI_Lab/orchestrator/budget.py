@@ -0,0 +1,41 @@
+"""
+Presupuesto de latencia por petición para handle_input.
+
+Antes de cada etapa opcional (refinamiento con AgentCore, recomendaciones de
+ResourceHub, búsqueda de instalación) el orquestador compara el tiempo que
+queda con lo que suele tardar la etapa (percentil de sus histogramas, o un
+valor de config mientras no hay muestras). Si no alcanza, la etapa se omite
+o se responde con algo ya calculado (p. ej. un resultado en caché) y queda
+anotada en metadata.
+"""
+
+import time
+from typing import Dict, Any, List
+
+
+class LatencyBudget:
+    """Tiempo restante de una petición y etapas omitidas o resueltas con respaldo"""
+
+    def __init__(self, deadline_ms: float):
+        self.deadline_ms = float(deadline_ms)
+        self.started = time.perf_counter()
+        self.skipped: List[str] = []
+        self.fallbacks: List[str] = []
+
+    def remaining_ms(self) -> float:
+        return self.deadline_ms - (time.perf_counter() - self.started) * 1000
+
+    def allows(self, estimate_ms: float) -> bool:
+        """True si la etapa estimada cabe en lo que queda"""
+        return self.remaining_ms() >= estimate_ms
+
+    def skip(self, stage: str, fallback: bool = False):
+        """Anota una etapa omitida (fallback=True si se usó una respuesta precalculada)"""
+        (self.fallbacks if fallback else self.skipped).append(stage)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "skipped_stages": list(self.skipped),
+            "fallback_stages": list(self.fallbacks),
+            "deadline_ms": self.deadline_ms
+        }
@@ -0,0 +1,93 @@
+"""
+Caché acotada de resultados de clasificación (LRU + TTL).
+
+Durante un incidente llegan muchos mensajes idénticos o casi idénticos
+("ayuda", "incendio", "hay un accidente"). La clave es el texto ya
+normalizado y tokenizado, así que variantes que producen los mismos tokens
+comparten entrada y el resultado es el mismo que recalcularlo.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Hashable
+
+
+class ResultCache:
+    """LRU con expiración por entrada y contadores de hit/miss/eviction"""
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: Optional[float] = 300.0):
+        """
+        Args:
+            max_entries: Entradas máximas antes de desalojar la menos usada
+            ttl_seconds: Vida de cada entrada (None = sin expiración)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Valor cacheado o None (cuenta hit/miss)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Guarda un valor, desalojando las entradas menos usadas si hace falta"""
+        if self.max_entries <= 0:
+            return
+
+        expires_at = None
+        if self.ttl_seconds is not None:
+            expires_at = time.monotonic() + self.ttl_seconds
+
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Invalida todas las entradas (p. ej. al recargar un modelo)"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores para métricas / health checks"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
@@ -0,0 +1,327 @@
+"""
+Cascada de dos etapas para ChatLite y AgentCore.
+
+La primera etapa es una regresión logística sobre las mismas features TF-IDF
+del bosque: una multiplicación dispersa por mensaje. Se entrena para imitar
+las decisiones del bosque (destilación), así que sirve para cualquier
+versión de los modelos aunque su juego de etiquetas no coincida con el CSV.
+Si su confianza supera el umbral, su respuesta es la final; si no, el
+mensaje pasa al RandomForest / VotingClassifier completo.
+
+Los CSV del repo no cubren todas las clases de los modelos (las intents de
+ChatLite no son las de chat_intents.csv), así que el conjunto de destilación
+suma mensajes sintéticos: combinaciones aleatorias de términos del
+vocabulario del vectorizador, etiquetadas por el bosque. Sin ellos la etapa 1
+contesta con mucha confianza y mal fuera de la distribución de los CSV.
+
+El umbral se calibra sobre un split de prueba de textos únicos de ambos CSV
+(los CSV repiten mucho cada plantilla; con duplicados la prueba vería los
+mismos textos del entrenamiento): es el menor con el que la primera etapa
+coincide con el bosque en al menos target_agreement de los mensajes que
+contesta. Se guarda con la etapa y puede sobrescribirse en config
+cascade.thresholds.
+
+La regresión da probabilidades mucho más altas que el bosque (0.97-0.9999
+contra 0.15-0.55 típicos), y el orquestador decide con la confianza de
+ChatLite si corre AgentCore (confianza > 0.7, ajustado al bosque). Por eso la
+confianza que reporta la etapa 1 se calibra con una regresión isotónica de su
+probabilidad máxima a la del bosque sobre el mismo split de prueba.
+
+Uso:
+    python cascade.py                        # entrena y evalúa ambos motores
+    python cascade.py --engine agentcore --target-agreement 0.995
+"""
+
+import time
+import argparse
+import numpy as np
+from typing import Optional, Dict, Any, List
+
+FORMAT_VERSION = 2
+
+# Mismas proporciones que agentcore/train.py y chatlite/train.py
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+
+THRESHOLD_GRID = np.round(np.arange(0.30, 1.00, 0.01), 2)
+
+SYNTHETIC_MESSAGES = 20000
+SYNTHETIC_MAX_TERMS = 8
+
+
+def synthetic_messages(vectorizer, n: int, random_state: int = RANDOM_STATE) -> List[str]:
+    """n mensajes de 1 a SYNTHETIC_MAX_TERMS términos (n-gramas) del vocabulario"""
+    rng = np.random.RandomState(random_state)
+    terms = np.array(sorted(vectorizer.vocabulary_))
+    return [
+        " ".join(rng.choice(terms, rng.randint(1, SYNTHETIC_MAX_TERMS + 1)))
+        for _ in range(n)
+    ]
+
+
+class LinearStage:
+    """Primera etapa: softmax(X @ coef.T + intercept) sobre las clases codificadas del bosque"""
+
+    def __init__(self, coef: np.ndarray, intercept: np.ndarray, classes: np.ndarray,
+                 threshold: float, source_sha256: Optional[Dict[str, str]] = None,
+                 calibration: Optional[tuple] = None):
+        self.coef_t = np.ascontiguousarray(coef.T)
+        self.intercept = intercept
+        self.classes_ = classes
+        self.threshold = float(threshold)
+        self.source_sha256 = source_sha256 or {}
+        # (x, y) de la isotónica probabilidad máxima -> confianza del bosque
+        self.calibration = calibration if calibration is not None else (np.array([0.0, 1.0]),) * 2
+
+    @classmethod
+    def fit(cls, X, y, classes: np.ndarray, C: float = 10.0,
+            source_sha256: Optional[Dict[str, str]] = None) -> "LinearStage":
+        """Ajusta la regresión logística multinomial (las clases deben ser las del bosque)"""
+        from sklearn.linear_model import LogisticRegression
+
+        model = LogisticRegression(C=C, max_iter=2000)
+        model.fit(X, y)
+
+        # Clases que el bosque nunca predijo en el entrenamiento quedan con logit -inf
+        coef = np.zeros((len(classes), X.shape[1]))
+        intercept = np.full(len(classes), -np.inf)
+        rows = np.searchsorted(classes, model.classes_)
+        if len(model.classes_) == 2:
+            coef[rows[1]], intercept[rows[1]] = model.coef_[0], model.intercept_[0]
+            intercept[rows[0]] = 0.0
+        else:
+            coef[rows], intercept[rows] = model.coef_, model.intercept_
+        return cls(coef, intercept, classes, threshold=1.0, source_sha256=source_sha256)
+
+    def predict_proba(self, X) -> np.ndarray:
+        logits = np.asarray(X @ self.coef_t) + self.intercept
+        logits -= logits.max(axis=1, keepdims=True)
+        np.exp(logits, out=logits)
+        logits /= logits.sum(axis=1, keepdims=True)
+        return logits
+
+    def calibrate(self, stage_proba: np.ndarray, full_confidence: np.ndarray):
+        """Ajusta la isotónica de la probabilidad máxima de la etapa a la confianza del bosque"""
+        from sklearn.isotonic import IsotonicRegression
+
+        isotonic = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip")
+        isotonic.fit(stage_proba.max(axis=1), full_confidence)
+        self.calibration = (isotonic.X_thresholds_, isotonic.y_thresholds_)
+
+    def confidence(self, proba: np.ndarray) -> np.ndarray:
+        """Confianza en la escala del bosque para filas de predict_proba"""
+        return np.interp(proba.max(axis=1), *self.calibration)
+
+    def save(self, path: str):
+        np.savez_compressed(
+            path,
+            format_version=FORMAT_VERSION,
+            coef=self.coef_t.T,
+            intercept=self.intercept,
+            classes=self.classes_,
+            threshold=self.threshold,
+            calibration_x=self.calibration[0],
+            calibration_y=self.calibration[1],
+            source_names=np.array(list(self.source_sha256.keys())),
+            source_sha256=np.array(list(self.source_sha256.values()))
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "LinearStage":
+        with np.load(path) as data:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"Versión de cascada no soportada en {path}: {int(data['format_version'])}")
+            return cls(
+                data["coef"],
+                data["intercept"],
+                data["classes"],
+                float(data["threshold"]),
+                dict(zip(data["source_names"].tolist(), data["source_sha256"].tolist())),
+                (data["calibration_x"], data["calibration_y"])
+            )
+
+
+def calibrate_threshold(stage_proba: np.ndarray, full_pred: np.ndarray, classes: np.ndarray,
+                        target_agreement: float) -> float:
+    """Menor umbral con coincidencia >= target_agreement entre los mensajes que contesta la etapa 1"""
+    confidence = stage_proba.max(axis=1)
+    agrees = classes[np.argmax(stage_proba, axis=1)] == full_pred
+    for threshold in THRESHOLD_GRID:
+        answered = confidence >= threshold
+        if answered.any() and agrees[answered].mean() >= target_agreement:
+            return float(threshold)
+    return 1.0
+
+
+def cascade_predict(stage: LinearStage, model, X, threshold: float):
+    """(predicción, confianza calibrada, máscara de la etapa 1) de la cascada completa"""
+    proba = stage.predict_proba(X)
+    pred = stage.classes_[np.argmax(proba, axis=1)]
+    first = proba.max(axis=1) >= threshold
+    confidence = stage.confidence(proba)
+
+    rest = np.flatnonzero(~first)
+    if len(rest) == 1 and hasattr(model, "predict_one"):
+        pred[rest[0]], _, confidence[rest[0]] = model.predict_one(X[rest])
+    elif len(rest):
+        full_proba = model.predict_proba(X[rest])
+        pred[rest] = model.classes_[np.argmax(full_proba, axis=1)]
+        confidence[rest] = full_proba.max(axis=1)
+    return pred, confidence, first
+
+
+def _cpu_per_message(predict, X, repeats: int = 3) -> float:
+    """Tiempo de CPU (ms) por mensaje, el mejor de repeats pasadas mensaje a mensaje"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.process_time()
+        for i in range(X.shape[0]):
+            predict(X[i])
+        best = min(best, time.process_time() - start)
+    return best / X.shape[0] * 1000
+
+
+def evaluate(stage: LinearStage, model, encoder, X_test, y_test: Optional[List[str]],
+             threshold: float, synthetic: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """Cobertura de cada etapa, exactitud del bosque vs la cascada y CPU por mensaje"""
+    full_proba = model.predict_proba(X_test)
+    full_pred = model.classes_[np.argmax(full_proba, axis=1)]
+    pred, confidence, first = cascade_predict(stage, model, X_test, threshold)
+
+    report = {
+        "messages": int(X_test.shape[0]),
+        "threshold": threshold,
+        "first_stage_rate": float(first.mean()),
+        "agreement_with_full_model": float((pred == full_pred).mean()),
+        # Error de la confianza calibrada frente a la del bosque (etapa 1)
+        "confidence_mae": float(np.abs(confidence - full_proba.max(axis=1))[first].mean())
+        if first.any() else 0.0
+    }
+    if synthetic is not None and synthetic.any():
+        report["dataset_first_stage_rate"] = float(first[~synthetic].mean())
+        report["synthetic_first_stage_rate"] = float(first[synthetic].mean())
+
+    if y_test is not None:
+        labels = np.asarray(y_test, dtype=object)
+        known = np.isin(labels, encoder.classes_)
+        report["labelled_messages"] = int(known.sum())
+        if known.any():
+            truth = labels[known].astype(str)
+            full_accuracy = float((encoder.inverse_transform(full_pred[known]) == truth).mean())
+            cascade_accuracy = float((encoder.inverse_transform(pred[known]) == truth).mean())
+            report["full_model_accuracy"] = full_accuracy
+            report["cascade_accuracy"] = cascade_accuracy
+            report["accuracy_delta"] = cascade_accuracy - full_accuracy
+
+    # Mensaje a mensaje, como llega por handle_input (solo mensajes de los CSV)
+    if synthetic is not None:
+        X_test = X_test[np.flatnonzero(~synthetic)]
+    sample = X_test[np.random.RandomState(RANDOM_STATE).permutation(X_test.shape[0])[:500]]
+    full_ms = _cpu_per_message(model.predict_one, sample)
+    cascade_ms = _cpu_per_message(
+        lambda x: cascade_predict(stage, model, x, threshold), sample
+    )
+    report["full_model_cpu_ms"] = full_ms
+    report["cascade_cpu_ms"] = cascade_ms
+    report["cpu_speedup"] = full_ms / cascade_ms if cascade_ms else None
+    return report
+
+
+def build(name: str, target_agreement: float = 0.99, C: float = 10.0,
+          n_synthetic: int = SYNTHETIC_MESSAGES) -> Dict[str, Any]:
+    """Entrena, calibra, evalúa y guarda la primera etapa del motor"""
+    import joblib
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from aura_common.files import file_sha256
+    from aura_common.forest import compile_estimator
+    from main import MODELS, CASCADE, DATASETS
+
+    # Ambos CSV: el orquestador recibe los dos tipos de mensaje. La exactitud
+    # solo se mide con las etiquetas del CSV del propio motor
+    train_text, test_text, test_labels = [], [], []
+    for dataset, spec in DATASETS.items():
+        text_column, label_column = spec["columns"]
+        df = pd.read_csv(spec["path"]).dropna(subset=[text_column, label_column])
+        df = df.drop_duplicates(subset=[text_column])
+        train_split, test_split, _, label_split = train_test_split(
+            df[text_column].tolist(), df[label_column].tolist(),
+            test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=df[label_column]
+        )
+        train_text += train_split
+        test_text += test_split
+        test_labels += label_split if dataset == name else [None] * len(test_split)
+
+    # El bosque compilado da las mismas probabilidades que sklearn, más rápido
+    model = compile_estimator(joblib.load(MODELS[name]))
+    vectorizer = joblib.load(MODELS[f"{name}_vectorizer"])
+    encoder = joblib.load(MODELS[f"{name}_encoder"])
+
+    synthetic_train, synthetic_test = train_test_split(
+        synthetic_messages(vectorizer, n_synthetic), test_size=TEST_SIZE, random_state=RANDOM_STATE
+    ) if n_synthetic else ([], [])
+    synthetic = np.r_[np.zeros(len(test_text), dtype=bool), np.ones(len(synthetic_test), dtype=bool)]
+    train_text += synthetic_train
+    test_text += synthetic_test
+    test_labels += [None] * len(synthetic_test)
+
+    X_train = vectorizer.transform(train_text)
+    X_test = vectorizer.transform(test_text)
+
+    # Destilación: la etapa 1 aprende las decisiones del bosque
+    train_pred = model.classes_[np.argmax(model.predict_proba(X_train), axis=1)]
+    stage = LinearStage.fit(
+        X_train, train_pred, np.asarray(model.classes_), C=C,
+        source_sha256={
+            key: file_sha256(MODELS[key]) for key in (name, f"{name}_vectorizer", f"{name}_encoder")
+        }
+    )
+
+    test_proba = model.predict_proba(X_test)
+    test_pred = model.classes_[np.argmax(test_proba, axis=1)]
+    stage_proba = stage.predict_proba(X_test)
+    stage.threshold = calibrate_threshold(stage_proba, test_pred, stage.classes_, target_agreement)
+    stage.calibrate(stage_proba, test_proba.max(axis=1))
+    stage.save(CASCADE[name])
+
+    return evaluate(stage, model, encoder, X_test, test_labels, stage.threshold, synthetic)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Primera etapa lineal de ChatLite/AgentCore")
+    parser.add_argument("--engine", choices=["chatlite", "agentcore"],
+                        help="Motor a entrenar (por defecto ambos)")
+    parser.add_argument("--target-agreement", type=float, default=0.99,
+                        help="Coincidencia mínima con el bosque en los mensajes que contesta la etapa 1")
+    parser.add_argument("-C", type=float, default=10.0, help="Regularización inversa de la regresión")
+    parser.add_argument("--synthetic", type=int, default=SYNTHETIC_MESSAGES,
+                        help="Mensajes sintéticos del vocabulario para la destilación (0 = solo CSV)")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("CASCADA - PRIMERA ETAPA LINEAL")
+    print("=" * 80)
+
+    for name in ([args.engine] if args.engine else ["chatlite", "agentcore"]):
+        report = build(name, target_agreement=args.target_agreement, C=args.C,
+                       n_synthetic=args.synthetic)
+        print(f"\n[{name}] umbral {report['threshold']:.2f} "
+              f"({report['messages']} mensajes de prueba)")
+        print(f"  ✓ Etapa 1 contesta: {report['first_stage_rate']:.1%}")
+        if "dataset_first_stage_rate" in report:
+            print(f"    CSV {report['dataset_first_stage_rate']:.1%}, "
+                  f"sintéticos {report['synthetic_first_stage_rate']:.1%}")
+        print(f"  ✓ Coincidencia con el modelo completo: {report['agreement_with_full_model']:.2%}")
+        print(f"  ✓ Error de confianza calibrada (etapa 1): {report['confidence_mae']:.3f}")
+        if "accuracy_delta" in report:
+            print(f"  ✓ Exactitud: modelo completo {report['full_model_accuracy']:.2%}, "
+                  f"cascada {report['cascade_accuracy']:.2%} "
+                  f"(delta {report['accuracy_delta'] * 100:+.2f} pts)")
+        else:
+            print("  ✓ Exactitud: las etiquetas del CSV no coinciden con las del modelo")
+        print(f"  ✓ CPU por mensaje: {report['full_model_cpu_ms']:.3f} ms -> "
+              f"{report['cascade_cpu_ms']:.3f} ms ({report['cpu_speedup']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Agrupación single-flight de peticiones idénticas en curso.
+
+Cuando ocurre un desastre muchas personas mandan el mismo mensaje casi al
+mismo tiempo. Si una petición idéntica (misma clave) ya se está calculando,
+la nueva no vuelve a puntuar el texto: espera al cálculo en curso y recibe su
+propia copia del resultado. A diferencia de ResultCache no se guarda nada:
+la clave se libera en cuanto el cálculo termina, así que funciona aunque la
+caché esté desactivada.
+"""
+
+import copy
+import threading
+from typing import Optional, Dict, Any, Hashable, Callable, Tuple
+
+
+class InFlightCall:
+    """Cálculo en curso que comparten el líder y los que esperan"""
+
+    __slots__ = ("_done", "result", "error", "waiters")
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+    def wait(self) -> Any:
+        """Copia propia del resultado (o la excepción del líder)"""
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+        return copy.deepcopy(self.result)
+
+
+class SingleFlight:
+    """Registro de cálculos en curso por clave y contadores de agrupación"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._calls: Dict[Hashable, InFlightCall] = {}
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.coalesced = 0
+
+    def join(self, key: Hashable) -> Tuple[bool, InFlightCall]:
+        """
+        Se une al cálculo en curso de key o lo inicia.
+
+        Returns:
+            (es_líder, llamada). El líder debe llamar a finish() siempre,
+            también si el cálculo falla; los demás esperan con llamada.wait()
+        """
+        with self._lock:
+            self.requests += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                return False, call
+
+            call = InFlightCall()
+            self._calls[key] = call
+            return True, call
+
+    def finish(self, key: Hashable, call: InFlightCall, result: Any = None,
+               error: Optional[BaseException] = None) -> Any:
+        """
+        Publica el resultado del líder y libera la clave.
+
+        Returns:
+            El resultado que debe usar el líder: el mismo objeto si nadie
+            esperaba, o una copia si otros lo están copiando (así el líder
+            puede modificar su respuesta sin carreras)
+        """
+        call.result = result
+        call.error = error
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            waiters = call.waiters
+        call._done.set()
+        return result if waiters == 0 else copy.deepcopy(result)
+
+    def do(self, key: Optional[Hashable], compute: Callable[[], Any]) -> Any:
+        """Ejecuta compute() o espera al cálculo idéntico en curso (key None = sin agrupar)"""
+        if key is None or not self.enabled:
+            return compute()
+
+        leader, call = self.join(key)
+        if not leader:
+            return call.wait()
+
+        try:
+            result = compute()
+        except BaseException as e:
+            self.finish(key, call, error=e)
+            raise
+        return self.finish(key, call, result=result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores para métricas / health checks"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "requests": self.requests,
+                "coalesced": self.coalesced,
+                "coalescing_ratio": self.coalesced / self.requests if self.requests else 0.0,
+                "in_flight": len(self._calls)
+            }
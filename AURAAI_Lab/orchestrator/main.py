@@ -6,9 +6,28 @@ Totalmente offline. Prototipo Python (para portar a Flutter/Dart).
 
 import os
 import json
+import time
+import threading
 import numpy as np
 import joblib
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Hashable, Union
+
+from aura_common.files import file_sha256, artifact_fingerprint
+from aura_common.forest import compile_estimator
+from aura_common.spatial_index import FacilityIndex
+from aura_common.facility_cache import FacilityCellCache
+from aura_common.sessions import SessionStore
+from aura_common.profile_table import ProfileLookupTable
+
+import artifacts
+from text_frontend import AnalyzedText
+from cache import ResultCache
+from coalesce import SingleFlight
+from budget import LatencyBudget
+from metrics import LatencyRecorder
+from registry import ModelBundle, SmokeTest, RegistryWatcher, artifact_digest
+from regions import Region, RegionBundles, regional_engines
+from cascade import LinearStage
 
 # Paths relativos desde orchestrator/
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -36,51 +55,750 @@ ASSETS = {
     "resourcehub_templates": os.path.join(PARENT_DIR, "resourcehub/models/action_templates.json")
 }
 
+# Artefactos memory-mapped sin pickle (ver artifacts.py para convertirlos)
+MMAP_DIRS = {
+    "agentcore": os.path.join(PARENT_DIR, "agentcore/models/mmap"),
+    "chatlite": os.path.join(PARENT_DIR, "chatlite/models/mmap"),
+    "resourcehub": os.path.join(PARENT_DIR, "resourcehub/models/mmap"),
+}
+
+# Tabla precalculada de ResourceHub (ver profile_table.py para generarla)
+PROFILE_TABLE = {
+    "resourcehub": os.path.join(PARENT_DIR, "resourcehub/models/resourcehub_lookup.npz"),
+    "resourcehub_mobile": os.path.join(PARENT_DIR, "resourcehub/models/mobile/profile_lookup.json"),
+}
+
+# Primera etapa lineal de la cascada (ver cascade.py para generarla)
+CASCADE = {
+    "agentcore": os.path.join(PARENT_DIR, "agentcore/models/agentcore_cascade.npz"),
+    "chatlite": os.path.join(PARENT_DIR, "chatlite/models/chatlite_cascade.npz"),
+}
+
+# Datasets de entrenamiento (texto, etiqueta) con los que se calibra la cascada
+DATASETS = {
+    "agentcore": {
+        "path": os.path.join(PARENT_DIR, "agentcore/data/emergencias.csv"),
+        "columns": ("texto_mensaje", "clase_emergencia")
+    },
+    "chatlite": {
+        "path": os.path.join(PARENT_DIR, "chatlite/data/chat_intents.csv"),
+        "columns": ("texto_usuario", "intent")
+    },
+}
+
+# Casos con los que se valida una versión nueva antes de publicarla
+SMOKE_TEST = os.path.join(BASE_DIR, "smoke_test.json")
+
+# Motores en el orden en que se precalientan (ChatLite primero: atiende todo mensaje)
+ENGINES = ["chatlite", "agentcore", "resourcehub", "geoguard"]
+
+# Atributos del ModelBundle que llena el loader de cada motor
+ENGINE_ATTRIBUTES = {
+    "chatlite": ("chatlite_model", "chatlite_encoder", "chatlite_vectorizer", "chatlite_intents",
+                 "chatlite_cascade"),
+    "agentcore": ("agentcore_model", "agentcore_encoder", "agentcore_vectorizer", "agentcore_cascade"),
+    "resourcehub": ("resourcehub_table", "resourcehub_model", "resourcehub_encoder",
+                    "resourcehub_config", "resourcehub_templates"),
+    "geoguard": ("geoguard_db", "geoguard_config", "facility_index", "facility_cache"),
+}
+
+# Motores de texto cuyos resultados se cachean por texto normalizado
+CACHED_ENGINES = ["chatlite", "agentcore"]
+
+# Etapas opcionales de handle_input -> histogramas con los que se estima su costo
+STAGE_TIMERS = {
+    "agentcore": ["agentcore_vectorize", "agentcore_score"],
+    "resourcehub_lookup": ["resourcehub_lookup"],
+    "resourcehub_model": ["resourcehub_features", "resourcehub_score"],
+    "facility_lookup": ["facility_lookup"]
+}
+
 class AuraOrchestrator:
-    def __init__(self, config_path: Optional[str] = None):
-        """Inicializa el orquestador con modelos sklearn y configuración"""
+    def __init__(
+        self,
+        config_path: Optional[str] = None,
+        lazy: Optional[bool] = None,
+        warmup: Optional[bool] = None,
+        watch: Optional[bool] = None
+    ):
+        """
+        Inicializa el orquestador con modelos sklearn y configuración.
+        
+        Args:
+            config_path: Ruta a config.json
+            lazy: Si es True, los modelos se cargan al primer uso en lugar de
+                  en el constructor (por defecto config["loading"]["lazy"])
+            warmup: En modo lazy, precalienta los modelos en un hilo de fondo
+                    (por defecto config["loading"]["background_warmup"])
+            watch: Vigila los artefactos en disco y recarga en caliente las
+                   versiones nuevas (por defecto config["reload"]["watch"])
+        """
         if config_path is None:
             config_path = os.path.join(BASE_DIR, "config.json")
         
         self.config = self.load_config(config_path)
         
+        loading_config = self.config.get("loading", {})
+        if lazy is None:
+            lazy = loading_config.get("lazy", False)
+        if warmup is None:
+            warmup = loading_config.get("background_warmup", True)
+        
+        self.lazy = lazy
+        self.artifact_format = loading_config.get("artifact_format", "auto")
+        self._stale_mmap = set()
+        self.compiled_inference = loading_config.get("compiled_inference", True)
+        self._warmup_thread: Optional[threading.Thread] = None
+        
+        # Cascada: la etapa lineal contesta si supera el umbral, si no el bosque
+        self.cascade_config = self.config.get("cascade", {})
+        self.cascade_counts = {
+            name: {"first_stage": 0, "full_model": 0} for name in CASCADE
+        }
+        self._cascade_lock = threading.Lock()
+        
+        # Versión vigente de los modelos; cada petición usa el bundle que
+        # encontró al empezar y reload_models() publica uno nuevo de golpe
+        self.bundle = self._new_bundle()
+        self.reload_config = self.config.get("reload", {})
+        self._reload_lock = threading.Lock()
+        self.last_reload: Optional[Dict[str, Any]] = None
+        self.watcher = RegistryWatcher(self, poll_seconds=self.reload_config.get("poll_seconds", 5))
+        if watch is None:
+            watch = self.reload_config.get("watch", True)
+        
+        # Bundles de otras regiones (regions.definitions), cargados bajo demanda
+        self.region_config = self.config.get("regions", {})
+        self.regions: Optional[RegionBundles] = None
+        if self.region_config.get("enabled", False):
+            self.regions = RegionBundles(
+                {
+                    region_id: Region.from_config(region_id, definition, ENGINES, BASE_DIR)
+                    for region_id, definition in self.region_config.get("definitions", {}).items()
+                },
+                build=self._load_region,
+                max_bytes=self.region_config.get("max_bytes")
+            )
+        
+        # Caché de resultados por motor; se invalida al (re)cargar el modelo
+        self.cache_config = self.config.get("cache", {})
+        self.result_caches: Dict[str, ResultCache] = {}
+        if self.cache_config.get("enabled", True):
+            self.result_caches = {
+                name: ResultCache(
+                    max_entries=self.cache_config.get("max_entries", 4096),
+                    ttl_seconds=self.cache_config.get("ttl_seconds", 300)
+                )
+                for name in CACHED_ENGINES
+            }
+        
+        # Peticiones idénticas en curso comparten un solo cálculo
+        self.coalescing_config = self.config.get("coalescing", {})
+        self.single_flight = SingleFlight(enabled=self.coalescing_config.get("enabled", True))
+        
+        # Conversaciones de varios turnos (conversation_id)
+        self.session_config = self.config.get("sessions", {})
+        self.sessions: Optional[SessionStore] = None
+        if self.session_config.get("enabled", True):
+            self.sessions = SessionStore(
+                ttl_seconds=self.session_config.get("ttl_seconds", 1800),
+                max_bytes=self.session_config.get("max_bytes", 64 * 1024 * 1024),
+                history_size=self.session_config.get("history_size", 20)
+            )
+        
+        # Presupuesto de latencia de handle_input (deadline_ms)
+        self.budget_config = self.config.get("budgets", {})
+        
+        # Histogramas de latencia por etapa
+        self.metrics_config = self.config.get("metrics", {})
+        self.metrics = LatencyRecorder(enabled=self.metrics_config.get("enabled", True))
+        
+        if watch:
+            self.start_watcher()
+        
+        if lazy:
+            print("[AuraOrchestrator] Modo lazy: modelos se cargan bajo demanda.")
+            if warmup:
+                self.start_warmup()
+            return
+        
         print("[AuraOrchestrator] Cargando modelos sklearn...")
+        for name in ENGINES:
+            self._ensure_engine(name)
         
-        # Cargar modelos con manejo de errores
+        print(f"[AuraOrchestrator] ✓ Iniciado correctamente. Modelos y assets cargados "
+              f"(versión {self.bundle.version}).")
+
+    @property
+    def load_times(self) -> Dict[str, float]:
+        """Segundos de carga de cada motor de la versión vigente"""
+        return self.bundle.load_times
+
+    @property
+    def load_errors(self) -> Dict[str, str]:
+        return self.bundle.load_errors
+
+    def _use_mmap(self, name: str, bundle: Optional[ModelBundle] = None) -> bool:
+        """Decide si el motor se carga del formato memory-mapped o de joblib"""
+        # Los modelos regionales solo existen como joblib
+        if self._regional(name, bundle):
+            return False
+        if self.artifact_format == "joblib":
+            return False
+        if not artifacts.has_artifacts(MMAP_DIRS[name]):
+            return self.artifact_format == "mmap"
+        
+        # Convertidos de otros .joblib (p. ej. después de un train.py)
+        if not artifacts.is_current(MMAP_DIRS[name], self._mmap_sources(name)):
+            if name not in self._stale_mmap:
+                print(f"[WARN] Artefactos mmap de {name} generados con otro modelo; "
+                      f"se usa joblib (regenerar con artifacts.py)")
+                self._stale_mmap.add(name)
+            return False
+        self._stale_mmap.discard(name)
+        return True
+
+    @staticmethod
+    def _mmap_sources(name: str) -> Dict[str, str]:
+        """.joblib de los que artifacts.py convierte el motor"""
+        keys = {"model": name, "encoder": f"{name}_encoder", "vectorizer": f"{name}_vectorizer"}
+        return {role: MODELS[key] for role, key in keys.items() if key in MODELS}
+
+    @staticmethod
+    def _regional(name: str, bundle: Optional[ModelBundle]) -> bool:
+        """True si la región del bundle reemplaza los artefactos del motor"""
+        return bundle is not None and name in regional_engines(bundle.paths, ENGINES)
+
+    @staticmethod
+    def _path(key: str, bundle: Optional[ModelBundle] = None) -> str:
+        """Ruta de un artefacto de MODELS/ASSETS (o la de la región del bundle)"""
+        if bundle is not None and key in bundle.paths:
+            return bundle.paths[key]
+        return MODELS[key] if key in MODELS else ASSETS[key]
+
+    def _compile(self, model):
+        """
+        Compila un bosque/árbol sklearn a FlatForest (mismas probabilidades, sin
+        despacho de sklearn). Otros modelos (p. ej. el VotingClassifier de
+        AgentCore con use_ensemble) se quedan como modelo sklearn.
+        """
+        if not self.compiled_inference:
+            return model
+        return compile_estimator(model)
+
+    def _load_agentcore(self, bundle: ModelBundle):
+        """Carga artefactos de AgentCore"""
         try:
-            self.agentcore_model = joblib.load(MODELS["agentcore"])
-            self.agentcore_vectorizer = joblib.load(MODELS["agentcore_vectorizer"])
-            self.agentcore_encoder = joblib.load(MODELS["agentcore_encoder"])
-            print("  ✓ AgentCore cargado")
+            if self._use_mmap("agentcore", bundle):
+                (bundle.agentcore_model,
+                 bundle.agentcore_encoder,
+                 bundle.agentcore_vectorizer) = artifacts.load(MMAP_DIRS["agentcore"])
+                print("  ✓ AgentCore cargado (mmap)")
+            else:
+                bundle.agentcore_model = self._compile(joblib.load(self._path("agentcore", bundle)))
+                bundle.agentcore_vectorizer = joblib.load(self._path("agentcore_vectorizer", bundle))
+                bundle.agentcore_encoder = joblib.load(self._path("agentcore_encoder", bundle))
+                print("  ✓ AgentCore cargado")
         except Exception as e:
             print(f"  ✗ Error cargando AgentCore: {e}")
             raise
         
+        bundle.text_frontend.register("agentcore", bundle.agentcore_vectorizer)
+        bundle.agentcore_cascade = self._load_cascade("agentcore", bundle)
+
+    def _load_chatlite(self, bundle: ModelBundle):
+        """Carga artefactos de ChatLite"""
         try:
-            self.chatlite_model = joblib.load(MODELS["chatlite"])
-            self.chatlite_vectorizer = joblib.load(MODELS["chatlite_vectorizer"])
-            self.chatlite_encoder = joblib.load(MODELS["chatlite_encoder"])
-            print("  ✓ ChatLite cargado")
+            if self._use_mmap("chatlite", bundle):
+                (bundle.chatlite_model,
+                 bundle.chatlite_encoder,
+                 bundle.chatlite_vectorizer) = artifacts.load(MMAP_DIRS["chatlite"])
+                print("  ✓ ChatLite cargado (mmap)")
+            else:
+                bundle.chatlite_model = self._compile(joblib.load(self._path("chatlite", bundle)))
+                bundle.chatlite_vectorizer = joblib.load(self._path("chatlite_vectorizer", bundle))
+                bundle.chatlite_encoder = joblib.load(self._path("chatlite_encoder", bundle))
+                print("  ✓ ChatLite cargado")
         except Exception as e:
             print(f"  ✗ Error cargando ChatLite: {e}")
             raise
         
+        bundle.text_frontend.register("chatlite", bundle.chatlite_vectorizer)
+        bundle.chatlite_intents = self._load_json(self._path("chatlite_intents", bundle))
+        bundle.chatlite_cascade = self._load_cascade("chatlite", bundle)
+
+    def _load_cascade(self, name: str, bundle: Optional[ModelBundle] = None) -> Optional[LinearStage]:
+        """Primera etapa de la cascada, si está activa, existe y corresponde al modelo actual"""
+        path = CASCADE[name]
+        if not self.cascade_config.get("enabled", False) or not os.path.exists(path) \
+                or self._regional(name, bundle):
+            return None
+        
+        try:
+            stage = LinearStage.load(path)
+        except (ValueError, KeyError, OSError) as e:
+            print(f"[WARN] Cascada de {name} inválida ({e}); se usa solo el modelo completo")
+            return None
+        
+        for key, sha in stage.source_sha256.items():
+            if key in MODELS and os.path.exists(MODELS[key]) and file_sha256(MODELS[key]) != sha:
+                print(f"[WARN] Cascada de {name} generada con otro modelo; se usa solo el modelo completo")
+                return None
+        
+        threshold = self.cascade_config.get("thresholds", {}).get(name)
+        if threshold is not None:
+            stage.threshold = float(threshold)
+        print(f"  ✓ Cascada de {name} activa (umbral {stage.threshold:.2f})")
+        return stage
+
+    def _load_resourcehub(self, bundle: ModelBundle):
+        """Carga la tabla de perfiles de ResourceHub (o el clasificador si no hay tabla)"""
+        bundle.resourcehub_table = self._load_resourcehub_table(bundle)
+        bundle.resourcehub_model = None
+        bundle.resourcehub_encoder = None
+        if bundle.resourcehub_table is None:
+            self._load_resourcehub_model(bundle)
+        else:
+            print(f"  ✓ ResourceHub cargado (tabla de {len(bundle.resourcehub_table)} perfiles)")
+        
+        bundle.resourcehub_config = self._load_json(self._path("resourcehub_config", bundle))
+        bundle.resourcehub_templates = self._load_json(self._path("resourcehub_templates", bundle))
+
+    def _load_resourcehub_table(self, bundle: Optional[ModelBundle] = None) -> Optional[ProfileLookupTable]:
+        """Tabla precalculada, si existe y corresponde al clasificador actual"""
+        path = PROFILE_TABLE["resourcehub"]
+        if not self.config.get("loading", {}).get("resourcehub_lookup", True) \
+                or not os.path.exists(path) or self._regional("resourcehub", bundle):
+            return None
+        
         try:
-            self.resourcehub_model = joblib.load(MODELS["resourcehub"])
-            self.resourcehub_encoder = joblib.load(MODELS["resourcehub_encoder"])
-            print("  ✓ ResourceHub cargado")
+            table = ProfileLookupTable.load(path)
+        except (ValueError, KeyError, OSError) as e:
+            print(f"[WARN] Tabla de ResourceHub inválida ({e}); se usa el clasificador")
+            return None
+        
+        if table.source_sha256 and os.path.exists(MODELS["resourcehub"]) \
+                and file_sha256(MODELS["resourcehub"]) != table.source_sha256:
+            print("[WARN] Tabla de ResourceHub generada con otro clasificador; se usa el clasificador")
+            return None
+        return table
+
+    def _load_resourcehub_model(self, bundle: ModelBundle):
+        """Carga el clasificador de ResourceHub"""
+        try:
+            if self._use_mmap("resourcehub", bundle):
+                (bundle.resourcehub_model,
+                 bundle.resourcehub_encoder, _) = artifacts.load(MMAP_DIRS["resourcehub"])
+                print("  ✓ ResourceHub cargado (mmap)")
+            else:
+                bundle.resourcehub_model = self._compile(joblib.load(self._path("resourcehub", bundle)))
+                bundle.resourcehub_encoder = joblib.load(self._path("resourcehub_encoder", bundle))
+                print("  ✓ ResourceHub cargado")
         except Exception as e:
             print(f"  ✗ Error cargando ResourceHub: {e}")
             raise
+
+    def _load_geoguard(self, bundle: ModelBundle):
+        """Carga la base de instalaciones de GeoGuard"""
+        bundle.geoguard_db = self._load_json(self._path("geoguard_db", bundle))
+        bundle.geoguard_config = self._load_json(self._path("geoguard_config", bundle))
+        bundle.facility_index = FacilityIndex(self._facility_list(bundle.geoguard_db))
+        # La caché vive en el bundle: recargar las instalaciones la reemplaza
+        cache_config = self.config.get("facility_cache", {})
+        bundle.facility_cache = FacilityCellCache(
+            bundle.facility_index,
+            cell_meters=cache_config.get("cell_meters", 50),
+            max_entries=cache_config.get("max_entries", 8192)
+        ) if cache_config.get("enabled", True) else None
+        print(f"  ✓ GeoGuard cargado ({bundle.facility_index.n_facilities} instalaciones indexadas)")
+
+    @staticmethod
+    def _facility_list(geoguard_db) -> List[Dict]:
+        """Lista de instalaciones del JSON mobile ('all_facilities') o de una lista directa"""
+        if isinstance(geoguard_db, list):
+            return geoguard_db
+        return geoguard_db.get("all_facilities", [])
+
+    def _ensure_engine(self, name: str, bundle: Optional[ModelBundle] = None):
+        """Carga el motor en el bundle (por defecto el vigente) si aún no está (seguro entre hilos)"""
+        if bundle is None:
+            bundle = self.bundle
+        if bundle.ready[name]:
+            return
         
-        print("[AuraOrchestrator] Cargando configuraciones...")
-        self.chatlite_intents = self._load_json(ASSETS["chatlite_intents"])
-        self.geoguard_db = self._load_json(ASSETS["geoguard_db"])
-        self.geoguard_config = self._load_json(ASSETS["geoguard_config"])
-        self.resourcehub_config = self._load_json(ASSETS["resourcehub_config"])
-        self.resourcehub_templates = self._load_json(ASSETS["resourcehub_templates"])
+        with bundle.locks[name]:
+            if bundle.ready[name]:
+                return
+            
+            start = time.perf_counter()
+            try:
+                getattr(self, f"_load_{name}")(bundle)
+            except Exception as e:
+                bundle.load_errors[name] = str(e)
+                raise
+            
+            bundle.load_times[name] = time.perf_counter() - start
+            bundle.load_errors.pop(name, None)
+            bundle.ready[name] = True
+
+    def _engine_paths(self, name: str, bundle: Optional[ModelBundle] = None) -> List[str]:
+        """Archivos de los que se carga el motor (definen su versión)"""
+        if name == "geoguard":
+            return [self._path("geoguard_db", bundle), self._path("geoguard_config", bundle)]
+        
+        if self._use_mmap(name, bundle):
+            # Los .joblib de origen también: reentrenar deja los mmap obsoletos
+            directory = MMAP_DIRS[name]
+            paths = [os.path.join(directory, f) for f in sorted(os.listdir(directory))]
+            paths += list(self._mmap_sources(name).values())
+        else:
+            paths = [self._path(key, bundle) for key in (name, f"{name}_vectorizer", f"{name}_encoder")
+                     if key in MODELS]
         
-        print("[AuraOrchestrator] ✓ Iniciado correctamente. Modelos y assets cargados.")
+        paths += [self._path(key, bundle) for key in ASSETS if key.startswith(f"{name}_")]
+        if self._regional(name, bundle):
+            return paths
+        if name in CASCADE and self.cascade_config.get("enabled", False):
+            paths.append(CASCADE[name])
+        if name == "resourcehub":
+            paths.append(PROFILE_TABLE["resourcehub"])
+        return paths
+
+    def _new_bundle(
+        self,
+        base: Optional[ModelBundle] = None,
+        reload: Optional[List[str]] = None
+    ) -> ModelBundle:
+        """
+        Bundle vacío con la versión de cada motor según los archivos en disco.
+        
+        Con base, los motores ya cargados que no están en reload se comparten
+        con el bundle nuevo en lugar de volver a cargarse.
+        """
+        shared = [
+            name for name in ENGINES
+            if base is not None and base.ready[name] and name not in (reload or [])
+        ]
+        
+        bundle = ModelBundle(ENGINES)
+        for name in ENGINES:
+            if name in shared:
+                self._share_engine(bundle, base, name)
+            else:
+                self._version_engine(bundle, name)
+        return bundle
+
+    @staticmethod
+    def _share_engine(bundle: ModelBundle, base: ModelBundle, name: str):
+        """Usa en bundle el motor ya cargado de base (mismos objetos, sin recargar)"""
+        bundle.adopt(base, name, ENGINE_ATTRIBUTES[name])
+        vectorizer = getattr(bundle, f"{name}_vectorizer", None)
+        if vectorizer is not None:
+            bundle.text_frontend.register(name, vectorizer)
+
+    def _version_engine(self, bundle: ModelBundle, name: str):
+        """Huella y versión del motor según sus archivos en disco"""
+        # Huella antes del hash: si el archivo cambia entre ambos, el watcher lo detecta
+        paths = self._engine_paths(name, bundle)
+        bundle.fingerprints[name] = artifact_fingerprint(paths)
+        bundle.versions[name] = artifact_digest(paths)
+
+    def _load_region(self, region: Region) -> ModelBundle:
+        """
+        Bundle de una región: carga sus motores regionales y comparte los
+        demás con el bundle vigente (ver regions.py).
+        """
+        print(f"[AuraOrchestrator] Cargando región {region.region_id}...")
+        base = self.bundle
+        bundle = ModelBundle(ENGINES, region=region.region_id, paths=region.paths)
+        for name in ENGINES:
+            if name in region.engines:
+                self._version_engine(bundle, name)
+                self._ensure_engine(name, bundle)
+            else:
+                self._ensure_engine(name, base)
+                self._share_engine(bundle, base, name)
+        print(f"[AuraOrchestrator] ✓ Región {region.region_id} cargada (versión {bundle.version}).")
+        return bundle
+
+    def region_bundle(self, region: Optional[str] = None) -> ModelBundle:
+        """
+        Bundle que atiende una región.
+        
+        None, la región por defecto (regions.default) o una región sin
+        artefactos propios usan el bundle vigente; ValueError si la región
+        no existe.
+        """
+        if region is None or region == self.region_config.get("default"):
+            return self.bundle
+        if self.regions is None or region not in self.regions:
+            raise ValueError(f"Región desconocida: {region}")
+        if not self.regions.regions[region].engines:
+            return self.bundle
+        return self.regions.get(region)
+
+    def has_region(self, region: Optional[str]) -> bool:
+        """True si region se puede atender (ver region_bundle)"""
+        return region is None or region == self.region_config.get("default") or \
+            (self.regions is not None and region in self.regions)
+
+    def refresh_regions(self) -> List[str]:
+        """
+        Descarta los bundles regionales cuyos archivos cambiaron en disco; se
+        vuelven a cargar en su próxima petición. No pasan por el smoke test
+        (sus casos son de Durango).
+        """
+        if self.regions is None:
+            return []
+        stale = []
+        for region_id, bundle in self.regions.loaded().items():
+            region = self.regions.regions[region_id]
+            if any(
+                artifact_fingerprint(self._engine_paths(name, bundle)) != bundle.fingerprints.get(name)
+                for name in region.engines
+            ):
+                self.regions.discard(region_id)
+                stale.append(region_id)
+        if stale:
+            print(f"[AuraOrchestrator] Artefactos nuevos para {', '.join(stale)}; se recargan en su próxima petición")
+        return stale
+
+    def changed_engines(self) -> Dict[str, tuple]:
+        """Motores cuyos artefactos en disco ya no son los del bundle vigente"""
+        changed = {}
+        for name in ENGINES:
+            fingerprint = artifact_fingerprint(self._engine_paths(name))
+            if fingerprint != self.bundle.fingerprints.get(name):
+                changed[name] = fingerprint
+        return changed
+
+    def smoke_test(self, bundle: ModelBundle) -> Dict[str, Any]:
+        """Valida un bundle con los casos de smoke_test.json (sin casos, siempre pasa)"""
+        path = self.reload_config.get("smoke_test") or SMOKE_TEST
+        if not os.path.isabs(path):
+            path = os.path.join(BASE_DIR, path)
+        if not os.path.exists(path):
+            print(f"[WARN] Smoke test no encontrado: {path}")
+            return {"cases": 0, "errors": [], "mismatches": [], "passed": True}
+        
+        smoke = SmokeTest.from_file(path, min_agreement=self.reload_config.get("min_agreement", 0.8))
+        return smoke.run(self, bundle)
+
+    def reload_models(self, engines: Optional[List[str]] = None) -> bool:
+        """
+        Carga una versión nueva de los motores y la publica si pasa el smoke test.
+        
+        La carga y la validación ocurren fuera del camino de las peticiones;
+        las que ya están en curso terminan con el bundle anterior.
+        
+        Args:
+            engines: Motores a recargar (por defecto los que cambiaron en disco)
+            
+        Returns:
+            True si la versión nueva quedó publicada
+        """
+        with self._reload_lock:
+            current = self.bundle
+            if engines is None:
+                engines = list(self.changed_engines())
+            if not engines:
+                return False
+            
+            print(f"[AuraOrchestrator] Nueva versión de {', '.join(engines)}; cargando en segundo plano...")
+            started = time.perf_counter()
+            candidate = None
+            try:
+                candidate = self._new_bundle(base=current, reload=engines)
+                for name in ENGINES:
+                    self._ensure_engine(name, candidate)
+                report = self.smoke_test(candidate)
+            except Exception as e:
+                report = {"passed": False, "errors": [f"{type(e).__name__}: {e}"]}
+            
+            self.last_reload = {
+                "engines": engines,
+                "from_version": current.version,
+                "to_version": candidate.version if candidate is not None else None,
+                "published": report["passed"],
+                "seconds": time.perf_counter() - started,
+                "at": time.time(),
+                "smoke_test": report
+            }
+            if not report["passed"]:
+                reason = "; ".join(report.get("errors", [])) or \
+                    f"coincidencia {report['agreement']:.0%} con el smoke test " \
+                    f"({len(report['mismatches'])} etiquetas distintas)"
+                print(f"  ✗ Versión {self.last_reload['to_version']} rechazada: {reason}")
+                return False
+            
+            self.bundle = candidate
+            for name in engines:
+                if name in self.result_caches:
+                    self.result_caches[name].clear()
+            # Los bundles regionales comparten motores con el anterior
+            if self.regions is not None:
+                self.regions.discard()
+            print(f"[AuraOrchestrator] ✓ Modelos {current.version} -> {candidate.version} publicados.")
+            return True
+
+    def start_watcher(self) -> threading.Thread:
+        """Arranca la vigilancia de artefactos (recarga en caliente)"""
+        return self.watcher.start()
+
+    def model_info(self) -> Dict[str, Any]:
+        """Versión vigente, versión por motor y resultado de la última recarga"""
+        return {
+            **self.bundle.describe(),
+            "watcher": self.watcher.stats(),
+            "last_reload": self.last_reload
+        }
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Contadores de la caché de resultados por motor"""
+        return {name: cache.stats() for name, cache in self.result_caches.items()}
+
+    def session_stats(self) -> Dict[str, Any]:
+        """Sesiones activas, memoria estimada y desalojos"""
+        return self.sessions.stats() if self.sessions is not None else {"enabled": False}
+
+    def region_stats(self) -> Dict[str, Any]:
+        """Regiones cargadas, memoria estimada y desalojos"""
+        return self.regions.stats() if self.regions is not None else {"enabled": False}
+
+    def facility_cache_stats(self) -> Dict[str, Any]:
+        """Aciertos de la caché de instalaciones por celda del bundle activo"""
+        cache = getattr(self.bundle, "facility_cache", None)
+        return cache.stats() if cache is not None else {"enabled": False}
+
+    def coalescing_stats(self) -> Dict[str, Any]:
+        """Peticiones idénticas resueltas con el cálculo de otra en curso"""
+        return self.single_flight.stats()
+
+    def cascade_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Cuántos mensajes contestó cada etapa de la cascada, por motor"""
+        stats = {}
+        for name, counts in self.cascade_counts.items():
+            total = counts["first_stage"] + counts["full_model"]
+            stats[name] = {
+                **counts,
+                "first_stage_rate": counts["first_stage"] / total if total else 0.0
+            }
+        return stats
+
+    def latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """p50/p95/p99 (ms) por registro de cada etapa de handle_input/handle_batch"""
+        return self.metrics.stats()
+
+    def batch_latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """p50/p95/p99 (ms) de los lotes enteros de handle_batch y registros procesados"""
+        return self.metrics.batch_stats()
+
+    def dump_metrics(self, path: Optional[str] = None) -> str:
+        """Métricas de latencia en texto (formato Prometheus); se escriben en path si se indica"""
+        if path is None:
+            path = self.metrics_config.get("dump_path")
+        if path:
+            return self.metrics.dump(path)
+        return self.metrics.render_text()
+
+    def _cached_classify(
+        self,
+        name: str,
+        docs: List[AnalyzedText],
+        score,
+        bundle: ModelBundle
+    ) -> List[Dict[str, Any]]:
+        """
+        Resuelve docs desde la caché del motor y puntúa solo los que faltan.
+        
+        La clave son la versión del motor y los tokens del texto normalizado:
+        dos textos con los mismos tokens producen la misma fila TF-IDF y, por
+        tanto, el mismo resultado con el mismo modelo.
+        """
+        cache = self.result_caches.get(name)
+        if cache is None:
+            return score(docs, bundle)
+        
+        max_chars = self.cache_config.get("max_text_chars", 256)
+        version = bundle.versions[name]
+        keys = [
+            (version, " ".join(bundle.text_frontend.tokens(name, doc)))
+            if len(doc.text) <= max_chars else None
+            for doc in docs
+        ]
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(docs)
+        missing = []
+        for i, key in enumerate(keys):
+            cached = cache.get(key) if key is not None else None
+            if cached is None:
+                missing.append(i)
+            else:
+                results[i] = dict(cached)
+        
+        if missing:
+            for i, result in zip(missing, score([docs[i] for i in missing], bundle)):
+                results[i] = result
+                if keys[i] is not None:
+                    cache.put(keys[i], dict(result))
+        
+        return results
+
+    def start_warmup(self) -> threading.Thread:
+        """Precalienta todos los motores en un hilo de fondo"""
+        if self._warmup_thread is not None:
+            return self._warmup_thread
+        
+        def _warmup():
+            for name in ENGINES:
+                try:
+                    self._ensure_engine(name)
+                except Exception:
+                    # Se reintenta en el primer uso; el error queda en load_errors
+                    continue
+            if self.is_ready():
+                print("[AuraOrchestrator] ✓ Precalentamiento completo.")
+        
+        self._warmup_thread = threading.Thread(
+            target=_warmup, name="aura-warmup", daemon=True
+        )
+        self._warmup_thread.start()
+        return self._warmup_thread
+
+    def is_ready(self, engine: Optional[str] = None) -> bool:
+        """True si el motor indicado (o todos) ya está cargado"""
+        ready = self.bundle.ready
+        if engine is not None:
+            return ready[engine]
+        return all(ready.values())
+
+    def readiness(self) -> Dict[str, Any]:
+        """Estado de carga y versión de cada motor (para health checks)"""
+        bundle = self.bundle
+        engines = {
+            name: {
+                "ready": bundle.ready[name],
+                "version": bundle.versions.get(name),
+                "load_seconds": bundle.load_times.get(name),
+                "error": bundle.load_errors.get(name)
+            }
+            for name in ENGINES
+        }
+        loaded = sum(1 for name in ENGINES if bundle.ready[name])
+        
+        return {
+            "ready": loaded == len(ENGINES),
+            "loaded": loaded,
+            "total": len(ENGINES),
+            "model_version": bundle.version,
+            "engines": engines
+        }
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que termine el precalentamiento; devuelve is_ready()"""
+        if self._warmup_thread is not None:
+            self._warmup_thread.join(timeout)
+        return self.is_ready()
 
     def load_config(self, config_path: str) -> dict:
         """Carga configuración desde JSON"""
@@ -98,134 +816,316 @@ class AuraOrchestrator:
         with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
     
+    def _predict(self, model, X):
+        """Una sola llamada a predict_proba; la clase es su argmax (igual que model.predict)"""
+        if X.shape[0] == 1 and hasattr(model, "predict_one"):
+            pred, proba, _ = model.predict_one(X)
+            return np.array([pred]), proba[np.newaxis, :]
+        
+        pred_proba = model.predict_proba(X)
+        pred = model.classes_.take(np.argmax(pred_proba, axis=1), axis=0)
+        return pred, pred_proba
+
+    def _predict_cascade(self, name: str, bundle: ModelBundle, X):
+        """
+        (predicción, confianza) con la cascada del motor: las filas donde la
+        etapa lineal supera su umbral se quedan con ella; el resto pasa por el
+        modelo completo. La confianza de la etapa 1 va calibrada a la escala
+        del bosque, que es con la que se decide correr AgentCore.
+        """
+        model = getattr(bundle, f"{name}_model")
+        stage = getattr(bundle, f"{name}_cascade", None)
+        if stage is None:
+            pred, pred_proba = self._predict(model, X)
+            return pred, pred_proba.max(axis=1)
+        
+        pred_proba = stage.predict_proba(X)
+        pred = stage.classes_.take(np.argmax(pred_proba, axis=1), axis=0)
+        confidence = stage.confidence(pred_proba)
+        rest = np.flatnonzero(pred_proba.max(axis=1) < stage.threshold)
+        if len(rest):
+            pred[rest], full_proba = self._predict(model, X[rest])
+            confidence[rest] = full_proba.max(axis=1)
+        
+        with self._cascade_lock:
+            self.cascade_counts[name]["first_stage"] += X.shape[0] - len(rest)
+            self.cascade_counts[name]["full_model"] += len(rest)
+        return pred, confidence
+
     def run_agentcore(self, text: str) -> Dict[str, Any]:
         """Ejecuta modelo AgentCore (clasificación de emergencias)"""
-        X = self.agentcore_vectorizer.transform([text])
-        pred = self.agentcore_model.predict(X)
-        pred_proba = self.agentcore_model.predict_proba(X)
+        return self.run_agentcore_batch([text])[0]
+
+    def run_agentcore_batch(
+        self,
+        texts: List[str],
+        docs: Optional[List[AnalyzedText]] = None,
+        bundle: Optional[ModelBundle] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Ejecuta AgentCore sobre varios textos con un solo transform y un solo predict_proba.
         
-        tipo_emergencia = self.agentcore_encoder.inverse_transform(pred)[0]
-        confianza = float(np.max(pred_proba))
+        docs (de text_frontend.analyze) permite reutilizar la tokenización
+        ya hecha para ChatLite; bundle fija la versión de los modelos
+        (por defecto la vigente).
+        """
+        if not texts:
+            return []
         
-        return {
-            "tipo_emergencia": tipo_emergencia,
-            "confianza": confianza
-        }
+        if bundle is None:
+            bundle = self.bundle
+        self._ensure_engine("agentcore", bundle)
+        if docs is None:
+            docs = [bundle.text_frontend.analyze(text) for text in texts]
+        return self._cached_classify("agentcore", docs, self._score_agentcore, bundle)
+
+    def _score_agentcore(self, docs: List[AnalyzedText], bundle: ModelBundle) -> List[Dict[str, Any]]:
+        """Vectoriza y puntúa docs con AgentCore"""
+        with self.metrics.time("agentcore_vectorize", len(docs)):
+            X = bundle.text_frontend.transform("agentcore", docs)
+        
+        with self.metrics.time("agentcore_score", len(docs)):
+            pred, confidence = self._predict_cascade("agentcore", bundle, X)
+            tipos = bundle.agentcore_encoder.inverse_transform(pred)
+            
+            return [
+                {
+                    "tipo_emergencia": tipo_emergencia,
+                    "confianza": float(confianza)
+                }
+                for tipo_emergencia, confianza in zip(tipos, confidence)
+            ]
 
     def run_chatlite(self, text: str) -> Dict[str, Any]:
         """Ejecuta modelo ChatLite (clasificación de intents)"""
-        X = self.chatlite_vectorizer.transform([text])
-        pred = self.chatlite_model.predict(X)
-        pred_proba = self.chatlite_model.predict_proba(X)
-        
-        intent = self.chatlite_encoder.inverse_transform(pred)[0]
-        confianza = float(np.max(pred_proba))
+        return self.run_chatlite_batch([text])[0]
+
+    def run_chatlite_batch(
+        self,
+        texts: List[str],
+        docs: Optional[List[AnalyzedText]] = None,
+        bundle: Optional[ModelBundle] = None
+    ) -> List[Dict[str, Any]]:
+        """Ejecuta ChatLite sobre varios textos con un solo transform y un solo predict_proba"""
+        if not texts:
+            return []
         
-        response_candidates = self.chatlite_intents.get(intent, {}).get("responses", [])
-        suggested_response = response_candidates[0] if response_candidates else None
+        if bundle is None:
+            bundle = self.bundle
+        self._ensure_engine("chatlite", bundle)
+        if docs is None:
+            docs = [bundle.text_frontend.analyze(text) for text in texts]
+        return self._cached_classify("chatlite", docs, self._score_chatlite, bundle)
+
+    def _score_chatlite(self, docs: List[AnalyzedText], bundle: ModelBundle) -> List[Dict[str, Any]]:
+        """Vectoriza y puntúa docs con ChatLite"""
+        with self.metrics.time("chatlite_vectorize", len(docs)):
+            X = bundle.text_frontend.transform("chatlite", docs)
         
-        return {
-            "intent": intent,
-            "confianza": confianza,
-            "suggested_response": suggested_response
-        }
+        with self.metrics.time("chatlite_score", len(docs)):
+            pred, confidence = self._predict_cascade("chatlite", bundle, X)
+            intents = bundle.chatlite_encoder.inverse_transform(pred)
+            
+            results = []
+            for intent, confianza in zip(intents, confidence):
+                response_candidates = bundle.chatlite_intents.get(intent, {}).get("responses", [])
+                suggested_response = response_candidates[0] if response_candidates else None
+                
+                results.append({
+                    "intent": intent,
+                    "confianza": float(confianza),
+                    "suggested_response": suggested_response
+                })
+            return results
 
-    def run_resourcehub(self, profile: Dict) -> Dict:
-        """Ejecuta modelo ResourceHub (perfil médico)"""
+    def _profile_features(self, profile: Dict) -> list:
+        """Vector de entrada de ResourceHub (debe coincidir con el orden de train.py)"""
         blood_types = ['O+', 'O-', 'A+', 'A-', 'B+', 'B-', 'AB+', 'AB-']
-        
-        # Construir vector de entrada (debe coincidir con el orden de train.py)
-        X = np.array([[
+        return [
             profile['edad'],
             int(profile['tiene_alergias']),
             int(profile['condicion_cronica']),
             int(profile['toma_medicamentos']),
             *[1 if profile['tipo_sangre'] == bt else 0 for bt in blood_types]
-        ]])
-        
-        pred = self.resourcehub_model.predict(X)
-        pred_proba = self.resourcehub_model.predict_proba(X)
-        
-        action = self.resourcehub_encoder.inverse_transform(pred)[0]
-        confianza = float(np.max(pred_proba))
-        
-        templates = self.resourcehub_templates.get(action, {})
-        recommendations = templates.get("recommendations", [])
-        
-        return {
-            "action": action,
-            "confianza": confianza,
-            "recommendations": recommendations
-        }
+        ]
 
-    def find_nearest_facility(self, lat: float, lon: float, tipo: Optional[str] = None):
-        """Encuentra instalación más cercana usando GeoGuard"""
-        facilities = self.geoguard_db.get("all_facilities", [])
+    def run_resourcehub(self, profile: Dict, bundle: Optional[ModelBundle] = None) -> Dict:
+        """Ejecuta modelo ResourceHub (perfil médico)"""
+        return self.run_resourcehub_batch([profile], bundle)[0]
+
+    def run_resourcehub_batch(
+        self,
+        profiles: List[Dict],
+        bundle: Optional[ModelBundle] = None
+    ) -> List[Dict]:
+        """
+        Ejecuta ResourceHub sobre varios perfiles.
         
-        if not facilities:
-            facilities = self.geoguard_db  # Por si el JSON es lista directa
+        Los perfiles de la tabla precalculada se resuelven por índice; el resto
+        pasa por el clasificador con un solo predict_proba.
+        """
+        if not profiles:
+            return []
         
-        dists = []
-        for f in facilities:
-            if tipo and f.get('tipo') != tipo:
-                continue
+        if bundle is None:
+            bundle = self.bundle
+        self._ensure_engine("resourcehub", bundle)
+        scored: List[Optional[tuple]] = [None] * len(profiles)
+        if bundle.resourcehub_table is not None:
+            with self.metrics.time("resourcehub_lookup", len(profiles)):
+                for i, profile in enumerate(profiles):
+                    hit = bundle.resourcehub_table.lookup_profile(profile)
+                    if hit is not None:
+                        scored[i] = hit[:2]
+        
+        missing = [i for i, hit in enumerate(scored) if hit is None]
+        if missing:
+            if bundle.resourcehub_model is None:
+                with bundle.locks["resourcehub"]:
+                    if bundle.resourcehub_model is None:
+                        self._load_resourcehub_model(bundle)
             
-            f_lat = f.get('lat') or f.get('latitud', 0)
-            f_lon = f.get('lon') or f.get('longitud', 0)
+            with self.metrics.time("resourcehub_features", len(missing)):
+                X = np.array([self._profile_features(profiles[i]) for i in missing])
             
-            # Distancia euclidiana simple (para prototipo)
-            d = np.sqrt((f_lat - lat) ** 2 + (f_lon - lon) ** 2)
-            dists.append((d, f))
+            with self.metrics.time("resourcehub_score", len(missing)):
+                pred, pred_proba = self._predict(bundle.resourcehub_model, X)
+                actions = bundle.resourcehub_encoder.inverse_transform(pred)
+                for i, action, proba in zip(missing, actions, pred_proba):
+                    scored[i] = (action, float(np.max(proba)))
         
-        dists.sort(key=lambda x: x[0])
-        return dists[0][1] if dists else None
+        results = []
+        for action, confianza in scored:
+            templates = bundle.resourcehub_templates.get(action, {})
+            recommendations = templates.get("recommendations", [])
+            
+            results.append({
+                "action": action,
+                "confianza": confianza,
+                "recommendations": recommendations
+            })
+        return results
 
-    def handle_input(
+    def _max_search_radius_km(self) -> Optional[float]:
+        """Radio máximo de búsqueda de GeoGuard (config models.geoguard)"""
+        return self.config.get("models", {}).get("geoguard", {}).get("max_search_radius_km")
+
+    @staticmethod
+    def _facility_lookup(bundle: ModelBundle):
+        """Caché por celda si está activa, si no el índice completo (mismo resultado)"""
+        cache = getattr(bundle, "facility_cache", None)
+        return cache if cache is not None else bundle.facility_index
+
+    def find_nearest_facilities(
         self,
-        texto: Optional[str] = None,
-        ubicacion: Optional[Dict] = None,
-        perfil: Optional[Dict] = None,
-        panic: bool = False
-    ) -> Dict:
+        lat: float,
+        lon: float,
+        tipo: Optional[str] = None,
+        k: Optional[int] = None,
+        radius_km: Optional[float] = None,
+        bundle: Optional[ModelBundle] = None
+    ) -> List[Dict]:
         """
-        Motor central de IA. Procesa entrada y decide acción.
+        Instalaciones más cercanas por distancia de gran círculo.
         
         Args:
-            texto: Mensaje del usuario
-            ubicacion: {'lat': float, 'lon': float}
-            perfil: Perfil médico del usuario
-            panic: Botón de pánico presionado
+            lat, lon: Ubicación del usuario
+            tipo: Filtrar por tipo de instalación
+            k: Número máximo de resultados (por defecto geoguard_settings.max_results)
+            radius_km: Radio de búsqueda (por defecto max_search_radius_km)
             
         Returns:
-            Dict con respuesta y acción a ejecutar
+            Lista de instalaciones con 'distance_km', de la más cercana a la más lejana
         """
+        if bundle is None:
+            bundle = self.bundle
+        self._ensure_engine("geoguard", bundle)
+        if k is None:
+            k = self.config.get("geoguard_settings", {}).get("max_results", 5)
+        if radius_km is None:
+            radius_km = self._max_search_radius_km()
         
-        # MODO PÁNICO
-        if panic:
-            return {
-                "respuesta_texto": "¡Modo pánico activado! Llamando a emergencia 911.",
-                "accion_app": "marcar_911",
-                "usar_tts": True,
-                "respuesta_voz_texto": "¡Tranquilo, ya estoy llamando a los servicios de emergencia!",
-                "metadata": {
-                    "panic_mode": True,
-                    "intent": "panic_button",
-                    "tipo_emergencia": "panic",
-                    "priority": "critical"
-                }
-            }
-        
-        if not texto:
-            return {
-                "respuesta_texto": "No recibí ningún mensaje. ¿Puedes escribir de nuevo?",
-                "accion_app": "none",
-                "usar_tts": False,
-                "metadata": {}
+        with self.metrics.time("facility_lookup"):
+            return [
+                {**facility, "distance_km": distance}
+                for distance, facility in self._facility_lookup(bundle).nearest(
+                    lat, lon, tipo=tipo, k=k, radius_km=radius_km
+                )
+            ]
+
+    def find_nearest_facility(
+        self,
+        lat: float,
+        lon: float,
+        tipo: Optional[str] = None,
+        bundle: Optional[ModelBundle] = None
+    ):
+        """Encuentra instalación más cercana usando GeoGuard"""
+        if bundle is None:
+            bundle = self.bundle
+        self._ensure_engine("geoguard", bundle)
+        with self.metrics.time("facility_lookup"):
+            nearest = self._facility_lookup(bundle).nearest(
+                lat, lon, tipo=tipo, k=1, radius_km=self._max_search_radius_km()
+            )
+        return nearest[0][1] if nearest else None
+
+    def _panic_response(self) -> Dict:
+        """Respuesta fija del botón de pánico (no toca ningún modelo)"""
+        return {
+            "respuesta_texto": "¡Modo pánico activado! Llamando a emergencia 911.",
+            "accion_app": "marcar_911",
+            "usar_tts": True,
+            "respuesta_voz_texto": "¡Tranquilo, ya estoy llamando a los servicios de emergencia!",
+            "metadata": {
+                "panic_mode": True,
+                "intent": "panic_button",
+                "tipo_emergencia": "panic",
+                "priority": "critical"
             }
+        }
+
+    def _empty_response(self) -> Dict:
+        """Respuesta cuando no llega texto"""
+        return {
+            "respuesta_texto": "No recibí ningún mensaje. ¿Puedes escribir de nuevo?",
+            "accion_app": "none",
+            "usar_tts": False,
+            "metadata": {}
+        }
+
+    def _needs_agentcore(self, chat: Dict[str, Any]) -> bool:
+        """Decide si el intent detectado debe refinarse con AgentCore"""
+        intent_mapping = self.config.get("intent_mapping", {})
+        intent_config = intent_mapping.get(chat.get("intent", ""), {})
         
-        # Ejecutar modelos
+        trigger_agentcore = intent_config.get("trigger_agentcore", False)
+        return trigger_agentcore or chat.get("confianza", 0.0) > 0.7
+
+    def _build_response(
+        self,
+        chat: Dict[str, Any],
+        agentcore: Optional[Dict[str, Any]],
+        rhub: Optional[Dict[str, Any]],
+        ubicacion: Optional[Dict],
+        bundle: ModelBundle,
+        budget: Optional[LatencyBudget] = None
+    ) -> Dict:
+        """Arma la respuesta final (etapa response_assembly, incluye facility_lookup)"""
+        with self.metrics.time("response_assembly"):
+            return self._assemble_response(chat, agentcore, rhub, ubicacion, bundle, budget)
+
+    def _assemble_response(
+        self,
+        chat: Dict[str, Any],
+        agentcore: Optional[Dict[str, Any]],
+        rhub: Optional[Dict[str, Any]],
+        ubicacion: Optional[Dict],
+        bundle: ModelBundle,
+        budget: Optional[LatencyBudget] = None
+    ) -> Dict:
+        """Arma la respuesta final a partir de los resultados de cada modelo"""
         results = {}
-        chat = self.run_chatlite(texto)
         results.update(chat)
         
         intent = chat.get("intent", "")
@@ -237,14 +1137,10 @@ class AuraOrchestrator:
         tipo_emergencia = None
         poi = None
         
-        # Detectar si es emergencia
         intent_mapping = self.config.get("intent_mapping", {})
         intent_config = intent_mapping.get(intent, {})
         
-        trigger_agentcore = intent_config.get("trigger_agentcore", False)
-        
-        if trigger_agentcore or confianza > 0.7:
-            agentcore = self.run_agentcore(texto)
+        if agentcore is not None:
             tipo_emergencia = agentcore["tipo_emergencia"]
             results.update(agentcore)
             
@@ -258,18 +1154,24 @@ class AuraOrchestrator:
             # Buscar instalación cercana si hay ubicación
             if ubicacion and emergency_config.get("facility_type"):
                 facility_type = emergency_config["facility_type"]
-                poi = self.find_nearest_facility(
-                    ubicacion['lat'], 
-                    ubicacion['lon'], 
-                    tipo=facility_type
-                )
+                if not self._within_budget(budget, "facility_lookup"):
+                    budget.skip("facility_lookup")
+                else:
+                    poi = self.find_nearest_facility(
+                        ubicacion['lat'], 
+                        ubicacion['lon'], 
+                        tipo=facility_type,
+                        bundle=bundle
+                    )
+        elif budget is not None and "agentcore" in budget.skipped:
+            # Emergencia sin clasificar (AgentCore no cupo en el presupuesto)
+            accion_app = self.budget_config.get("agentcore_fallback_action", "abrir_mapa_hospital")
         else:
             # No es emergencia, usar respuesta del intent
             accion_app = intent_config.get("action", "none")
         
         # Integrar perfil médico si existe
-        if perfil:
-            rhub = self.run_resourcehub(perfil)
+        if rhub is not None:
             results.update(rhub)
         
         # Construir respuesta final
@@ -289,6 +1191,431 @@ class AuraOrchestrator:
         
         return output
 
+    def _stage_estimate_ms(self, stage: str) -> float:
+        """Costo esperado de una etapa opcional: percentil de sus histogramas o el de config"""
+        estimate = self.metrics.estimate_ms(
+            STAGE_TIMERS[stage],
+            q=self.budget_config.get("quantile", 0.95),
+            min_samples=self.budget_config.get("min_samples", 50)
+        )
+        if estimate is None:
+            estimate = self.budget_config.get("stage_estimates_ms", {}).get(stage, 0.0)
+        return estimate
+
+    def _within_budget(self, budget: Optional[LatencyBudget], stage: str) -> bool:
+        """True si no hay presupuesto o la etapa cabe en lo que queda"""
+        return budget is None or budget.allows(self._stage_estimate_ms(stage))
+
+    def _cached_result(self, name: str, doc: AnalyzedText, bundle: ModelBundle) -> Optional[Dict[str, Any]]:
+        """Resultado del motor para doc si ya está en la caché (sin puntuar)"""
+        cache = self.result_caches.get(name)
+        if cache is None or len(doc.text) > self.cache_config.get("max_text_chars", 256):
+            return None
+        cached = cache.get((bundle.versions[name], " ".join(bundle.text_frontend.tokens(name, doc))))
+        return dict(cached) if cached is not None else None
+
+    def _coalescing_key(
+        self,
+        doc: AnalyzedText,
+        ubicacion: Optional[Dict],
+        perfil: Optional[Dict],
+        bundle: ModelBundle,
+        deadline_ms: Optional[float] = None
+    ) -> Optional[Hashable]:
+        """
+        Clave single-flight de una petición, o None si no se agrupa.
+        
+        Versión de modelos, tokens del texto para ChatLite y AgentCore,
+        ubicación cuantizada a coalescing.coordinate_decimals y perfil. El
+        tipo de instalación lo decide AgentCore, así que queda fijado por el
+        texto; el POI de una petición agrupada es el calculado para la
+        ubicación exacta de la primera dentro de la misma celda. Con
+        presupuesto solo se agrupan peticiones con el mismo deadline.
+        """
+        if not self.single_flight.enabled or \
+                len(doc.text) > self.coalescing_config.get("max_text_chars", 256):
+            return None
+        
+        # Un motor sin cargar no se carga solo para la clave (AgentCore puede
+        # omitirse por presupuesto): se agrupa por el texto exacto
+        tokens = []
+        for name in CACHED_ENGINES:
+            if bundle.ready[name]:
+                tokens.append(" ".join(bundle.text_frontend.tokens(name, doc)))
+            else:
+                tokens.append(("texto", doc.text))
+        
+        cell = None
+        if ubicacion:
+            decimals = self.coalescing_config.get("coordinate_decimals", 3)
+            try:
+                cell = (round(float(ubicacion["lat"]), decimals), round(float(ubicacion["lon"]), decimals))
+            except (KeyError, TypeError, ValueError):
+                return None
+        
+        profile_key = None
+        if perfil:
+            try:
+                profile_key = tuple(sorted(perfil.items()))
+                hash(profile_key)
+            except (AttributeError, TypeError):
+                return None
+        
+        return (bundle.version, tuple(tokens), cell, profile_key, deadline_ms)
+
+    def handle_input(
+        self,
+        texto: Optional[str] = None,
+        ubicacion: Optional[Dict] = None,
+        perfil: Optional[Dict] = None,
+        panic: bool = False,
+        deadline_ms: Optional[float] = None,
+        conversation_id: Optional[Hashable] = None,
+        region: Optional[str] = None
+    ) -> Dict:
+        """
+        Motor central de IA. Procesa entrada y decide acción.
+        
+        Args:
+            texto: Mensaje del usuario
+            ubicacion: {'lat': float, 'lon': float}
+            perfil: Perfil médico del usuario
+            panic: Botón de pánico presionado
+            deadline_ms: Presupuesto de latencia (por defecto
+                         budgets.default_deadline_ms; None = sin límite). Las
+                         etapas opcionales que no caben se omiten y quedan en
+                         metadata.skipped_stages / metadata.fallback_stages
+            conversation_id: Conversación a la que pertenece el mensaje; agrega
+                             metadata.session (historial de intents, estado
+                             emocional, índice del mensaje)
+            region: Región que atiende la petición (ver regions.py; por
+                    defecto la de los artefactos de MODELS/ASSETS). Con
+                    panic se ignora
+            
+        Returns:
+            Dict con respuesta y acción a ejecutar; metadata.model_version
+            indica la versión de modelos que la produjo (y metadata.timings_ms
+            si metrics.timings_in_metadata está activo). Si una petición
+            idéntica ya está en curso se espera su resultado (ver coalesce.py)
+        """
+        # La petición completa usa la versión vigente al llegar; el pánico no
+        # valida ni espera la carga de su región
+        bundle = self.bundle if panic else self.region_bundle(region)
+        if deadline_ms is None:
+            deadline_ms = self.budget_config.get("default_deadline_ms")
+        budget = LatencyBudget(deadline_ms) if deadline_ms is not None else None
+        
+        self.metrics.begin_request()
+        with self.metrics.time("handle_input"):
+            output = self._handle_input(
+                texto, ubicacion, perfil, panic, bundle, budget, conversation_id
+            )
+        timings = self.metrics.end_request()
+        
+        output["metadata"]["model_version"] = bundle.version
+        if bundle.region is not None:
+            output["metadata"]["region"] = bundle.region
+        if self.metrics_config.get("timings_in_metadata", False):
+            output["metadata"]["timings_ms"] = timings
+        return output
+
+    def _handle_input(
+        self,
+        texto: Optional[str],
+        ubicacion: Optional[Dict],
+        perfil: Optional[Dict],
+        panic: bool,
+        bundle: ModelBundle,
+        budget: Optional[LatencyBudget] = None,
+        conversation_id: Optional[Hashable] = None
+    ) -> Dict:
+        """Cuerpo de handle_input (sin instrumentación)"""
+        # MODO PÁNICO
+        if panic:
+            return self._panic_response()
+        
+        if not texto:
+            return self._empty_response()
+        
+        # El texto se tokeniza una sola vez para la clave y ambos modelos
+        doc = bundle.text_frontend.analyze(texto)
+        output = self.single_flight.do(
+            self._coalescing_key(
+                doc, ubicacion, perfil, bundle, budget.deadline_ms if budget else None
+            ),
+            lambda: self._respond(texto, doc, ubicacion, perfil, bundle, budget)
+        )
+        
+        # La sesión es de cada petición, no del resultado compartido
+        if conversation_id is not None:
+            self._track_session(conversation_id, output)
+        return output
+
+    def _track_session(self, conversation_id: Hashable, output: Dict):
+        """Agrega el mensaje a su sesión (O(1)) y anota el contexto en metadata.session"""
+        if self.sessions is None:
+            return
+        
+        context = self.sessions.record(conversation_id, output["metadata"]["intent"])
+        output["metadata"]["session"] = {"conversation_id": conversation_id, **context}
+
+    def _respond(
+        self,
+        texto: str,
+        doc: AnalyzedText,
+        ubicacion: Optional[Dict],
+        perfil: Optional[Dict],
+        bundle: ModelBundle,
+        budget: Optional[LatencyBudget] = None
+    ) -> Dict:
+        """Ejecuta los modelos para un texto y arma su respuesta"""
+        chat = self.run_chatlite_batch([texto], [doc], bundle)[0]
+        
+        # Detectar si es emergencia; sin presupuesto para AgentCore solo
+        # sirve un resultado ya en caché (sin cargar el motor si no lo está)
+        agentcore = None
+        if self._needs_agentcore(chat):
+            if self._within_budget(budget, "agentcore"):
+                agentcore = self.run_agentcore_batch([texto], [doc], bundle)[0]
+            else:
+                if bundle.ready["agentcore"]:
+                    agentcore = self._cached_result("agentcore", doc, bundle)
+                budget.skip("agentcore", fallback=agentcore is not None)
+        
+        # La tabla de perfiles es la respuesta barata de ResourceHub (sin el
+        # motor cargado se estima con el costo del modelo)
+        rhub = None
+        if perfil:
+            stage = "resourcehub_model"
+            if budget is not None and bundle.ready["resourcehub"]:
+                if bundle.resourcehub_table is not None and \
+                        bundle.resourcehub_table.lookup_profile(perfil) is not None:
+                    stage = "resourcehub_lookup"
+            if self._within_budget(budget, stage):
+                rhub = self.run_resourcehub(perfil, bundle)
+            else:
+                budget.skip("resourcehub")
+        
+        output = self._build_response(chat, agentcore, rhub, ubicacion, bundle, budget)
+        if budget is not None:
+            output["metadata"].update(budget.describe())
+        return output
+
+    def handle_batch(
+        self,
+        inputs: List[Dict],
+        bundle: Optional[ModelBundle] = None,
+        degraded: bool = False,
+        return_exceptions: bool = False
+    ) -> List[Union[Dict, Exception]]:
+        """
+        Procesa muchas entradas a la vez con una sola pasada por modelo.
+        
+        ChatLite corre sobre todos los textos, AgentCore solo sobre las filas
+        que lo activan y ResourceHub sobre todos los perfiles. Cada salida es
+        idéntica a la de handle_input para el mismo registro (los tiempos por
+        etapa solo se agregan a metadata en handle_input). Los registros
+        idénticos a otro del lote, o a uno en curso en otro hilo, no se
+        vuelven a calcular: reciben una copia de su respuesta.
+        
+        Args:
+            inputs: Lista de dicts con claves opcionales
+                    'texto', 'ubicacion', 'perfil', 'panic', 'conversation_id'
+                    (los mensajes de una conversación se registran en orden)
+                    y 'region'
+            bundle: Versión de modelos a usar (por defecto la vigente, o la
+                    de cada región: el lote se divide por región)
+            degraded: Modo degradado bajo sobrecarga (ver scheduler.py): se
+                      omiten ResourceHub y la búsqueda de instalaciones y
+                      cada salida lleva metadata.degraded
+            return_exceptions: Si un registro falla (texto que no es str,
+                               perfil incompleto, región desconocida...) su
+                               salida es la excepción y el resto del lote se
+                               resuelve igual; si es False la excepción se
+                               propaga y no hay salidas
+            
+        Returns:
+            Lista de respuestas en el mismo orden que inputs
+        """
+        if bundle is None:
+            groups: Dict[Optional[str], List[int]] = {}
+            for i, record in enumerate(inputs):
+                region = None if record.get("panic", False) else record.get("region")
+                groups.setdefault(region, []).append(i)
+            if list(groups) not in ([], [None]):
+                return self._handle_regions(inputs, groups, degraded, return_exceptions)
+            bundle = self.bundle
+        if degraded:
+            inputs = [
+                {key: value for key, value in record.items() if key not in ("perfil", "ubicacion")}
+                for record in inputs
+            ]
+        
+        with self.metrics.time_batch("handle_batch", len(inputs)):
+            outputs = self._handle_batch(inputs, bundle, return_exceptions)
+        
+        for output in outputs:
+            if isinstance(output, Exception):
+                continue
+            output["metadata"]["model_version"] = bundle.version
+            if bundle.region is not None:
+                output["metadata"]["region"] = bundle.region
+            if degraded:
+                output["metadata"]["degraded"] = True
+        return outputs
+
+    def _handle_regions(
+        self,
+        inputs: List[Dict],
+        groups: Dict[Optional[str], List[int]],
+        degraded: bool,
+        return_exceptions: bool = False
+    ) -> List[Union[Dict, Exception]]:
+        """Un handle_batch por región con su bundle; salidas en el orden de inputs"""
+        outputs: List[Union[Dict, Exception, None]] = [None] * len(inputs)
+        for region, indices in groups.items():
+            try:
+                bundle = self.region_bundle(region)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                for i in indices:
+                    outputs[i] = e
+                continue
+            results = self.handle_batch(
+                [inputs[i] for i in indices], bundle, degraded, return_exceptions
+            )
+            for i, output in zip(indices, results):
+                outputs[i] = output
+        return outputs
+
+    def _handle_batch(
+        self,
+        inputs: List[Dict],
+        bundle: ModelBundle,
+        return_exceptions: bool = False
+    ) -> List[Union[Dict, Exception]]:
+        """Cuerpo de handle_batch (sin instrumentación)"""
+        outputs: List[Union[Dict, Exception, None]] = [None] * len(inputs)
+        
+        active = []
+        for i, record in enumerate(inputs):
+            if record.get("panic", False):
+                outputs[i] = self._panic_response()
+            elif not record.get("texto"):
+                outputs[i] = self._empty_response()
+            else:
+                active.append(i)
+        
+        # Single-flight: se calculan los líderes y después se esperan los
+        # demás (los resultados se publican antes de esperar, sin bloqueos).
+        # Si algo falla después de unirse como líder, el error se publica a
+        # quien espera la misma clave en otro hilo.
+        docs = {}
+        calls = {}
+        waiting = {}
+        try:
+            for i in active:
+                try:
+                    docs[i] = bundle.text_frontend.analyze(inputs[i]["texto"])
+                    key = self._coalescing_key(
+                        docs[i], inputs[i].get("ubicacion"), inputs[i].get("perfil"), bundle
+                    )
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    docs.pop(i, None)
+                    outputs[i] = e
+                    continue
+                if key is None:
+                    continue
+                leader, call = self.single_flight.join(key)
+                if leader:
+                    calls[i] = (key, call)
+                else:
+                    waiting[i] = call
+            
+            texts = [i for i in active if i in docs]
+            scored = [i for i in texts if i not in waiting]
+            try:
+                self._score_batch(inputs, scored, docs, outputs, bundle)
+            except Exception:
+                if not return_exceptions:
+                    raise
+                # Un registro inválido no tumba el lote: se repite cada uno
+                # por separado y solo el que falla se queda con su excepción
+                for i in scored:
+                    try:
+                        self._score_batch(inputs, [i], docs, outputs, bundle)
+                    except Exception as e:
+                        outputs[i] = e
+        except BaseException as e:
+            for key, call in calls.values():
+                self.single_flight.finish(key, call, error=e)
+            raise
+        
+        for i, (key, call) in calls.items():
+            if isinstance(outputs[i], Exception):
+                self.single_flight.finish(key, call, error=outputs[i])
+            else:
+                outputs[i] = self.single_flight.finish(key, call, result=outputs[i])
+        for i, call in waiting.items():
+            try:
+                outputs[i] = call.wait()
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                outputs[i] = e
+        
+        for i in texts:
+            if inputs[i].get("conversation_id") is not None and not isinstance(outputs[i], Exception):
+                self._track_session(inputs[i]["conversation_id"], outputs[i])
+        
+        return outputs
+
+    def _score_batch(
+        self,
+        inputs: List[Dict],
+        active: List[int],
+        docs: Dict[int, AnalyzedText],
+        outputs: List[Optional[Dict]],
+        bundle: ModelBundle
+    ):
+        """Ejecuta los modelos sobre los registros active y llena outputs"""
+        chats = dict(zip(
+            active,
+            self.run_chatlite_batch(
+                [inputs[i]["texto"] for i in active],
+                [docs[i] for i in active],
+                bundle
+            )
+        ))
+        
+        gated = [i for i in active if self._needs_agentcore(chats[i])]
+        agentcores = dict(zip(
+            gated,
+            self.run_agentcore_batch(
+                [inputs[i]["texto"] for i in gated],
+                [docs[i] for i in gated],
+                bundle
+            )
+        ))
+        
+        profiled = [i for i in active if inputs[i].get("perfil")]
+        rhubs = dict(zip(
+            profiled,
+            self.run_resourcehub_batch([inputs[i]["perfil"] for i in profiled], bundle)
+        ))
+        
+        for i in active:
+            outputs[i] = self._build_response(
+                chats[i],
+                agentcores.get(i),
+                rhubs.get(i),
+                inputs[i].get("ubicacion"),
+                bundle
+            )
+
 
 # ============================================================================
 # EJEMPLO DE USO (para testing local)
@@ -343,6 +1670,16 @@ if __name__ == "__main__":
         )
         pprint(resultado_simple)
         
+        print("\n" + "=" * 80)
+        print("[TEST 5] Lote de mensajes")
+        print("=" * 80)
+        resultados_lote = orquestor.handle_batch([
+            {"texto": "Hay un incendio en mi casa", "ubicacion": {'lat': 24.03, 'lon': -104.66}},
+            {"panic": True},
+            {"texto": "Gracias por todo"},
+        ])
+        pprint(resultados_lote)
+        
         print("\n" + "=" * 80)
         print("✓ TODOS LOS TESTS COMPLETADOS EXITOSAMENTE")
         print("=" * 80)
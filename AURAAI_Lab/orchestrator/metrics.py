@@ -0,0 +1,223 @@
+"""
+Histogramas de latencia por etapa del orquestador.
+
+Cada etapa (vectorizar/puntuar ChatLite y AgentCore, features/puntuación de
+ResourceHub, búsqueda de instalación, armado de respuesta) registra su
+duración en un histograma de cubetas logarítmicas: memoria constante y
+percentiles p50/p95/p99 con un error relativo de a lo sumo 10%.
+
+Las etapas que procesan varios registros de una vez (vectorizar y puntuar
+un lote) registran el tiempo por registro: n muestras de duración total/n,
+así los percentiles (y los presupuestos que se estiman con ellos) no
+dependen del tamaño del lote. La duración de un lote entero (handle_batch)
+va en histogramas aparte, por lote, junto con el número de registros.
+"""
+
+import math
+import time
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, List
+
+# Cubetas logarítmicas de 1 µs a ~100 s con crecimiento del 10%
+MIN_SECONDS = 1e-6
+GROWTH = 1.1
+N_BUCKETS = int(math.ceil(math.log(1e8) / math.log(GROWTH))) + 1
+
+QUANTILES = [0.5, 0.95, 0.99]
+
+
+class LatencyHistogram:
+    """Histograma de latencias con cubetas logarítmicas"""
+
+    def __init__(self):
+        self.counts = [0] * N_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bucket(seconds: float) -> int:
+        if seconds <= MIN_SECONDS:
+            return 0
+        return min(int(math.log(seconds / MIN_SECONDS) / math.log(GROWTH)) + 1, N_BUCKETS - 1)
+
+    def record(self, seconds: float, n: int = 1):
+        """Registra n muestras de seconds cada una"""
+        bucket = self._bucket(seconds)
+        with self._lock:
+            self.counts[bucket] += n
+            self.count += n
+            self.total += seconds * n
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """Latencia (s) bajo la cual cae la fracción q de las muestras"""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for bucket, n in enumerate(self.counts):
+                seen += n
+                if n and seen >= rank:
+                    # Límite superior de la cubeta, acotado por el máximo observado
+                    return min(MIN_SECONDS * GROWTH ** bucket, self.max)
+            return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """count, media, p50/p95/p99 y máximo en milisegundos"""
+        summary = {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0
+        }
+        for q in QUANTILES:
+            summary[f"p{int(q * 100)}_ms"] = self.percentile(q) * 1000
+        summary["max_ms"] = self.max * 1000
+        return summary
+
+
+class LatencyRecorder:
+    """
+    Histogramas por etapa (por registro) más los tiempos de la petición en
+    curso (por hilo), y aparte los histogramas por lote
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.batch_histograms: Dict[str, LatencyHistogram] = {}
+        self.batch_records: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _histogram(self, stage: str, histograms: Optional[Dict[str, LatencyHistogram]] = None) -> LatencyHistogram:
+        if histograms is None:
+            histograms = self.histograms
+        histogram = histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = histograms.setdefault(stage, LatencyHistogram())
+        return histogram
+
+    def record(self, stage: str, seconds: float, records: int = 1):
+        """Registra la duración de la etapa sobre records registros (seconds/records por registro)"""
+        if not self.enabled or records < 1:
+            return
+        seconds /= records
+        self._histogram(stage).record(seconds, records)
+
+        timings = getattr(self._local, "timings", None)
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + seconds * 1000
+
+    @contextmanager
+    def time(self, stage: str, records: int = 1):
+        """Mide el bloque y lo registra como la etapa indicada (sobre records registros)"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start, records)
+
+    def record_batch(self, stage: str, seconds: float, records: int):
+        """Registra la duración de un lote entero de records registros"""
+        if not self.enabled:
+            return
+        self._histogram(stage, self.batch_histograms).record(seconds)
+        with self._lock:
+            self.batch_records[stage] = self.batch_records.get(stage, 0) + records
+
+    @contextmanager
+    def time_batch(self, stage: str, records: int):
+        """Mide el bloque y lo registra como un lote de records registros"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_batch(stage, time.perf_counter() - start, records)
+
+    def begin_request(self):
+        """Empieza a acumular los tiempos por etapa de la petición de este hilo"""
+        self._local.timings = {}
+
+    def end_request(self) -> Dict[str, float]:
+        """Tiempos (ms) acumulados desde begin_request"""
+        timings = getattr(self._local, "timings", None) or {}
+        self._local.timings = None
+        return timings
+
+    def estimate_ms(self, stages: List[str], q: float = 0.95, min_samples: int = 1) -> Optional[float]:
+        """Suma del percentil q (ms) de las etapas, o None si alguna tiene menos de min_samples"""
+        total = 0.0
+        for stage in stages:
+            histogram = self.histograms.get(stage)
+            if histogram is None or histogram.count < min_samples:
+                return None
+            total += histogram.percentile(q) * 1000
+        return total
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Resumen por etapa y registro (count, mean, p50/p95/p99, max en ms)"""
+        return {stage: histogram.summary() for stage, histogram in sorted(self.histograms.items())}
+
+    def batch_stats(self) -> Dict[str, Dict[str, float]]:
+        """Resumen por lote (count de lotes, mean, p50/p95/p99, max en ms y records)"""
+        return {
+            stage: {**histogram.summary(), "records": self.batch_records.get(stage, 0)}
+            for stage, histogram in sorted(self.batch_histograms.items())
+        }
+
+    @staticmethod
+    def _render_summaries(lines: List[str], metric: str, summaries: Dict[str, Dict[str, float]]):
+        for stage, summary in summaries.items():
+            for q in QUANTILES:
+                value = summary[f"p{int(q * 100)}_ms"]
+                lines.append(f'{metric}{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} '
+                         f'{summary["mean_ms"] * summary["count"]:.6f}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {summary["count"]}')
+
+    def render_text(self, prefix: str = "aura") -> str:
+        """Volcado en formato de texto tipo Prometheus (por registro y por lote, por separado)"""
+        lines: List[str] = [
+            f"# HELP {prefix}_stage_latency_ms Latencia por registro de cada etapa del orquestador",
+            f"# TYPE {prefix}_stage_latency_ms summary"
+        ]
+        self._render_summaries(lines, f"{prefix}_stage_latency_ms", self.stats())
+
+        batch_stats = self.batch_stats()
+        if batch_stats:
+            lines += [
+                f"# HELP {prefix}_batch_latency_ms Latencia de un lote entero",
+                f"# TYPE {prefix}_batch_latency_ms summary"
+            ]
+            self._render_summaries(lines, f"{prefix}_batch_latency_ms", batch_stats)
+            lines += [
+                f"# HELP {prefix}_batch_records_total Registros procesados en lotes",
+                f"# TYPE {prefix}_batch_records_total counter"
+            ]
+            for stage, summary in batch_stats.items():
+                lines.append(f'{prefix}_batch_records_total{{stage="{stage}"}} {summary["records"]}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str, prefix: str = "aura") -> str:
+        """Escribe render_text() en path y devuelve el texto"""
+        text = self.render_text(prefix)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return text
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.batch_histograms = {}
+            self.batch_records = {}
@@ -0,0 +1,215 @@
+"""
+Modo multiproceso (pre-fork) del servidor del orquestador.
+
+El proceso padre carga todos los modelos una sola vez con el GC desactivado
+y llama a gc.freeze() antes de hacer fork: los objetos del heap pasan a la
+generación permanente y el recolector de los hijos ya no los recorre, así
+que las páginas de los bosques sklearn se quedan compartidas (copy-on-write)
+en lugar de duplicarse poco a poco en cada worker. Todos los workers atienden
+el mismo socket con el servidor asyncio de server.py.
+
+El padre reinicia workers caídos y reporta periódicamente la memoria de cada
+uno (Rss/Pss/compartida/privada de /proc/<pid>/smaps_rollup).
+
+Uso:
+    python prefork.py --workers 8 --port 8080
+"""
+
+import gc
+import os
+import time
+import signal
+import socket
+import asyncio
+import argparse
+from typing import Optional, Dict, List
+
+from main import AuraOrchestrator
+from server import OrchestratorServer
+
+# Campos de smaps_rollup que se reportan (en kB)
+SMAPS_FIELDS = {
+    "Rss": "rss_kb",
+    "Pss": "pss_kb",
+    "Shared_Clean": "shared_clean_kb",
+    "Shared_Dirty": "shared_dirty_kb",
+    "Private_Clean": "private_clean_kb",
+    "Private_Dirty": "private_dirty_kb",
+}
+
+
+def process_memory(pid: int) -> Dict[str, int]:
+    """Memoria de un proceso según /proc/<pid>/smaps_rollup ({} fuera de Linux)"""
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in SMAPS_FIELDS:
+                    memory[SMAPS_FIELDS[name]] = int(rest.split()[0])
+    except (OSError, ValueError, IndexError):
+        return {}
+
+    if memory:
+        memory["shared_kb"] = memory.get("shared_clean_kb", 0) + memory.get("shared_dirty_kb", 0)
+        memory["private_kb"] = memory.get("private_clean_kb", 0) + memory.get("private_dirty_kb", 0)
+    return memory
+
+
+class PreforkServer:
+    """Carga los modelos en el padre y reparte el socket entre N workers"""
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        workers: Optional[int] = None,
+        config_path: Optional[str] = None
+    ):
+        # Sin recolecciones durante la carga: evita que el GC toque (y
+        # ensucie) objetos que después se comparten con los hijos
+        gc.disable()
+        # Sin watcher en el padre: cada worker vigila y recarga por su cuenta
+        self.orchestrator = AuraOrchestrator(config_path=config_path, lazy=False, watch=False)
+
+        self.server_config = self.orchestrator.config.get("server", {})
+        prefork_config = self.orchestrator.config.get("prefork", {})
+
+        self.host = host or self.server_config.get("host", "0.0.0.0")
+        self.port = port if port is not None else self.server_config.get("port", 8080)
+        self.workers = workers or prefork_config.get("workers") or os.cpu_count() or 1
+        self.report_interval = prefork_config.get("report_interval_seconds", 60)
+
+        self.sock: Optional[socket.socket] = None
+        self.children: Dict[int, int] = {}  # pid -> slot
+        self._stopping = False
+
+    def _bind(self):
+        self.sock = socket.create_server(
+            (self.host, self.port), backlog=self.server_config.get("backlog", 1024)
+        )
+        self.sock.set_inheritable(True)
+
+    def _spawn(self, slot: int) -> int:
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(slot)
+            os._exit(0)
+
+        self.children[pid] = slot
+        return pid
+
+    def _run_worker(self, slot: int):
+        """Cuerpo de cada worker (proceso hijo)"""
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        # Los objetos heredados quedaron congelados; el GC solo ve lo nuevo
+        gc.enable()
+        # Los hilos no sobreviven al fork; una versión recargada ya no se
+        # comparte entre workers
+        if self.orchestrator.reload_config.get("watch", True):
+            self.orchestrator.start_watcher()
+
+        print(f"[AuraPrefork] Worker {slot} (pid {os.getpid()}) atendiendo")
+        server = OrchestratorServer(self.orchestrator, host=self.host, port=self.port)
+        asyncio.run(server.serve_forever(sock=self.sock))
+
+    def memory_report(self) -> List[Dict[str, int]]:
+        """Memoria del padre y de cada worker"""
+        report = [{"role": "parent", "pid": os.getpid(), **process_memory(os.getpid())}]
+        for pid, slot in sorted(self.children.items(), key=lambda item: item[1]):
+            report.append({"role": f"worker-{slot}", "pid": pid, **process_memory(pid)})
+        return report
+
+    def print_memory_report(self):
+        report = self.memory_report()
+        print("[AuraPrefork] Memoria por proceso (MB):")
+        print(f"  {'proceso':<12}{'pid':>8}{'rss':>10}{'pss':>10}{'compartida':>12}{'privada':>10}")
+        for row in report:
+            print(
+                f"  {row['role']:<12}{row['pid']:>8}"
+                f"{row.get('rss_kb', 0) / 1024:>10.1f}{row.get('pss_kb', 0) / 1024:>10.1f}"
+                f"{row.get('shared_kb', 0) / 1024:>12.1f}{row.get('private_kb', 0) / 1024:>10.1f}"
+            )
+
+        workers = [row for row in report if row["role"] != "parent" and row.get("pss_kb")]
+        if workers:
+            total_pss = sum(row["pss_kb"] for row in report if row.get("pss_kb"))
+            print(f"  Pss total: {total_pss / 1024:.1f} MB "
+                  f"({total_pss / 1024 / len(workers):.1f} MB por worker)")
+
+    def _stop(self, signum, frame):
+        self._stopping = True
+
+    def run(self):
+        """Crea los workers y los supervisa hasta recibir SIGINT/SIGTERM"""
+        self._bind()
+
+        # Todo lo cargado hasta aquí pasa a la generación permanente
+        gc.freeze()
+
+        for slot in range(self.workers):
+            self._spawn(slot)
+        print(f"[AuraPrefork] {self.workers} workers en http://{self.host}:{self.port}")
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        next_report = time.monotonic() + self.report_interval
+        try:
+            while not self._stopping:
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    pid = 0
+
+                if pid and pid in self.children:
+                    slot = self.children.pop(pid)
+                    print(f"[AuraPrefork] Worker {slot} (pid {pid}) terminó "
+                          f"(estado {status}); reiniciando")
+                    self._spawn(slot)
+                    continue
+
+                if self.report_interval and time.monotonic() >= next_report:
+                    self.print_memory_report()
+                    next_report = time.monotonic() + self.report_interval
+
+                time.sleep(0.2)
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Detiene los workers y reporta la memoria final"""
+        if self.children:
+            self.print_memory_report()
+
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in list(self.children):
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+            self.children.pop(pid, None)
+
+        if self.sock is not None:
+            self.sock.close()
+        print("[AuraPrefork] Detenido.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor pre-fork del orquestador AURA")
+    parser.add_argument("--host", help="Interfaz (por defecto config server.host)")
+    parser.add_argument("--port", type=int, help="Puerto (por defecto config server.port)")
+    parser.add_argument("--workers", type=int,
+                        help="Número de workers (por defecto config prefork.workers o núcleos)")
+    args = parser.parse_args()
+
+    PreforkServer(host=args.host, port=args.port, workers=args.workers).run()
+
+
+if __name__ == "__main__":
+    main()
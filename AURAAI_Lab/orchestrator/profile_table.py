@@ -0,0 +1,50 @@
+"""
+Genera la tabla de búsqueda exhaustiva de ResourceHub.
+
+La tabla (aura_common.profile_table) guarda la acción, la confianza y las
+probabilidades de cada uno de los 7,744 perfiles posibles, puntuados una
+sola vez con resourcehub_classifier.joblib. El orquestador y
+resourcehub/test.py la usan en lugar del clasificador mientras su
+source_sha256 coincida con el del modelo.
+
+Uso:
+    python profile_table.py     # genera models/resourcehub_lookup.npz y la versión mobile
+"""
+
+import os
+import numpy as np
+
+from aura_common.files import file_sha256
+from aura_common.profile_table import ProfileLookupTable, all_profile_features
+
+
+def main():
+    """Genera la tabla con el clasificador actual de ResourceHub"""
+    import joblib
+    from main import MODELS, PROFILE_TABLE
+
+    print("=" * 80)
+    print("RESOURCEHUB - TABLA DE PERFILES PRECALCULADA")
+    print("=" * 80)
+
+    model = joblib.load(MODELS["resourcehub"])
+    encoder = joblib.load(MODELS["resourcehub_encoder"])
+    table = ProfileLookupTable.build(model, encoder, source_sha256=file_sha256(MODELS["resourcehub"]))
+
+    table.save(PROFILE_TABLE["resourcehub"])
+    print(f"✓ {len(table)} perfiles -> {PROFILE_TABLE['resourcehub']} "
+          f"({os.path.getsize(PROFILE_TABLE['resourcehub']) / 1024:.1f} KB)")
+
+    os.makedirs(os.path.dirname(PROFILE_TABLE["resourcehub_mobile"]), exist_ok=True)
+    table.export_mobile(PROFILE_TABLE["resourcehub_mobile"])
+    print(f"✓ Versión mobile -> {PROFILE_TABLE['resourcehub_mobile']} "
+          f"({os.path.getsize(PROFILE_TABLE['resourcehub_mobile']) / 1024:.1f} KB)")
+
+    # La tabla debe reproducir exactamente al clasificador
+    if not np.array_equal(model.predict(all_profile_features()), model.classes_[table.actions]):
+        raise ValueError("La tabla no coincide con las predicciones del clasificador")
+    print("✓ Tabla verificada contra el clasificador")
+
+
+if __name__ == "__main__":
+    main()
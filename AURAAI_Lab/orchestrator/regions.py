@@ -0,0 +1,160 @@
+"""
+Bundles por región cargados bajo demanda con tope de memoria.
+
+Cada región de config regions.definitions reemplaza algunas rutas de MODELS
+o ASSETS (p. ej. geoguard_db con las instalaciones de otro estado, o el
+clasificador de ChatLite con uno regional):
+
+    "chihuahua": {
+        "geoguard_db": "../geoguard/models/regions/chihuahua/facilities_mobile.json",
+        "geoguard_config": "../geoguard/models/regions/chihuahua/routing_config.json"
+    }
+
+El bundle de una región solo carga los motores cuyas rutas cambia; los demás
+los comparte con el bundle vigente. Se carga con la primera petición de la
+región y, si la memoria estimada de los bundles regionales (tamaño en disco
+de sus artefactos) pasa de max_bytes, se desalojan los menos recientes. Las
+peticiones en curso conservan su bundle aunque se desaloje.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Callable
+
+from registry import ModelBundle
+
+
+def regional_engines(paths: Dict[str, str], engines: List[str]) -> List[str]:
+    """Motores con alguna clave propia (nombre o nombre_*) en paths"""
+    return [
+        name for name in engines
+        if any(key == name or key.startswith(f"{name}_") for key in paths)
+    ]
+
+
+class Region:
+    """Rutas propias de una región y los motores que afectan"""
+
+    def __init__(self, region_id: str, paths: Dict[str, str], engines: List[str]):
+        self.region_id = region_id
+        self.paths = paths
+        self.engines = regional_engines(paths, engines)
+
+    @classmethod
+    def from_config(cls, region_id: str, definition: Dict[str, str], engines: List[str],
+                    base_dir: str) -> "Region":
+        """Región de config; las rutas relativas son relativas a base_dir"""
+        paths = {
+            key: path if os.path.isabs(path) else os.path.normpath(os.path.join(base_dir, path))
+            for key, path in definition.items()
+        }
+        return cls(region_id, paths, engines)
+
+
+class RegionBundles:
+    """Bundles regionales en LRU acotado por memoria estimada"""
+
+    def __init__(
+        self,
+        regions: Dict[str, Region],
+        build: Callable[[Region], ModelBundle],
+        max_bytes: Optional[int] = None
+    ):
+        """
+        Args:
+            regions: Regiones conocidas por id
+            build: Carga el bundle de una región (motores regionales + compartidos)
+            max_bytes: Memoria estimada máxima de los bundles regionales (None = sin límite)
+        """
+        self.regions = regions
+        self.build = build
+        self.max_bytes = max_bytes
+        self._bundles: "OrderedDict[str, ModelBundle]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._load_locks = {region_id: threading.Lock() for region_id in regions}
+        self._generation = 0
+
+        self.total_bytes = 0
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def __contains__(self, region_id) -> bool:
+        return region_id in self.regions
+
+    @staticmethod
+    def nbytes(bundle: ModelBundle, engines: List[str]) -> int:
+        """Tamaño en disco de los artefactos de los motores regionales del bundle"""
+        return sum(
+            size or 0
+            for name in engines
+            for _, _, size in bundle.fingerprints.get(name, ())
+        )
+
+    def get(self, region_id: str) -> ModelBundle:
+        """Bundle de la región, cargándolo si no está (KeyError si no existe)"""
+        region = self.regions[region_id]
+        with self._lock:
+            bundle = self._bundles.get(region_id)
+            if bundle is not None:
+                self._bundles.move_to_end(region_id)
+                self.hits += 1
+                return bundle
+
+        # Una sola carga por región; las demás peticiones la esperan
+        with self._load_locks[region_id]:
+            with self._lock:
+                bundle = self._bundles.get(region_id)
+                if bundle is not None:
+                    self._bundles.move_to_end(region_id)
+                    self.hits += 1
+                    return bundle
+                generation = self._generation
+
+            bundle = self.build(region)
+            size = self.nbytes(bundle, region.engines)
+            with self._lock:
+                # Si se descartaron los bundles durante la carga (recarga del
+                # bundle vigente) este se usa para la petición pero no se guarda
+                if generation != self._generation:
+                    return bundle
+                self._bundles[region_id] = bundle
+                self._sizes[region_id] = size
+                self.total_bytes += size
+                self.loads += 1
+                # La región recién cargada nunca se desaloja a sí misma
+                while self.max_bytes is not None and self.total_bytes > self.max_bytes \
+                        and len(self._bundles) > 1:
+                    evicted, _ = self._bundles.popitem(last=False)
+                    self.total_bytes -= self._sizes.pop(evicted)
+                    self.evictions += 1
+                    print(f"[AuraOrchestrator] Región {evicted} desalojada de memoria")
+            return bundle
+
+    def loaded(self) -> Dict[str, ModelBundle]:
+        with self._lock:
+            return dict(self._bundles)
+
+    def discard(self, region_id: Optional[str] = None):
+        """Quita un bundle (o todos); se vuelve a cargar en su próxima petición"""
+        with self._lock:
+            self._generation += 1
+            for loaded in ([region_id] if region_id is not None else list(self._bundles)):
+                if loaded in self._bundles:
+                    del self._bundles[loaded]
+                    self.total_bytes -= self._sizes.pop(loaded)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores para métricas / health checks"""
+        with self._lock:
+            return {
+                "regions": sorted(self.regions),
+                "loaded": list(self._bundles),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,221 @@
+"""
+Versiones de modelos y recarga en caliente para AuraOrchestrator.
+
+Un ModelBundle agrupa los artefactos cargados de los motores junto con su
+versión (hash del contenido de los archivos de los que se cargaron). Cada
+petición toma el bundle vigente al empezar y lo usa hasta terminar, así que
+publicar uno nuevo es un simple cambio de referencia: las peticiones en
+curso terminan con la versión anterior y las nuevas ya ven la nueva.
+
+RegistryWatcher revisa cada poll_seconds los artefactos en disco. Cuando
+cambian (y se mantienen iguales durante un ciclo, para no leer archivos a
+medio escribir) pide al orquestador un bundle nuevo, que se carga en segundo
+plano, se valida con el smoke test y solo entonces se publica. Un bundle
+rechazado no se reintenta hasta que los artefactos vuelvan a cambiar.
+"""
+
+import os
+import json
+import math
+import time
+import hashlib
+import threading
+from typing import Optional, Dict, Any, List, Tuple
+
+from text_frontend import TextFrontend
+
+
+def artifact_digest(paths: List[str]) -> str:
+    """Hash corto (12 hex) del contenido de los archivos; los faltantes cuentan como vacíos"""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode("utf-8"))
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        except OSError:
+            digest.update(b"<missing>")
+    return digest.hexdigest()[:12]
+
+
+class ModelBundle:
+    """
+    Artefactos de los motores que atienden una petición.
+
+    Los loaders del orquestador guardan los artefactos como atributos
+    (p. ej. bundle.agentcore_model); ready/locks permiten cargar cada motor
+    bajo demanda dentro del bundle. region/paths identifican un bundle
+    regional y las rutas de MODELS/ASSETS que reemplaza (ver regions.py).
+    """
+
+    def __init__(self, engines: List[str], region: Optional[str] = None,
+                 paths: Optional[Dict[str, str]] = None):
+        self.region = region
+        self.paths = paths or {}
+        self.versions: Dict[str, str] = {}
+        self.fingerprints: Dict[str, tuple] = {}
+        self.text_frontend = TextFrontend()
+        self.ready = {name: False for name in engines}
+        self.locks = {name: threading.Lock() for name in engines}
+        self.load_times: Dict[str, float] = {}
+        self.load_errors: Dict[str, str] = {}
+        self.created_at = time.time()
+
+    @property
+    def version(self) -> str:
+        """Versión del conjunto: hash de las versiones de cada motor"""
+        joined = ",".join(f"{name}={version}" for name, version in sorted(self.versions.items()))
+        return hashlib.sha256(joined.encode("utf-8")).hexdigest()[:12]
+
+    def adopt(self, other: "ModelBundle", name: str, attributes: Tuple[str, ...]):
+        """Comparte con este bundle un motor ya cargado (y sin cambios) de otro"""
+        for attribute in attributes:
+            setattr(self, attribute, getattr(other, attribute))
+        self.versions[name] = other.versions[name]
+        self.fingerprints[name] = other.fingerprints[name]
+        if name in other.load_times:
+            self.load_times[name] = other.load_times[name]
+        self.ready[name] = True
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "region": self.region,
+            "engines": dict(self.versions),
+            "loaded_at": self.created_at
+        }
+
+
+class SmokeTest:
+    """
+    Casos de validación para un bundle candidato (smoke_test.json).
+
+    Cada caso trae una entrada de handle_input y, opcionalmente, la etiqueta
+    esperada por motor ({"chatlite": intent, "agentcore": tipo,
+    "resourcehub": acción}). El candidato pasa si responde todos los casos
+    sin errores, con confianzas en [0, 1], y coincide con al menos
+    min_agreement de las etiquetas esperadas.
+    """
+
+    def __init__(self, cases: List[Dict[str, Any]], min_agreement: float = 0.8):
+        self.cases = cases
+        self.min_agreement = min_agreement
+
+    @classmethod
+    def from_file(cls, path: str, min_agreement: float = 0.8) -> "SmokeTest":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("cases", []), min_agreement)
+
+    def _labels(self, orchestrator, bundle: ModelBundle) -> Dict[Tuple[int, str], Tuple[str, float]]:
+        """(caso, motor) -> (etiqueta, confianza) para cada etiqueta esperada"""
+        labels = {}
+        for engine, run, label_key in (
+            ("chatlite", orchestrator.run_chatlite_batch, "intent"),
+            ("agentcore", orchestrator.run_agentcore_batch, "tipo_emergencia"),
+            ("resourcehub", orchestrator.run_resourcehub_batch, "action")
+        ):
+            indices = [i for i, case in enumerate(self.cases) if engine in case.get("expect", {})]
+            if not indices:
+                continue
+            key = "perfil" if engine == "resourcehub" else "texto"
+            results = run([self.cases[i]["input"][key] for i in indices], bundle=bundle)
+            for i, result in zip(indices, results):
+                labels[(i, engine)] = (str(result[label_key]), result["confianza"])
+        return labels
+
+    def run(self, orchestrator, bundle: ModelBundle) -> Dict[str, Any]:
+        """Ejecuta los casos sobre bundle; report["passed"] indica si se puede publicar"""
+        report: Dict[str, Any] = {"cases": len(self.cases), "errors": [], "mismatches": []}
+        try:
+            orchestrator.handle_batch([case["input"] for case in self.cases], bundle=bundle)
+            labels = self._labels(orchestrator, bundle)
+        except Exception as e:
+            report["errors"].append(f"{type(e).__name__}: {e}")
+            report["passed"] = False
+            return report
+
+        for (i, engine), (label, confianza) in sorted(labels.items()):
+            if not (isinstance(confianza, float) and math.isfinite(confianza) and 0.0 <= confianza <= 1.0):
+                report["errors"].append(f"caso {i} ({engine}): confianza inválida {confianza}")
+            expected = self.cases[i]["expect"][engine]
+            if label != expected:
+                report["mismatches"].append(
+                    {"case": i, "engine": engine, "expected": expected, "got": label}
+                )
+
+        report["checked"] = len(labels)
+        report["agreement"] = 1.0 - len(report["mismatches"]) / len(labels) if labels else 1.0
+        report["passed"] = not report["errors"] and report["agreement"] >= self.min_agreement
+        return report
+
+
+class RegistryWatcher:
+    """Hilo que detecta artefactos nuevos en disco y pide la recarga al orquestador"""
+
+    def __init__(self, orchestrator, poll_seconds: float = 5.0):
+        self.orchestrator = orchestrator
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pending: Optional[Dict[str, tuple]] = None
+        self._rejected: Optional[Dict[str, tuple]] = None
+
+        self.checks = 0
+        self.reloads = 0
+        self.rejections = 0
+
+    def start(self) -> threading.Thread:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="aura-registry", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"[AuraRegistry] Error revisando artefactos: {e}")
+
+    def check(self) -> bool:
+        """Un ciclo de revisión; True si se publicó un bundle nuevo"""
+        self.checks += 1
+        self.orchestrator.refresh_regions()
+        changed = self.orchestrator.changed_engines()
+        if not changed:
+            self._pending = None
+            return False
+
+        # Esperar un ciclo sin cambios antes de cargar (copias en curso)
+        if changed != self._pending:
+            self._pending = changed
+            return False
+        self._pending = None
+
+        if changed == self._rejected:
+            return False
+
+        if self.orchestrator.reload_models(list(changed)):
+            self.reloads += 1
+            self._rejected = None
+            return True
+
+        self.rejections += 1
+        self._rejected = changed
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "poll_seconds": self.poll_seconds,
+            "checks": self.checks,
+            "reloads": self.reloads,
+            "rejections": self.rejections
+        }
@@ -0,0 +1,164 @@
+"""
+Admisión y planificación por prioridad para el servidor del orquestador.
+
+Con sobrecarga, un "hola, ¿cómo estás?" no debe retrasar un reporte de
+incendio. Cada petición entra en una clase de prioridad:
+
+    panic      botón de pánico: respuesta fija, nunca se encola ni se descarta
+    emergency  texto con alguna de orchestrator_rules.critical_keywords
+    chat       todo lo demás
+
+La intención real (y si activa AgentCore según intent_mapping) solo se
+conoce después de correr ChatLite, que es justo el trabajo que se está
+planificando; critical_keywords es el triage barato que la config ya define
+para eso.
+
+Cada clase tiene una cola acotada (si está llena la petición se rechaza) y
+un deadline opcional: lo que esperó más que su deadline se descarta al
+armar el lote en lugar de procesarse tarde. Los lotes se llenan de la
+prioridad más alta a la más baja. Cuando la profundidad total cruza
+degrade_queue_depth el planificador entra en modo degradado (el orquestador
+omite ResourceHub y la búsqueda de instalaciones) hasta bajar de
+recover_queue_depth.
+"""
+
+import re
+import time
+import unicodedata
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple
+
+PRIORITIES = ("panic", "emergency", "chat")
+
+
+class Overloaded(Exception):
+    """La petición se rechazó o descartó por sobrecarga"""
+
+
+def _normalize(text: str) -> str:
+    """Minúsculas y sin acentos, como el preprocesamiento de los vectorizadores"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+class KeywordTriage:
+    """Clase de prioridad de una entrada a partir de critical_keywords"""
+
+    def __init__(self, critical_keywords: List[str]):
+        keywords = sorted({_normalize(k) for k in critical_keywords if k}, key=len, reverse=True)
+        self._pattern = re.compile(
+            r"\b(?:" + "|".join(re.escape(k) for k in keywords) + r")\b"
+        ) if keywords else None
+
+    def priority(self, record: Dict) -> str:
+        if record.get("panic", False):
+            return "panic"
+        texto = record.get("texto")
+        if self._pattern is not None and isinstance(texto, str) and \
+                self._pattern.search(_normalize(texto)):
+            return "emergency"
+        return "chat"
+
+
+class PriorityScheduler:
+    """Colas acotadas por prioridad con descarte por deadline y modo degradado"""
+
+    def __init__(
+        self,
+        max_queue: Optional[Dict[str, int]] = None,
+        deadline_ms: Optional[Dict[str, Optional[float]]] = None,
+        degrade_queue_depth: Optional[int] = None,
+        recover_queue_depth: Optional[int] = None
+    ):
+        """
+        Args:
+            max_queue: Entradas máximas en cola por prioridad (sin clave = sin límite)
+            deadline_ms: Espera máxima por prioridad antes de descartar (None = sin deadline)
+            degrade_queue_depth: Profundidad total que activa el modo degradado (None = nunca)
+            recover_queue_depth: Profundidad a la que se sale del modo degradado
+                                 (por defecto la mitad de degrade_queue_depth)
+        """
+        self.max_queue = max_queue or {}
+        self.deadline_ms = deadline_ms or {}
+        self.degrade_queue_depth = degrade_queue_depth
+        if recover_queue_depth is None and degrade_queue_depth is not None:
+            recover_queue_depth = degrade_queue_depth // 2
+        self.recover_queue_depth = recover_queue_depth
+
+        self._queues: Dict[str, deque] = {priority: deque() for priority in PRIORITIES}
+        self.degraded = False
+
+        self.admitted = {priority: 0 for priority in PRIORITIES}
+        self.rejected = {priority: 0 for priority in PRIORITIES}
+        self.expired = {priority: 0 for priority in PRIORITIES}
+        self.degraded_batches = 0
+
+    def depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def put(self, priority: str, item: Any) -> bool:
+        """Encola item; False si la cola de su prioridad está llena"""
+        queue = self._queues[priority]
+        limit = self.max_queue.get(priority)
+        if limit is not None and len(queue) >= limit:
+            self.rejected[priority] += 1
+            return False
+
+        queue.append((time.monotonic(), item))
+        self.admitted[priority] += 1
+        return True
+
+    def _update_mode(self):
+        if self.degrade_queue_depth is None:
+            return
+        depth = self.depth()
+        if not self.degraded and depth >= self.degrade_queue_depth:
+            self.degraded = True
+            print(f"[AuraScheduler] Modo degradado: {depth} peticiones en cola")
+        elif self.degraded and depth <= self.recover_queue_depth:
+            self.degraded = False
+            print(f"[AuraScheduler] Fin del modo degradado: {depth} peticiones en cola")
+
+    def take(self, max_items: int) -> Tuple[List[Any], List[Any], bool]:
+        """
+        Saca hasta max_items entradas, de la prioridad más alta a la más baja.
+
+        Returns:
+            (lote, vencidas, degradado): las vencidas superaron su deadline y
+            no deben procesarse; degradado indica cómo procesar el lote
+        """
+        self._update_mode()
+        degraded = self.degraded
+        if degraded:
+            self.degraded_batches += 1
+
+        now = time.monotonic()
+        batch, expired = [], []
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            deadline = self.deadline_ms.get(priority)
+            # Las vencidas al frente de la cola se descartan aunque el lote esté lleno
+            while queue:
+                enqueued_at, item = queue[0]
+                if deadline is not None and (now - enqueued_at) * 1000 > deadline:
+                    queue.popleft()
+                    self.expired[priority] += 1
+                    expired.append(item)
+                elif len(batch) < max_items:
+                    queue.popleft()
+                    batch.append(item)
+                else:
+                    break
+        return batch, expired, degraded
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": {priority: len(queue) for priority, queue in self._queues.items()},
+            "max_queue": dict(self.max_queue),
+            "deadline_ms": dict(self.deadline_ms),
+            "admitted": dict(self.admitted),
+            "rejected": dict(self.rejected),
+            "expired": dict(self.expired),
+            "degraded": self.degraded,
+            "degraded_batches": self.degraded_batches
+        }
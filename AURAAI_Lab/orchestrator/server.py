@@ -0,0 +1,440 @@
+"""
+Servidor HTTP asyncio para AuraOrchestrator con micro-batching.
+
+Las peticiones concurrentes se agrupan en lotes (hasta max_batch o max_wait_ms
+desde la primera) y cada lote pasa por handle_batch en un hilo de trabajo:
+una sola pasada vectorizada por modelo. Hasta server.batch_workers lotes
+corren a la vez; mientras están todos ocupados el siguiente lote sigue
+acumulando entradas. Las peticiones de pánico no esperan
+al lote y se responden de inmediato.
+
+Con sobrecarga los lotes se arman por prioridad (emergencias antes que chat),
+las colas son acotadas y el chat que espera demasiado se descarta con 503
+(ver scheduler.py y config server.scheduler).
+
+Endpoints:
+    POST /v1/input   {"texto", "ubicacion", "perfil", "panic", "conversation_id", "region"}
+                     -> respuesta de handle_input
+    GET  /health     estado de carga, versión de modelos, caché, lotes y latencias
+    GET  /metrics    latencias por etapa en formato de texto Prometheus
+
+Uso:
+    python server.py --port 8080
+"""
+
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Set, Tuple
+
+from main import AuraOrchestrator
+from scheduler import KeywordTriage, PriorityScheduler, Overloaded
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable"
+}
+
+INPUT_KEYS = ("texto", "ubicacion", "perfil", "panic", "conversation_id", "region")
+
+# Campos del perfil que usa ResourceHub (ver AuraOrchestrator._profile_features)
+PROFILE_KEYS = ("edad", "tiene_alergias", "condicion_cronica", "toma_medicamentos", "tipo_sangre")
+PROFILE_FLAGS = ("tiene_alergias", "condicion_cronica", "toma_medicamentos")
+
+
+def _is_number(value) -> bool:
+    """int o float (bool no cuenta como número)"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_location(ubicacion) -> Optional[str]:
+    """Mensaje de error si ubicacion no es {"lat", "lon"} numéricos, o None"""
+    if not isinstance(ubicacion, dict):
+        return "ubicacion debe ser un objeto con lat y lon"
+    for key, limit in (("lat", 90), ("lon", 180)):
+        value = ubicacion.get(key)
+        if not _is_number(value):
+            return f"ubicacion.{key} debe ser numérico"
+        if not -limit <= value <= limit:
+            return f"ubicacion.{key} fuera de rango"
+    return None
+
+
+def validate_profile(perfil) -> Optional[str]:
+    """Mensaje de error si al perfil le falta un campo o tiene un tipo inválido, o None"""
+    if not isinstance(perfil, dict):
+        return "perfil debe ser un objeto"
+    missing = [key for key in PROFILE_KEYS if key not in perfil]
+    if missing:
+        return f"Faltan campos en perfil: {', '.join(missing)}"
+    if not _is_number(perfil.get("edad")):
+        return "perfil.edad debe ser numérico"
+    for key in PROFILE_FLAGS:
+        if not isinstance(perfil.get(key), bool) and perfil.get(key) not in (0, 1):
+            return f"perfil.{key} debe ser booleano"
+    if not isinstance(perfil.get("tipo_sangre"), str):
+        return "perfil.tipo_sangre debe ser texto"
+    return None
+
+
+class MicroBatcher:
+    """
+    Agrupa entradas concurrentes por prioridad y las resuelve con handle_batch,
+    con hasta workers lotes en curso a la vez
+    """
+
+    def __init__(
+        self,
+        orchestrator: AuraOrchestrator,
+        max_wait_ms: float = 2.0,
+        max_batch: int = 64,
+        workers: int = 1,
+        scheduler: Optional[PriorityScheduler] = None
+    ):
+        self.orchestrator = orchestrator
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch = max_batch
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="aura-batch")
+        self.scheduler = scheduler or PriorityScheduler()
+        self.triage = KeywordTriage(
+            orchestrator.config.get("orchestrator_rules", {}).get("critical_keywords", [])
+        )
+        self._available: Optional[asyncio.Event] = None
+        self._free_workers: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.batched_inputs = 0
+        self.panic_inputs = 0
+        self.max_batch_seen = 0
+
+    def start(self):
+        """Arranca el bucle de lotes en el event loop actual"""
+        self._available = asyncio.Event()
+        self._free_workers = asyncio.Semaphore(self.workers)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        for task in list(self._in_flight):
+            task.cancel()
+        self.executor.shutdown(wait=False)
+
+    async def submit(self, record: Dict) -> Dict:
+        """
+        Resuelve una entrada; el pánico no entra en el lote.
+
+        Raises:
+            Overloaded: La cola de su prioridad está llena o venció su deadline
+        """
+        priority = self.triage.priority(record)
+        if priority == "panic":
+            self.panic_inputs += 1
+            return self.orchestrator.handle_input(panic=True)
+
+        future = asyncio.get_running_loop().create_future()
+        if not self.scheduler.put(priority, (record, future)):
+            raise Overloaded(f"Cola de {priority} llena, intenta de nuevo")
+        self._available.set()
+        return await future
+
+    async def _wait_for_input(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que llegue una entrada nueva; False si vence timeout"""
+        self._available.clear()
+        try:
+            await asyncio.wait_for(self._available.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _collect(self) -> Tuple[List[Tuple[Dict, asyncio.Future]], bool]:
+        """
+        Espera la primera entrada, da max_wait para que lleguen más y saca
+        el lote por prioridad; devuelve (lote, degradado)
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            while not self.scheduler.depth():
+                await self._wait_for_input()
+            deadline = loop.time() + self.max_wait
+
+            while self.scheduler.depth() < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0 or not await self._wait_for_input(timeout):
+                    break
+
+            batch, expired, degraded = self.scheduler.take(self.max_batch)
+            for _, future in expired:
+                if not future.done():
+                    future.set_exception(Overloaded("Tiempo de espera agotado por sobrecarga"))
+            if batch:
+                return batch, degraded
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # El siguiente lote se arma cuando hay un worker libre; mientras
+            # tanto las entradas se siguen acumulando en las colas
+            await self._free_workers.acquire()
+            try:
+                batch, degraded = await self._collect()
+            except BaseException:
+                self._free_workers.release()
+                raise
+
+            self.batches += 1
+            self.batched_inputs += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+
+            task = loop.create_task(self._dispatch(batch, degraded))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Dict, asyncio.Future]], degraded: bool):
+        """Resuelve un lote en el pool y libera su worker"""
+        loop = asyncio.get_running_loop()
+        records = [record for record, _ in batch]
+
+        # Un registro que falla solo rechaza su propia petición
+        try:
+            outputs = await loop.run_in_executor(
+                self.executor, self.orchestrator.handle_batch, records, None, degraded, True
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._free_workers.release()
+
+        for (_, future), output in zip(batch, outputs):
+            if future.done():
+                continue
+            if isinstance(output, Exception):
+                future.set_exception(output)
+            else:
+                future.set_result(output)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "batched_inputs": self.batched_inputs,
+            "mean_batch_size": self.batched_inputs / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "panic_inputs": self.panic_inputs,
+            "pending": self.scheduler.depth(),
+            "in_flight": len(self._in_flight),
+            "workers": self.workers
+        }
+
+
+class OrchestratorServer:
+    """Servidor HTTP/1.1 mínimo (keep-alive, cuerpos JSON) sobre asyncio"""
+
+    def __init__(
+        self,
+        orchestrator: AuraOrchestrator,
+        host: Optional[str] = None,
+        port: Optional[int] = None
+    ):
+        self.orchestrator = orchestrator
+        self.server_config = orchestrator.config.get("server", {})
+        self.host = host or self.server_config.get("host", "0.0.0.0")
+        self.port = port if port is not None else self.server_config.get("port", 8080)
+        self.max_body_bytes = self.server_config.get("max_body_bytes", 65536)
+        self.batcher = MicroBatcher(
+            orchestrator,
+            max_wait_ms=self.server_config.get("max_wait_ms", 2.0),
+            max_batch=self.server_config.get("max_batch", 64),
+            workers=self.server_config.get("batch_workers", 1),
+            scheduler=PriorityScheduler(**self.server_config.get("scheduler", {}))
+        )
+        self.started_at = time.time()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, sock=None) -> asyncio.AbstractServer:
+        """Abre el socket (o usa uno ya abierto, p. ej. heredado de un fork)"""
+        self.batcher.start()
+        if sock is not None:
+            self._server = await asyncio.start_server(self._handle_connection, sock=sock)
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_connection, self.host, self.port
+            )
+        return self._server
+
+    async def serve_forever(self, sock=None):
+        server = await self.start(sock=sock)
+        address = server.sockets[0].getsockname()
+        print(f"[AuraServer] Escuchando en http://{address[0]}:{address[1]}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+
+    def health(self) -> Tuple[int, Dict[str, Any]]:
+        """Estado para balanceadores: 200 si todos los motores están listos"""
+        readiness = self.orchestrator.readiness()
+        body = {
+            **readiness,
+            "uptime_seconds": time.time() - self.started_at,
+            "models": self.orchestrator.model_info(),
+            "cache": self.orchestrator.cache_stats(),
+            "cascade": self.orchestrator.cascade_stats(),
+            "coalescing": self.orchestrator.coalescing_stats(),
+            "facility_cache": self.orchestrator.facility_cache_stats(),
+            "regions": self.orchestrator.region_stats(),
+            "sessions": self.orchestrator.session_stats(),
+            "batching": self.batcher.stats(),
+            "scheduling": self.batcher.scheduler.stats(),
+            "latency": self.orchestrator.latency_stats(),
+            "batch_latency": self.orchestrator.batch_latency_stats()
+        }
+        return (200 if readiness["ready"] else 503), body
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        path = path.split("?", 1)[0]
+
+        if path == "/health":
+            if method != "GET":
+                return 405, {"error": "Usa GET"}
+            return self.health()
+
+        if path == "/metrics":
+            if method != "GET":
+                return 405, {"error": "Usa GET"}
+            return 200, self.orchestrator.metrics.render_text()
+
+        if path == "/v1/input":
+            if method != "POST":
+                return 405, {"error": "Usa POST"}
+            try:
+                payload = json.loads(body or b"{}")
+            except (ValueError, UnicodeDecodeError):
+                return 400, {"error": "JSON inválido"}
+            if not isinstance(payload, dict):
+                return 400, {"error": "Se esperaba un objeto JSON"}
+
+            record = {key: payload[key] for key in INPUT_KEYS if key in payload}
+            if not isinstance(record.get("texto") or "", str):
+                return 400, {"error": "texto debe ser texto"}
+            if not isinstance(record.get("conversation_id", ""), (str, int)):
+                return 400, {"error": "conversation_id debe ser texto o entero"}
+            # El pánico no usa perfil ni ubicación; vacíos o null se ignoran,
+            # igual que en handle_input
+            for key, validate in (("ubicacion", validate_location), ("perfil", validate_profile)):
+                error = validate(record[key]) if record.get(key) and not record.get("panic", False) else None
+                if error:
+                    return 400, {"error": error}
+            # El pánico no depende de la región (ni de que esté cargada)
+            if not record.get("panic", False) and (
+                    not isinstance(record.get("region", ""), str) or
+                    not self.orchestrator.has_region(record.get("region"))):
+                return 400, {"error": f"Región desconocida: {record.get('region')}"}
+            try:
+                return 200, await self.batcher.submit(record)
+            except Overloaded as e:
+                return 503, {"error": str(e)}
+            except Exception as e:
+                return 500, {"error": str(e)}
+
+        return 404, {"error": f"Ruta no encontrada: {path}"}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._write(writer, 400, {"error": "Petición mal formada"}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close" \
+                    and version == "HTTP/1.1"
+
+                length = int(headers.get("content-length", 0) or 0)
+                if length > self.max_body_bytes:
+                    await self._write(writer, 413, {"error": "Cuerpo demasiado grande"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, response = await self._route(method.upper(), path, body)
+                await self._write(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _write(self, writer: asyncio.StreamWriter, status: int,
+                     response: Any, keep_alive: bool):
+        # Las respuestas str (p. ej. /metrics) se envían como texto plano
+        if isinstance(response, str):
+            body = response.encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body = json.dumps(response, ensure_ascii=False).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor HTTP del orquestador AURA")
+    parser.add_argument("--host", help="Interfaz (por defecto config server.host)")
+    parser.add_argument("--port", type=int, help="Puerto (por defecto config server.port)")
+    parser.add_argument("--lazy", action="store_true",
+                        help="Aceptar conexiones mientras los modelos se precalientan")
+    args = parser.parse_args()
+
+    orchestrator = AuraOrchestrator(lazy=True if args.lazy else None)
+    server = OrchestratorServer(orchestrator, host=args.host, port=args.port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\n[AuraServer] Detenido.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Front-end de texto compartido para ChatLite y AgentCore.
+
+Cada mensaje se normaliza (minúsculas + sin acentos) y se tokeniza una sola
+vez; los tokens se proyectan después al vocabulario de cada TfidfVectorizer
+registrado. El resultado es idéntico a vectorizer.transform([texto]): se
+reutilizan el preprocesador, las stopwords, el rango de n-gramas y el
+TfidfTransformer configurados en cada vectorizador.
+
+Dos vectorizadores comparten la tokenización cuando su preprocesamiento es
+el mismo y sus token_pattern aceptan el mismo alfabeto sobre texto ya
+normalizado (p. ej. [a-záéíóúñ] y [a-záéíóúñü] tras strip_accents='unicode').
+"""
+
+import re
+import numpy as np
+import scipy.sparse as sp
+from typing import Dict, List, Hashable, Optional
+from sklearn.feature_extraction.text import (
+    TfidfTransformer, TfidfVectorizer, strip_accents_ascii, strip_accents_unicode
+)
+
+# token_pattern de la forma \b[clase]+\b
+_CHAR_CLASS_PATTERN = re.compile(r"^\\b\[([^\]\\]+)\]\+\\b$")
+
+_ACCENT_STRIPPERS = {"unicode": strip_accents_unicode, "ascii": strip_accents_ascii}
+
+
+def _expand_char_class(body: str) -> Optional[frozenset]:
+    """Expande el cuerpo de una clase de caracteres simple ('a-záé') a un conjunto"""
+    if body.startswith("^"):
+        return None
+
+    chars = set()
+    i = 0
+    while i < len(body):
+        if i + 2 < len(body) and body[i + 1] == "-":
+            chars.update(chr(c) for c in range(ord(body[i]), ord(body[i + 2]) + 1))
+            i += 3
+        else:
+            chars.add(body[i])
+            i += 1
+    return frozenset(chars)
+
+
+class AnalyzedText:
+    """Mensaje con su normalización, tokens y n-gramas cacheados por configuración"""
+
+    __slots__ = ("text", "_normalized", "_tokens", "_ngrams")
+
+    def __init__(self, text: str):
+        self.text = text
+        self._normalized: Dict[Hashable, str] = {}
+        self._tokens: Dict[Hashable, List[str]] = {}
+        self._ngrams: Dict[Hashable, List[str]] = {}
+
+
+class _Projection:
+    """Proyección de tokens al vocabulario de un TfidfVectorizer ajustado"""
+
+    def __init__(self, vectorizer: TfidfVectorizer):
+        if vectorizer.analyzer != "word" or vectorizer.tokenizer is not None \
+                or vectorizer.preprocessor is not None:
+            raise ValueError("Solo se soportan vectorizadores 'word' con tokenización por regex")
+
+        self.vectorizer = vectorizer
+        self.decode = vectorizer.decode
+        self.preprocess = vectorizer.build_preprocessor()
+        self.tokenize = vectorizer.build_tokenizer()
+        self.stop_words = vectorizer.get_stop_words()
+        self.ngram_range = tuple(vectorizer.ngram_range)
+        self.vocabulary = vectorizer.vocabulary_
+        self.binary = vectorizer.binary
+        self.dtype = vectorizer.dtype
+
+        self.preprocess_key = (vectorizer.lowercase, vectorizer.strip_accents)
+        self.token_key = (self.preprocess_key, self._alphabet_key(vectorizer))
+        self.ngram_key = (
+            self.token_key,
+            frozenset(self.stop_words) if self.stop_words else None,
+            self.ngram_range
+        )
+
+        self.tfidf = TfidfTransformer(
+            norm=vectorizer.norm,
+            use_idf=vectorizer.use_idf,
+            smooth_idf=vectorizer.smooth_idf,
+            sublinear_tf=vectorizer.sublinear_tf
+        )
+        if vectorizer.use_idf:
+            self.tfidf.idf_ = vectorizer.idf_
+        self.tfidf.n_features_in_ = len(self.vocabulary)
+
+    def _alphabet_key(self, vectorizer: TfidfVectorizer) -> Hashable:
+        """
+        Clave de tokenización: el alfabeto efectivo del token_pattern sobre texto
+        normalizado, o el patrón literal si no tiene la forma \\b[...]+\\b
+        """
+        match = _CHAR_CLASS_PATTERN.match(vectorizer.token_pattern)
+        chars = _expand_char_class(match.group(1)) if match else None
+        if chars is None:
+            return vectorizer.token_pattern
+
+        # Un carácter que strip_accents reescribe nunca aparece en el texto
+        # normalizado, así que no afecta al resultado del patrón
+        strip = _ACCENT_STRIPPERS.get(vectorizer.strip_accents, vectorizer.strip_accents)
+        if callable(strip):
+            chars = frozenset(c for c in chars if strip(c) == c)
+        return chars
+
+    def ngrams(self, tokens: List[str]) -> List[str]:
+        """Mismos n-gramas que TfidfVectorizer._word_ngrams"""
+        if self.stop_words is not None:
+            tokens = [w for w in tokens if w not in self.stop_words]
+
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+
+        original_tokens = tokens
+        if min_n == 1:
+            tokens = list(original_tokens)
+            min_n += 1
+        else:
+            tokens = []
+
+        n_original_tokens = len(original_tokens)
+        space_join = " ".join
+        for n in range(min_n, min(max_n + 1, n_original_tokens + 1)):
+            for i in range(n_original_tokens - n + 1):
+                tokens.append(space_join(original_tokens[i: i + n]))
+        return tokens
+
+
+class TextFrontend:
+    """Analiza cada mensaje una vez y produce las filas TF-IDF de cada modelo"""
+
+    def __init__(self):
+        self._projections: Dict[str, _Projection] = {}
+
+    def register(self, name: str, vectorizer: TfidfVectorizer):
+        """Registra (o reemplaza) el vectorizador de un modelo"""
+        self._projections[name] = _Projection(vectorizer)
+
+    def shares_tokenization(self, *names: str) -> bool:
+        """True si los modelos indicados reutilizan la misma tokenización"""
+        return len({self._projections[name].token_key for name in names}) == 1
+
+    def analyze(self, text: str) -> AnalyzedText:
+        """Envuelve un texto; la normalización se calcula al primer uso y se comparte"""
+        return AnalyzedText(text)
+
+    def tokens(self, name: str, doc: AnalyzedText) -> List[str]:
+        """Tokens de doc según el preprocesamiento del modelo indicado"""
+        projection = self._projections[name]
+
+        tokens = doc._tokens.get(projection.token_key)
+        if tokens is None:
+            normalized = doc._normalized.get(projection.preprocess_key)
+            if normalized is None:
+                normalized = projection.preprocess(projection.decode(doc.text))
+                doc._normalized[projection.preprocess_key] = normalized
+            tokens = projection.tokenize(normalized)
+            doc._tokens[projection.token_key] = tokens
+        return tokens
+
+    def _ngrams(self, projection: _Projection, name: str, doc: AnalyzedText) -> List[str]:
+        ngrams = doc._ngrams.get(projection.ngram_key)
+        if ngrams is None:
+            ngrams = projection.ngrams(self.tokens(name, doc))
+            doc._ngrams[projection.ngram_key] = ngrams
+        return ngrams
+
+    def transform(self, name: str, docs: List[AnalyzedText]):
+        """Matriz TF-IDF de docs en el vocabulario del modelo (igual que vectorizer.transform)"""
+        projection = self._projections[name]
+        vocabulary = projection.vocabulary
+
+        j_indices: List[int] = []
+        values: List[int] = []
+        indptr = [0]
+        for doc in docs:
+            counter: Dict[int, int] = {}
+            for feature in self._ngrams(projection, name, doc):
+                idx = vocabulary.get(feature)
+                if idx is not None:
+                    counter[idx] = counter.get(idx, 0) + 1
+
+            j_indices.extend(counter.keys())
+            values.extend(counter.values())
+            indptr.append(len(j_indices))
+
+        X = sp.csr_matrix(
+            (
+                np.asarray(values, dtype=np.intc),
+                np.asarray(j_indices, dtype=np.int32),
+                np.asarray(indptr, dtype=np.int32)
+            ),
+            shape=(len(docs), len(vocabulary)),
+            dtype=projection.dtype
+        )
+        X.sort_indices()
+        if projection.binary:
+            X.data.fill(1)
+
+        return projection.tfidf.transform(X, copy=False)
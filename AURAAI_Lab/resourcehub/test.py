@@ -19,10 +19,17 @@ from typing import Dict, List
 import warnings
 warnings.filterwarnings('ignore')
 
+# Compiled tree-ensemble inference and the profile lookup table shared with the
+# orchestrator (aura_common)
+from aura_common.files import file_sha256
+from aura_common.forest import compile_estimator, predict_one
+from aura_common.profile_table import ProfileLookupTable, profile_index
+
 # Paths
 MODEL_PATH = 'models/resourcehub_classifier.joblib'
 ENCODER_PATH = 'models/resourcehub_encoder.joblib'
 FEATURE_NAMES_PATH = 'models/feature_names.json'
+LOOKUP_PATH = 'models/resourcehub_lookup.npz'
 METRICS_PATH = 'models/training_metrics.json'
 INFERENCE_LOG = 'models/inference.log'
 
@@ -90,6 +97,8 @@ class ResourceHubEngine:
     
     def __init__(self):
         self.model = None
+        self.compiled_model = None
+        self.lookup_table = None
         self.label_encoder = None
         self.feature_names = None
         self.metrics = None
@@ -111,6 +120,21 @@ class ResourceHubEngine:
             self.model = joblib.load(MODEL_PATH)
             self.label_encoder = joblib.load(ENCODER_PATH)
             
+            # Flatten the tree for single-sample inference (other models,
+            # e.g. a VotingClassifier ensemble, are used as they are)
+            self.compiled_model = compile_estimator(self.model)
+            
+            # Precomputed answers for every in-range profile (profile_table.py),
+            # only if they were built from this classifier
+            if os.path.exists(LOOKUP_PATH):
+                table = ProfileLookupTable.load(LOOKUP_PATH)
+                if table.source_sha256 and file_sha256(MODEL_PATH) != table.source_sha256:
+                    logger.warning("Lookup table built from another classifier, using the model "
+                                   "(rebuild it with profile_table.py)")
+                else:
+                    self.lookup_table = table
+                    logger.info("Lookup table loaded - %d profiles", len(self.lookup_table))
+            
             with open(FEATURE_NAMES_PATH, 'r') as f:
                 self.feature_names = json.load(f)
             
@@ -180,9 +204,16 @@ class ResourceHubEngine:
             toma_medicamentos, tipo_sangre
         )
         
-        # Predict
-        prediction_encoded = self.model.predict(X)[0]
-        prediction = self.label_encoder.inverse_transform([prediction_encoded])[0]
+        # Predict: O(1) table lookup, or the compiled tree for profiles outside the table
+        index = None
+        if self.lookup_table is not None:
+            index = profile_index(edad, tiene_alergias, condicion_cronica,
+                                  toma_medicamentos, tipo_sangre)
+        if index is not None:
+            prediction, confidence, probas = self.lookup_table.lookup(index)
+        else:
+            prediction_encoded, probas, confidence = predict_one(self.compiled_model, X)
+            prediction = self.label_encoder.inverse_transform([prediction_encoded])[0]
         
         result = {
             'profile': {
@@ -197,17 +228,14 @@ class ResourceHubEngine:
             'timestamp': datetime.now().isoformat()
         }
         
-        # Add probabilities if available
-        if hasattr(self.model, 'predict_proba'):
-            probas = self.model.predict_proba(X)[0]
-            
-            prob_dist = {
-                action: float(prob)
-                for action, prob in zip(self.label_encoder.classes_, probas)
-            }
-            
-            result['confidence'] = float(probas[prediction_encoded])
-            result['all_probabilities'] = prob_dist
+        # Add probabilities
+        prob_dist = {
+            action: float(prob)
+            for action, prob in zip(self.label_encoder.classes_, probas)
+        }
+        
+        result['confidence'] = confidence
+        result['all_probabilities'] = prob_dist
         
         # Add recommendations
         recommendations = self.ACTION_RECOMMENDATIONS.get(prediction, [])
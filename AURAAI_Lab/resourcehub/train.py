@@ -10,7 +10,7 @@ Version: 1.0.0
 import pandas as pd
 import numpy as np
 from sklearn.tree import DecisionTreeClassifier
-from sklearn.model_selection import train_test_split, GridSearchCV, StratifiedKFold
+from sklearn.model_selection import train_test_split, StratifiedKFold
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import (
     classification_report,
@@ -26,6 +26,9 @@ from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+# Hyperparameter search shared by the trainers
+from aura_common.training import HyperparameterSearch, SEARCH_CONFIG
+
 # Configuration
 CONFIG = {
     'random_state': 42,
@@ -35,7 +38,12 @@ CONFIG = {
     'min_samples_leaf': 2,
     'criterion': 'gini',
     'class_weight': 'balanced',
-    'enable_hyperparameter_tuning': False
+    'enable_hyperparameter_tuning': False,
+    # Search settings (see aura_common.training); a single tree has no tree
+    # budget and fits on one core
+    **SEARCH_CONFIG,
+    'compare_modes': ['grid', 'halving'],
+    'halving_resource': 'n_samples'
 }
 
 # Paths
@@ -64,6 +72,7 @@ class ResourceHubTrainer:
     def __init__(self, config):
         self.config = config
         self.model = None
+        self.search = HyperparameterSearch(config)
         self.label_encoder = None
         self.feature_names = []
         self.metrics = {}
@@ -144,6 +153,7 @@ class ResourceHubTrainer:
         logger.info("=" * 80)
         logger.info("RESOURCEHUB TRAINING PIPELINE STARTED")
         logger.info("=" * 80)
+        logger.info("CPU budget: %d cores", self.config['n_jobs'])
         
         # Encode labels
         self.label_encoder = LabelEncoder()
@@ -162,6 +172,8 @@ class ResourceHubTrainer:
         # Train model
         if self.config['enable_hyperparameter_tuning']:
             self.model = self.hyperparameter_tuning(X_train, y_train)
+            if self.config['search_mode'] == 'compare':
+                self.search.compare_on_test(X_test, y_test)
         else:
             self.model = self.build_decision_tree()
             logger.info("Training model...")
@@ -176,7 +188,7 @@ class ResourceHubTrainer:
         logger.info("=" * 80)
     
     def hyperparameter_tuning(self, X_train, y_train):
-        """Optimize hyperparameters with grid search"""
+        """Optimize hyperparameters (see search_mode)"""
         logger.info("Starting hyperparameter optimization...")
         
         param_grid = {
@@ -194,18 +206,7 @@ class ResourceHubTrainer:
         cv = StratifiedKFold(n_splits=5, shuffle=True,
                             random_state=self.config['random_state'])
         
-        grid_search = GridSearchCV(
-            dt_base, param_grid, cv=cv,
-            scoring='f1_weighted',
-            n_jobs=-1, verbose=2
-        )
-        
-        grid_search.fit(X_train, y_train)
-        
-        logger.info("Best parameters: %s", grid_search.best_params_)
-        logger.info("Best CV score: %.4f", grid_search.best_score_)
-        
-        return grid_search.best_estimator_
+        return self.search.run(dt_base, param_grid, cv, X_train, y_train)
     
     def evaluate(self, X_train, y_train, X_test, y_test):
         """Comprehensive evaluation"""
@@ -235,6 +236,8 @@ class ResourceHubTrainer:
             'tree_depth': int(self.model.get_depth()),
             'n_leaves': int(self.model.get_n_leaves())
         }
+        if self.search.report is not None:
+            self.metrics['hyperparameter_search'] = self.search.report
         
         logger.info("PERFORMANCE METRICS:")
         logger.info("  Train Accuracy: %.4f", train_acc)
@@ -0,0 +1,17 @@
+"""
+Módulos compartidos entre los motores de AURAAI_Lab y el orquestador.
+
+Se instala como paquete local (pip install -e ./shared desde AURAAI_Lab, o
+pip install -r requirements.txt) para que orchestrator/ y los test.py de
+cada motor importen el mismo código sin tocar sys.path:
+
+    files           huellas y hash de archivos de modelos
+    forest          FlatForest (inferencia compilada de bosques/árboles)
+    profile_table   tabla de perfiles precalculada de ResourceHub
+    sessions        sesiones de conversación con memoria acotada
+    spatial_index   índice haversine de instalaciones
+    facility_cache  caché de instalaciones por celda de coordenadas
+    training        búsqueda de hiperparámetros de los train.py
+"""
+
+__version__ = "1.0.0"
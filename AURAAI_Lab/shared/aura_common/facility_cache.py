@@ -0,0 +1,195 @@
+"""
+Caché de búsquedas de instalaciones por celda de coordenadas.
+
+Las peticiones de emergencia se concentran en pocas cuadras (hospitales,
+centro de Durango, carreteras). La ubicación se cuantiza a una celda de
+cell_meters de lado y, por celda, tipo y k, se guardan las instalaciones
+candidatas ordenadas desde el centro de la celda: todas las que están a
+menos de d_k(centro) + 2h, con h la semi-diagonal de la celda. Las k más
+cercanas a cualquier punto de la celda están entre esas candidatas, así que
+al reordenarlas por su distancia al punto exacto se obtiene el mismo
+resultado que consultando el índice completo (las distancias pueden diferir
+en el último bit por el redondeo de punto flotante).
+
+Con sources, cada check_seconds se revisa (mtime, tamaño) de los archivos
+de instalaciones; si cambiaron se vacía la caché y, si hay reload, se
+reconstruye el índice.
+"""
+
+import math
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+from .files import artifact_fingerprint
+from .spatial_index import FacilityIndex, facility_coords, EARTH_RADIUS_KM
+
+METERS_PER_DEGREE = 111320.0
+
+# Holgura para la variación del ancho de la celda dentro de su latitud
+CELL_MARGIN = 1.01
+
+
+class _Candidates:
+    """Instalaciones candidatas de una celda con sus coordenadas en radianes"""
+
+    __slots__ = ("facilities", "coords")
+
+    def __init__(self, facilities: List[Dict]):
+        self.facilities = facilities
+        self.coords = []
+        for facility in facilities:
+            lat, lon = facility_coords(facility)
+            lat, lon = math.radians(lat), math.radians(lon)
+            self.coords.append((lat, lon, math.cos(lat)))
+
+    def nearest(self, lat: float, lon: float, k: int,
+                radius_km: Optional[float]) -> List[Tuple[float, Dict]]:
+        # Pocas candidatas: haversine escalar (misma fórmula que el BallTree)
+        # es más barato que armar arreglos de numpy
+        lat, lon = math.radians(lat), math.radians(lon)
+        cos_lat = math.cos(lat)
+        distances = []
+        for i, (f_lat, f_lon, f_cos) in enumerate(self.coords):
+            sin_lat = math.sin(0.5 * (lat - f_lat))
+            sin_lon = math.sin(0.5 * (lon - f_lon))
+            a = sin_lat * sin_lat + cos_lat * f_cos * sin_lon * sin_lon
+            distances.append((2 * math.asin(math.sqrt(a)) * EARTH_RADIUS_KM, i))
+        distances.sort()
+        return [
+            (distance, self.facilities[i])
+            for distance, i in distances[:k]
+            if radius_km is None or distance <= radius_km
+        ]
+
+
+class FacilityCellCache:
+    """Candidatos por (celda, tipo, k) con LRU, invalidación por archivo y contadores"""
+
+    def __init__(
+        self,
+        index: FacilityIndex,
+        cell_meters: float = 50.0,
+        max_entries: int = 8192,
+        sources: Optional[List[str]] = None,
+        check_seconds: float = 2.0,
+        reload: Optional[Callable[[], FacilityIndex]] = None
+    ):
+        """
+        Args:
+            index: Índice de instalaciones a cachear
+            cell_meters: Lado de la celda (~50 m = una cuadra)
+            max_entries: Celdas máximas antes de desalojar la menos usada
+            sources: Archivos de instalaciones cuyo cambio invalida la caché
+            check_seconds: Intervalo mínimo entre revisiones de sources
+            reload: Reconstruye el índice cuando cambian sources
+        """
+        self.index = index
+        self.cell_meters = cell_meters
+        self.max_entries = max_entries
+        self.sources = sources or []
+        self.check_seconds = check_seconds
+        self.reload = reload
+        self.half_diagonal_km = cell_meters * math.sqrt(2) / 2 / 1000 * CELL_MARGIN
+
+        self._entries: "OrderedDict[tuple, _Candidates]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = artifact_fingerprint(self.sources) if self.sources else None
+        self._checked_at = time.monotonic()
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def cell(self, lat: float, lon: float) -> Tuple[int, int, float, float]:
+        """(fila, columna) de la celda y las coordenadas de su centro"""
+        dlat = self.cell_meters / METERS_PER_DEGREE
+        row = math.floor(lat / dlat)
+        center_lat = (row + 0.5) * dlat
+        dlon = self.cell_meters / (METERS_PER_DEGREE * max(math.cos(math.radians(center_lat)), 1e-6))
+        col = math.floor(lon / dlon)
+        return row, col, center_lat, (col + 0.5) * dlon
+
+    def _check_sources(self):
+        """Invalida (y recarga) si los archivos de instalaciones cambiaron"""
+        if not self.sources:
+            return
+        now = time.monotonic()
+        if now - self._checked_at < self.check_seconds:
+            return
+        self._checked_at = now
+
+        fingerprint = artifact_fingerprint(self.sources)
+        if fingerprint == self._fingerprint:
+            return
+        index = self.reload() if self.reload is not None else self.index
+        with self._lock:
+            self.index = index
+            self._fingerprint = fingerprint
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def _candidates(self, center_lat: float, center_lon: float, tipo: Optional[str], k: int) -> _Candidates:
+        nearest = self.index.nearest(center_lat, center_lon, tipo=tipo, k=k)
+        if len(nearest) < k:
+            # Hay menos de k instalaciones del tipo: todas son candidatas
+            return _Candidates([facility for _, facility in nearest])
+        radius_km = nearest[-1][0] + 2 * self.half_diagonal_km
+        return _Candidates([
+            facility for _, facility in self.index.within_radius(center_lat, center_lon, radius_km, tipo=tipo)
+        ])
+
+    def nearest(self, lat: float, lon: float, tipo: Optional[str] = None,
+                k: int = 1, radius_km: Optional[float] = None) -> List[Tuple[float, Dict]]:
+        """Mismo resultado que FacilityIndex.nearest, resuelto desde la celda"""
+        if k <= 0:
+            return []
+        self._check_sources()
+
+        row, col, center_lat, center_lon = self.cell(lat, lon)
+        key = (row, col, tipo, k)
+        with self._lock:
+            generation = self._generation
+            candidates = self._entries.get(key)
+            if candidates is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if candidates is None:
+            candidates = self._candidates(center_lat, center_lon, tipo, k)
+            with self._lock:
+                # Una invalidación a mitad del cálculo descarta el resultado
+                if generation == self._generation:
+                    self._entries[key] = candidates
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+        return candidates.nearest(lat, lon, k, radius_km)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores para métricas / health checks"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cells": len(self._entries),
+                "cell_meters": self.cell_meters,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
@@ -0,0 +1,32 @@
+"""
+Huellas de archivos de modelos.
+
+artifact_fingerprint es barata (stat) y sirve para detectar que algo cambió;
+file_sha256 lee el contenido y sirve para confirmar de qué archivo exacto se
+derivó un artefacto (tabla de perfiles, formato mmap, cascada).
+"""
+
+import os
+import hashlib
+from typing import List
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 (hex) del contenido de un archivo"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def artifact_fingerprint(paths: List[str]) -> tuple:
+    """(ruta, mtime, tamaño) de cada archivo; barato para detectar cambios"""
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            fingerprint.append((path, None, None))
+    return tuple(fingerprint)
@@ -0,0 +1,207 @@
+"""
+Bosques y árboles de sklearn compilados a arreglos planos.
+
+FlatForest es lo que usan el orquestador y los test.py de los motores para
+inferir sin el despacho de sklearn; orchestrator/artifacts.py lo guarda en
+.npy para abrirlo con mmap.
+"""
+
+import os
+import numpy as np
+from typing import Optional, Dict, Any, Tuple
+
+# Nodo hoja en sklearn.tree (children_left == children_right == -1)
+TREE_LEAF = -1
+
+
+class FlatForest:
+    """
+    Bosque (o árbol único) aplanado en arreglos de nodos contiguos.
+
+    Reproduce predict_proba/predict de RandomForestClassifier y
+    DecisionTreeClassifier recorriendo todos los árboles a la vez.
+    """
+
+    ARRAYS = ["children_left", "children_right", "feature", "threshold",
+              "value", "roots", "classes"]
+
+    def __init__(self, children_left, children_right, feature, threshold,
+                 value, roots, classes, n_features: int, max_depth: int):
+        self.children_left = children_left
+        self.children_right = children_right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+        self.n_classes_ = len(classes)
+        self.n_trees = len(roots)
+        self.max_depth = max_depth
+
+    @staticmethod
+    def supports(model) -> bool:
+        """True si el modelo es un bosque o un árbol de sklearn (estimadores con tree_)"""
+        estimators = getattr(model, "estimators_", None)
+        if estimators is None:
+            return hasattr(model, "tree_")
+        # VotingClassifier o GradientBoosting también tienen estimators_
+        return len(estimators) > 0 and all(hasattr(estimator, "tree_") for estimator in estimators)
+
+    @classmethod
+    def from_estimator(cls, model) -> "FlatForest":
+        """Aplana un RandomForestClassifier o DecisionTreeClassifier ajustado"""
+        estimators = getattr(model, "estimators_", [model])
+        n_classes = len(model.classes_)
+
+        lefts, rights, features, thresholds, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == TREE_LEAF
+
+            lefts.append(np.where(is_leaf, TREE_LEAF, tree.children_left + offset))
+            rights.append(np.where(is_leaf, TREE_LEAF, tree.children_right + offset))
+            features.append(tree.feature)
+            thresholds.append(tree.threshold)
+
+            # sklearn >= 1.4 ya guarda fracciones por clase; los árboles
+            # antiguos guardan conteos que predict_proba normalizaba
+            value = tree.value[:, 0, :n_classes].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            if not np.allclose(normalizer, 1.0):
+                normalizer[normalizer == 0.0] = 1.0
+                value = value / normalizer
+            values.append(value)
+
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, int(tree.max_depth))
+
+        return cls(
+            children_left=np.concatenate(lefts).astype(np.int32),
+            children_right=np.concatenate(rights).astype(np.int32),
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.int32),
+            classes=np.asarray(model.classes_),
+            n_features=int(model.n_features_in_),
+            max_depth=max_depth
+        )
+
+    def save(self, directory: str, prefix: str = "forest") -> Dict[str, Any]:
+        """Guarda los arreglos como .npy y devuelve su metadata"""
+        for name in self.ARRAYS:
+            array = self.classes_ if name == "classes" else getattr(self, name)
+            np.save(os.path.join(directory, f"{prefix}_{name}.npy"), array)
+
+        return {
+            "n_trees": self.n_trees,
+            "n_nodes": int(len(self.children_left)),
+            "n_features": self.n_features_in_,
+            "n_classes": self.n_classes_,
+            "max_depth": self.max_depth
+        }
+
+    @classmethod
+    def load(cls, directory: str, meta: Dict[str, Any], prefix: str = "forest",
+             mmap_mode: Optional[str] = "r") -> "FlatForest":
+        """Abre los arreglos del bosque (memory-mapped por defecto)"""
+        arrays = {
+            name: np.load(os.path.join(directory, f"{prefix}_{name}.npy"),
+                          mmap_mode=mmap_mode)
+            for name in cls.ARRAYS
+        }
+        return cls(
+            n_features=meta["n_features"],
+            max_depth=meta["max_depth"],
+            **arrays
+        )
+
+    def apply(self, X) -> np.ndarray:
+        """Índice global de la hoja alcanzada en cada árbol, shape (n_samples, n_trees)"""
+        if hasattr(X, "toarray"):
+            X = X.toarray()
+        # sklearn compara en float32 contra umbrales float64
+        X = np.asarray(X, dtype=np.float32)
+
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], self.n_trees)).copy()
+
+        for _ in range(self.max_depth):
+            left = self.children_left[node]
+            is_leaf = left == TREE_LEAF
+            if is_leaf.all():
+                break
+
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(
+                is_leaf, node, np.where(go_left, left, self.children_right[node])
+            )
+
+        return node
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Promedio de las probabilidades de las hojas (igual que sklearn)"""
+        leaves = self.apply(X)
+        return self.value[leaves].sum(axis=1) / self.n_trees
+
+    def predict(self, X) -> np.ndarray:
+        """Clase con mayor probabilidad"""
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def _dense_row(self, x) -> np.ndarray:
+        """Una fila (dispersa o densa) como vector float32 de n_features"""
+        if hasattr(x, "indices"):
+            row = np.zeros(self.n_features_in_, dtype=np.float32)
+            row[x.indices] = x.data
+            return row
+        return np.asarray(x, dtype=np.float32).reshape(-1)
+
+    def apply_one(self, x) -> np.ndarray:
+        """Hoja alcanzada en cada árbol para una sola muestra, shape (n_trees,)"""
+        row = self._dense_row(x)
+        node = np.array(self.roots)
+
+        # Solo se avanzan los árboles que aún no llegan a una hoja
+        for _ in range(self.max_depth):
+            left = self.children_left[node]
+            internal = np.flatnonzero(left != TREE_LEAF)
+            if internal.size == 0:
+                break
+
+            active = node[internal]
+            go_left = row[self.feature[active]] <= self.threshold[active]
+            node[internal] = np.where(go_left, left[internal], self.children_right[active])
+
+        return node
+
+    def predict_one(self, x) -> Tuple[Any, np.ndarray, float]:
+        """
+        Clase, probabilidades y confianza de una sola muestra en una pasada.
+
+        Evita el despacho de sklearn (validación, hilos de joblib) que domina
+        el costo de predict/predict_proba con una fila.
+
+        Returns:
+            (clase, probabilidades por clase, probabilidad de la clase)
+        """
+        proba = self.value[self.apply_one(x)].sum(axis=0) / self.n_trees
+        best = int(np.argmax(proba))
+        return self.classes_[best], proba, float(proba[best])
+
+
+def compile_estimator(model):
+    """FlatForest del modelo si es un bosque o un árbol; cualquier otro modelo se queda igual"""
+    return FlatForest.from_estimator(model) if FlatForest.supports(model) else model
+
+
+def predict_one(model, x) -> Tuple[Any, np.ndarray, float]:
+    """FlatForest.predict_one, o lo mismo con predict_proba para modelos sin compilar"""
+    if hasattr(model, "predict_one"):
+        return model.predict_one(x)
+    proba = model.predict_proba(x)[0]
+    best = int(np.argmax(proba))
+    return model.classes_[best], proba, float(proba[best])
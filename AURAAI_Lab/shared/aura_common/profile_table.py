@@ -0,0 +1,150 @@
+"""
+Tabla de búsqueda exhaustiva para ResourceHub.
+
+El espacio de entrada de ResourceHub es diminuto: edad 0-120, tres booleanos
+y ocho tipos de sangre (121 * 2 * 2 * 2 * 8 = 7,744 perfiles). Cada perfil se
+puntúa una sola vez con resourcehub_classifier.joblib y la acción, la
+confianza y las probabilidades quedan en arreglos indexados por perfil: en
+producción la respuesta es un acceso O(1) y el clasificador solo se usa para
+entradas fuera de la tabla.
+
+La tabla se genera con orchestrator/profile_table.py.
+"""
+
+import json
+import numpy as np
+from typing import Optional, Dict, Any, Tuple
+
+FORMAT_VERSION = 1
+
+# Mismo orden que resourcehub/train.py (prepare_features)
+BLOOD_TYPES = ['O+', 'O-', 'A+', 'A-', 'B+', 'B-', 'AB+', 'AB-']
+AGE_MIN, AGE_MAX = 0, 120
+N_AGES = AGE_MAX - AGE_MIN + 1
+N_PROFILES = N_AGES * 2 * 2 * 2 * len(BLOOD_TYPES)
+
+_BLOOD_INDEX = {blood_type: i for i, blood_type in enumerate(BLOOD_TYPES)}
+
+
+def _as_flag(value) -> Optional[int]:
+    """0/1 para booleanos (o 0/1 numéricos); None si el valor no es binario"""
+    if value in (0, 1):
+        return int(value)
+    return None
+
+
+def profile_index(edad, tiene_alergias, condicion_cronica, toma_medicamentos,
+                  tipo_sangre) -> Optional[int]:
+    """
+    Posición del perfil en la tabla.
+
+    Returns:
+        Índice en [0, N_PROFILES) o None si el perfil cae fuera de la tabla
+        (edad no entera o fuera de rango, flags no binarios, tipo desconocido)
+    """
+    blood = _BLOOD_INDEX.get(tipo_sangre)
+    flags = (_as_flag(tiene_alergias), _as_flag(condicion_cronica), _as_flag(toma_medicamentos))
+    if blood is None or None in flags:
+        return None
+
+    try:
+        if int(edad) != edad or not AGE_MIN <= edad <= AGE_MAX:
+            return None
+    except (TypeError, ValueError):
+        return None
+
+    alergias, cronica, medicamentos = flags
+    return ((((int(edad) - AGE_MIN) * 2 + alergias) * 2 + cronica) * 2 + medicamentos) \
+        * len(BLOOD_TYPES) + blood
+
+
+def all_profile_features() -> np.ndarray:
+    """Matriz (N_PROFILES, 12) con las features de cada perfil en orden de índice"""
+    edad, alergias, cronica, medicamentos, blood = np.meshgrid(
+        np.arange(AGE_MIN, AGE_MAX + 1), [0, 1], [0, 1], [0, 1],
+        np.arange(len(BLOOD_TYPES)), indexing="ij"
+    )
+    one_hot = np.eye(len(BLOOD_TYPES), dtype=np.int64)[blood.ravel()]
+    return np.column_stack([
+        edad.ravel(), alergias.ravel(), cronica.ravel(), medicamentos.ravel(), one_hot
+    ])
+
+
+class ProfileLookupTable:
+    """Acción, confianza y probabilidades precalculadas para cada perfil"""
+
+    def __init__(self, probabilities: np.ndarray, classes: np.ndarray,
+                 source_sha256: Optional[str] = None):
+        self.probabilities = probabilities
+        self.classes = classes
+        self.actions = np.argmax(probabilities, axis=1).astype(np.uint8)
+        self.confidence = probabilities[np.arange(len(probabilities)), self.actions]
+        self.source_sha256 = source_sha256
+
+    @classmethod
+    def build(cls, model, encoder, source_sha256: Optional[str] = None) -> "ProfileLookupTable":
+        """Puntúa los N_PROFILES perfiles con el clasificador"""
+        probabilities = np.asarray(model.predict_proba(all_profile_features()), dtype=np.float64)
+        classes = encoder.inverse_transform(np.asarray(model.classes_))
+        return cls(probabilities, np.asarray(classes).astype(str), source_sha256)
+
+    def __len__(self) -> int:
+        return len(self.probabilities)
+
+    def lookup(self, index: int) -> Tuple[str, float, np.ndarray]:
+        """(acción, confianza, probabilidades) del perfil en index"""
+        return self.classes[self.actions[index]], float(self.confidence[index]), self.probabilities[index]
+
+    def lookup_profile(self, profile: Dict) -> Optional[Tuple[str, float, np.ndarray]]:
+        """lookup() para un perfil con las claves del orquestador, o None si no está en la tabla"""
+        index = profile_index(
+            profile.get('edad'),
+            profile.get('tiene_alergias'),
+            profile.get('condicion_cronica'),
+            profile.get('toma_medicamentos'),
+            profile.get('tipo_sangre')
+        )
+        return None if index is None else self.lookup(index)
+
+    def save(self, path: str):
+        np.savez_compressed(
+            path,
+            format_version=FORMAT_VERSION,
+            probabilities=self.probabilities,
+            classes=self.classes,
+            blood_types=np.array(BLOOD_TYPES),
+            age_range=np.array([AGE_MIN, AGE_MAX]),
+            source_sha256=np.array(self.source_sha256 or "")
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "ProfileLookupTable":
+        with np.load(path) as data:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"Versión de tabla no soportada en {path}: {int(data['format_version'])}")
+            if data["blood_types"].tolist() != BLOOD_TYPES or \
+                    data["age_range"].tolist() != [AGE_MIN, AGE_MAX]:
+                raise ValueError(f"La tabla {path} usa otro esquema de perfil")
+            return cls(
+                data["probabilities"],
+                data["classes"],
+                str(data["source_sha256"]) or None
+            )
+
+    def export_mobile(self, path: str) -> Dict[str, Any]:
+        """Versión JSON para Flutter: acción (índice) y confianza por perfil"""
+        table = {
+            "format_version": FORMAT_VERSION,
+            "actions": self.classes.tolist(),
+            "blood_types": BLOOD_TYPES,
+            "age_min": AGE_MIN,
+            "age_max": AGE_MAX,
+            "index": "((((edad - age_min) * 2 + alergias) * 2 + cronica) * 2 + medicamentos) "
+                     "* len(blood_types) + blood_type_idx",
+            "action_idx": self.actions.tolist(),
+            "confidence": [round(float(c), 4) for c in self.confidence]
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(table, f, ensure_ascii=False, separators=(",", ":"))
+        return table
+
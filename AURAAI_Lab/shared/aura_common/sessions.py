@@ -0,0 +1,161 @@
+"""
+Sesiones de conversación (varios turnos) con memoria acotada.
+
+Cada conversación guarda una ventana del historial de intents y su estado
+emocional. La ventana es de tamaño fijo, así que cada mensaje nuevo cuesta
+O(1) sin importar lo larga que sea la conversación.
+
+SessionStore expira las sesiones sin actividad después de ttl_seconds y,
+si la memoria estimada pasa de max_bytes, desaloja las menos recientes.
+"""
+
+import time
+import threading
+from collections import OrderedDict, deque
+from typing import Optional, Dict, Any, Hashable
+
+# Costo aproximado de una sesión vacía y de cada intent del historial
+SESSION_OVERHEAD_BYTES = 1024
+HISTORY_ENTRY_BYTES = 64
+
+
+def emotional_state(prev_intent: Optional[str], curr_intent: str) -> Optional[str]:
+    """Progresión emocional entre dos intents seguidos (None en el primer mensaje)"""
+    if prev_intent is None:
+        return None
+    if prev_intent == 'expresion_miedo' and curr_intent in ('confirmacion', 'agradecimiento'):
+        return 'mejorando'
+    if prev_intent == 'solicitud_calma' and curr_intent == 'confirmacion':
+        return 'respondiendo_bien'
+    if curr_intent == 'expresion_miedo':
+        return 'necesita_apoyo'
+    return 'estable'
+
+
+class ConversationSession:
+    """Estado de una conversación con una ventana de historial (history_size None = sin límite)"""
+
+    def __init__(self, conversation_id: Hashable, history_size: Optional[int] = 20):
+        self.conversation_id = conversation_id
+        self.intent_history: deque = deque(maxlen=history_size)
+        self.emotional_state: Optional[str] = None
+        self.message_count = 0
+        self.last_seen = time.monotonic()
+
+    def add(self, intent: str) -> Dict[str, Any]:
+        """
+        Registra un mensaje y devuelve su contexto.
+
+        Args:
+            intent: Intent detectado para el mensaje
+
+        Returns:
+            message_index, intent_history (intents previos dentro de la
+            ventana) y emotional_state
+        """
+        prev_intent = self.intent_history[-1] if self.intent_history else None
+        context = {
+            "message_index": self.message_count,
+            "intent_history": list(self.intent_history),
+            "emotional_state": emotional_state(prev_intent, intent)
+        }
+
+        if context["emotional_state"] is not None:
+            self.emotional_state = context["emotional_state"]
+        self.intent_history.append(intent)
+        self.message_count += 1
+        self.last_seen = time.monotonic()
+        return context
+
+    def nbytes(self) -> int:
+        """Memoria aproximada de la sesión"""
+        return SESSION_OVERHEAD_BYTES + HISTORY_ENTRY_BYTES * len(self.intent_history)
+
+
+class SessionStore:
+    """Sesiones por conversation_id con TTL y límite de memoria total (LRU)"""
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = 1800.0,
+        max_bytes: int = 64 * 1024 * 1024,
+        history_size: int = 20
+    ):
+        """
+        Args:
+            ttl_seconds: Inactividad tras la cual expira una sesión (None = sin expiración)
+            max_bytes: Memoria estimada máxima de todas las sesiones
+            history_size: Intents que se conservan por sesión
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.history_size = history_size
+        self._sessions: "OrderedDict[Hashable, ConversationSession]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+        self.total_bytes = 0
+        self.created = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def _drop(self, conversation_id: Hashable):
+        del self._sessions[conversation_id]
+        self.total_bytes -= self._sizes.pop(conversation_id)
+
+    def _expire(self, now: float):
+        """Quita las sesiones vencidas (las menos recientes están al frente)"""
+        if self.ttl_seconds is None:
+            return
+        while self._sessions:
+            conversation_id, session = next(iter(self._sessions.items()))
+            if now - session.last_seen < self.ttl_seconds:
+                break
+            self._drop(conversation_id)
+            self.expirations += 1
+
+    def record(self, conversation_id: Hashable, intent: str) -> Dict[str, Any]:
+        """Agrega un mensaje a la sesión (creándola si hace falta) y devuelve su contexto"""
+        with self._lock:
+            self._expire(time.monotonic())
+
+            session = self._sessions.get(conversation_id)
+            if session is None:
+                session = ConversationSession(conversation_id, self.history_size)
+                self._sessions[conversation_id] = session
+                self._sizes[conversation_id] = 0
+                self.created += 1
+            else:
+                self._sessions.move_to_end(conversation_id)
+
+            context = session.add(intent)
+
+            size = session.nbytes()
+            self.total_bytes += size - self._sizes[conversation_id]
+            self._sizes[conversation_id] = size
+
+            # La sesión actual es la más reciente; nunca se desaloja a sí misma
+            while self.total_bytes > self.max_bytes and len(self._sessions) > 1:
+                self._drop(next(iter(self._sessions)))
+                self.evictions += 1
+            return context
+
+    def get(self, conversation_id: Hashable) -> Optional[ConversationSession]:
+        with self._lock:
+            self._expire(time.monotonic())
+            return self._sessions.get(conversation_id)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores para métricas / health checks"""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "created": self.created,
+                "expirations": self.expirations,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,91 @@
+"""
+Índice espacial de instalaciones para GeoGuard.
+
+Un BallTree con métrica haversine por tipo de instalación (más uno global),
+construido una sola vez al cargar los assets. Las consultas devuelven
+distancias de gran círculo en km.
+"""
+
+import numpy as np
+from typing import Optional, Dict, List, Tuple
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371  # Mismo radio que geoguard/train.py
+
+
+def facility_coords(facility: Dict) -> Tuple[float, float]:
+    """Lat/lon de una instalación (formato mobile 'lat/lon' o database 'latitud/longitud')"""
+    lat = facility.get('lat') or facility.get('latitud', 0)
+    lon = facility.get('lon') or facility.get('longitud', 0)
+    return float(lat), float(lon)
+
+
+class _TypeIndex:
+    """BallTree sobre un subconjunto de instalaciones"""
+
+    def __init__(self, facilities: List[Dict]):
+        self.facilities = facilities
+        coords = np.radians([facility_coords(f) for f in facilities])
+        self.tree = BallTree(coords, metric='haversine')
+
+    def query(self, point: np.ndarray, k: int) -> List[Tuple[float, Dict]]:
+        k = min(k, len(self.facilities))
+        distances, indices = self.tree.query(point, k=k)
+        return [
+            (float(d * EARTH_RADIUS_KM), self.facilities[i])
+            for d, i in zip(distances[0], indices[0])
+        ]
+
+    def query_radius(self, point: np.ndarray, radius_km: float) -> List[Tuple[float, Dict]]:
+        indices, distances = self.tree.query_radius(
+            point, r=radius_km / EARTH_RADIUS_KM, return_distance=True, sort_results=True
+        )
+        return [
+            (float(d * EARTH_RADIUS_KM), self.facilities[i])
+            for d, i in zip(distances[0], indices[0])
+        ]
+
+
+class FacilityIndex:
+    """Índices haversine por tipo de instalación"""
+
+    def __init__(self, facilities: List[Dict]):
+        self.n_facilities = len(facilities)
+        self._all = _TypeIndex(facilities) if facilities else None
+
+        by_type: Dict[str, List[Dict]] = {}
+        for facility in facilities:
+            by_type.setdefault(facility.get('tipo'), []).append(facility)
+        self._by_type = {tipo: _TypeIndex(group) for tipo, group in by_type.items()}
+
+    @property
+    def types(self) -> List[str]:
+        return [tipo for tipo in self._by_type if tipo is not None]
+
+    def _index(self, tipo: Optional[str]) -> Optional[_TypeIndex]:
+        return self._by_type.get(tipo) if tipo else self._all
+
+    def nearest(self, lat: float, lon: float, tipo: Optional[str] = None,
+                k: int = 1, radius_km: Optional[float] = None) -> List[Tuple[float, Dict]]:
+        """
+        k instalaciones más cercanas, opcionalmente limitadas a un radio.
+
+        Returns:
+            Lista de (distancia_km, instalación) ordenada por distancia
+        """
+        index = self._index(tipo)
+        if index is None or k <= 0:
+            return []
+
+        results = index.query(np.radians([[lat, lon]]), k)
+        if radius_km is not None:
+            results = [(d, f) for d, f in results if d <= radius_km]
+        return results
+
+    def within_radius(self, lat: float, lon: float, radius_km: float,
+                      tipo: Optional[str] = None) -> List[Tuple[float, Dict]]:
+        """Todas las instalaciones dentro del radio, ordenadas por distancia"""
+        index = self._index(tipo)
+        if index is None:
+            return []
+        return index.query_radius(np.radians([[lat, lon]]), radius_km)
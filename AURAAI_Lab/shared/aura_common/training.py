@@ -0,0 +1,279 @@
+"""
+Hyperparameter search and CPU budgeting shared by the engine trainers.
+
+Each train.py keeps its own estimator and parameter grid and runs them
+through HyperparameterSearch; train_all.py uses the same core-budget helpers
+to launch those trainers in parallel without oversubscribing the CPU.
+"""
+
+import os
+import time
+import logging
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, ParameterGrid
+
+logger = logging.getLogger(__name__)
+
+# Core budget of a training run, set per process by train_all.py
+JOBS_ENV_VAR = 'AURA_TRAIN_JOBS'
+
+# Variables that cap the OpenMP / BLAS threads of a training process
+THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMEXPR_NUM_THREADS'
+)
+
+
+def train_jobs():
+    """Cores this run may use in total (AURA_TRAIN_JOBS, else every core)"""
+    return int(os.environ.get(JOBS_ENV_VAR, 0)) or os.cpu_count() or 1
+
+
+def jobs_env(cores):
+    """Environment variables that hold a child training process to cores"""
+    env = {var: str(cores) for var in THREAD_ENV_VARS}
+    env[JOBS_ENV_VAR] = str(cores)
+    return env
+
+
+def core_share(n_jobs, weight, total_weight):
+    """Cores for a task worth weight out of total_weight (at least 1, at most n_jobs)"""
+    return max(1, min(n_jobs, int(n_jobs * weight / total_weight)))
+
+
+def split_jobs(n_jobs, n_tasks):
+    """
+    Split a core budget between n_tasks tasks run in parallel and the
+    workers inside each task, so that outer * inner never exceeds n_jobs.
+    """
+    outer = max(1, min(n_jobs, n_tasks))
+    return outer, core_share(n_jobs, 1, outer)
+
+
+# Search settings shared by the trainers (merged into each CONFIG):
+#   search_mode: 'grid' (exhaustive), 'halving' (successive halving), 'oob'
+#     (out-of-bag score, one warm-started fit per configuration; forests only)
+#     or 'compare' (every mode in compare_modes, reported side by side; keeps
+#     the first one's model)
+#   halving_resource: 'n_estimators' (forests) or 'n_samples'
+#   n_jobs: cores this run may use in total (AURA_TRAIN_JOBS when launched by
+#     train_all.py); split between parallel CV fits and the trees of each fit
+SEARCH_CONFIG = {
+    'search_mode': 'grid',
+    'compare_modes': ['grid', 'halving', 'oob'],
+    'halving_resource': 'n_estimators',
+    'halving_factor': 3,
+    'n_jobs': train_jobs()
+}
+
+
+class HyperparameterSearch:
+    """Runs the configured search mode(s) and keeps each mode's model and report"""
+
+    def __init__(self, config):
+        self.config = config
+        self.report = None
+        self.models = {}
+
+    def run(self, estimator, param_grid, cv, X_train, y_train):
+        """
+        Search for optimal hyperparameters (see search_mode).
+
+        Returns:
+            Model selected by the first mode, fitted on the whole training set
+        """
+        mode = self.config['search_mode']
+        modes = list(self.config['compare_modes']) if mode == 'compare' else [mode]
+
+        self.report = {'mode': mode}
+        self.models = {}
+        for m in modes:
+            if m == 'oob':
+                result = self._oob_search(estimator, param_grid, X_train, y_train)
+            else:
+                result = self._search(estimator, param_grid, cv, X_train, y_train, m)
+            self.models[m], self.report[m] = result
+
+        if 'grid' in modes:
+            for m in modes:
+                if m == 'grid':
+                    continue
+                self.report[m]['speedup_vs_grid'] = (
+                    self.report['grid']['wall_time_seconds'] /
+                    self.report[m]['wall_time_seconds']
+                )
+                logger.info("%s speedup over grid: %.1fx (best score %.4f vs %.4f)",
+                            m, self.report[m]['speedup_vs_grid'],
+                            self.report[m]['best_score'],
+                            self.report['grid']['best_score'])
+
+        return self.models[modes[0]]
+
+    def compare_on_test(self, X_test, y_test):
+        """Held-out scores of the model each search mode selected"""
+        for mode, model in self.models.items():
+            y_pred = model.predict(X_test)
+            self.report[mode]['test_accuracy'] = float(accuracy_score(y_test, y_pred))
+            self.report[mode]['test_f1'] = float(f1_score(y_test, y_pred, average='weighted'))
+            logger.info("%s-selected model - test F1: %.4f, accuracy: %.4f", mode,
+                        self.report[mode]['test_f1'], self.report[mode]['test_accuracy'])
+
+    def _split_jobs(self, estimator, n_fits):
+        """(parallel CV fits, jobs per fit) for a search with n_fits fits"""
+        if 'n_jobs' not in estimator.get_params():
+            # A single tree fits on one core, so they all go to the CV fits
+            return self.config['n_jobs'], 1
+        return split_jobs(self.config['n_jobs'], n_fits)
+
+    def _with_jobs(self, estimator, n_jobs):
+        """Clone of estimator with n_jobs workers (estimators without n_jobs use one core)"""
+        estimator = clone(estimator)
+        if 'n_jobs' in estimator.get_params():
+            estimator.set_params(n_jobs=n_jobs)
+        return estimator
+
+    def _search(self, estimator, param_grid, cv, X_train, y_train, mode):
+        """
+        Run one hyperparameter search and time it.
+
+        'grid' evaluates every configuration on the full budget. 'halving'
+        evaluates all of them on a small budget (trees or training samples,
+        see halving_resource) and keeps the best 1/halving_factor of them at
+        each round, so weak configurations are dropped early.
+
+        The CV fits share the core budget with the trees inside each fit
+        (see split_jobs); the best configuration is then refit on all cores.
+        """
+        n_jobs = self.config['n_jobs']
+        if mode == 'halving':
+            resource = self.config['halving_resource']
+            factor = self.config['halving_factor']
+            param_grid = dict(param_grid)
+            if resource == 'n_estimators':
+                # The tree count becomes the budget instead of a grid axis
+                max_resources, smallest = max(param_grid.pop('n_estimators')), 1
+            else:
+                # Every round needs a few samples of each class per CV split
+                max_resources = X_train.shape[0]
+                smallest = 2 * cv.get_n_splits() * len(np.unique(y_train))
+
+            # Enough rounds to narrow the grid down to one configuration while
+            # the first round still gets the smallest budget; the last round
+            # gets the full budget, so its score compares to the grid search
+            n_candidates = int(np.prod([len(values) for values in param_grid.values()]))
+            n_rounds = 1
+            while factor ** n_rounds <= n_candidates and max_resources // factor ** n_rounds >= smallest:
+                n_rounds += 1
+
+            # Sized for the first (largest) round
+            outer_jobs, inner_jobs = self._split_jobs(estimator, n_candidates * cv.get_n_splits())
+            search = HalvingGridSearchCV(
+                self._with_jobs(estimator, inner_jobs), param_grid, cv=cv,
+                scoring='f1_weighted',
+                resource=resource,
+                max_resources=max_resources,
+                min_resources=max_resources // factor ** (n_rounds - 1),
+                factor=factor,
+                random_state=self.config['random_state'],
+                refit=False,
+                n_jobs=outer_jobs, verbose=1
+            )
+        else:
+            outer_jobs, inner_jobs = self._split_jobs(estimator, len(ParameterGrid(param_grid)) * cv.get_n_splits())
+            search = GridSearchCV(
+                self._with_jobs(estimator, inner_jobs), param_grid, cv=cv,
+                scoring='f1_weighted',
+                refit=False,
+                n_jobs=outer_jobs, verbose=2
+            )
+        logger.info("%s search on %d cores: %d parallel fits x %d jobs each",
+                    mode, n_jobs, outer_jobs, inner_jobs)
+
+        start = time.perf_counter()
+        search.fit(X_train, y_train)
+        best_params = dict(search.best_params_)
+        if mode == 'halving' and self.config['halving_resource'] == 'n_estimators':
+            # The last round can stop short of the budget (243 of 250 trees
+            # with factor 3); the final model gets the grid's tree count
+            best_params['n_estimators'] = max_resources
+        best = self._with_jobs(estimator, n_jobs).set_params(**best_params)
+        best.fit(X_train, y_train)
+        wall_time = time.perf_counter() - start
+
+        n_candidates = search.n_candidates_ if mode == 'halving' else [len(search.cv_results_['params'])]
+        report = {
+            'wall_time_seconds': wall_time,
+            'best_score': float(search.best_score_),
+            'best_params': {k: v.item() if hasattr(v, 'item') else v
+                            for k, v in best_params.items()},
+            'n_candidates': int(n_candidates[0]),
+            'n_fits': int(sum(n_candidates) * cv.get_n_splits())
+        }
+        if mode == 'halving':
+            report['resource'] = search.resource
+            report['resources_per_round'] = [int(r) for r in search.n_resources_]
+            report['candidates_per_round'] = [int(c) for c in search.n_candidates_]
+
+        logger.info("%s search - best score: %.4f in %.1fs (%d fits)",
+                    mode, report['best_score'], wall_time, report['n_fits'])
+        logger.info("Best parameters: %s", report['best_params'])
+        return best, report
+
+    @staticmethod
+    def _oob_f1(forest, y):
+        """Weighted F1 of the out-of-bag predictions (same metric as the CV searches)"""
+        proba = forest.oob_decision_function_
+        scored = ~np.isnan(proba).any(axis=1)
+        y_pred = forest.classes_[np.argmax(proba[scored], axis=1)]
+        return f1_score(y[scored], y_pred, average='weighted')
+
+    def _oob_search(self, estimator, param_grid, X_train, y_train):
+        """
+        Score every configuration of a random forest on its out-of-bag predictions.
+
+        One fit per configuration instead of one per CV fold. The forest is
+        warm-started through the n_estimators values, so each smaller forest
+        is scored on the way to the largest one without refitting its trees.
+        """
+        n_jobs = self.config['n_jobs']
+        param_grid = dict(param_grid)
+        n_estimators = sorted(param_grid.pop('n_estimators'))
+
+        start = time.perf_counter()
+        results = []
+        for params in ParameterGrid(param_grid):
+            forest = clone(estimator).set_params(
+                **params, bootstrap=True, oob_score=True, warm_start=True, n_jobs=n_jobs
+            )
+            for n in n_estimators:
+                forest.set_params(n_estimators=n)
+                forest.fit(X_train, y_train)
+                results.append((self._oob_f1(forest, y_train), {**params, 'n_estimators': n}))
+
+        # Ties keep the first (smallest) configuration
+        best_score, best_params = max(results, key=lambda result: result[0])
+        best = clone(estimator).set_params(**best_params, bootstrap=True, oob_score=True, n_jobs=n_jobs)
+        best.fit(X_train, y_train)
+        wall_time = time.perf_counter() - start
+
+        n_configurations = len(results) // len(n_estimators)
+        report = {
+            'wall_time_seconds': wall_time,
+            'best_score': float(best_score),
+            'best_params': best_params,
+            'n_candidates': len(results),
+            'n_fits': n_configurations + 1,
+            'n_trees_fitted': n_configurations * n_estimators[-1] + best_params['n_estimators']
+        }
+
+        logger.info("oob search - best score: %.4f in %.1fs (%d fits)",
+                    best_score, wall_time, report['n_fits'])
+        logger.info("Best parameters: %s", best_params)
+        return best, report
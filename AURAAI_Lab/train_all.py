@@ -0,0 +1,150 @@
+"""
+Entrena los modelos de AURAAI_Lab en paralelo sin sobre-suscribir la CPU.
+
+Cada train.py reparte su propio presupuesto de núcleos (AURA_TRAIN_JOBS)
+entre los folds de CV y los árboles de cada ajuste. Este script reparte el
+presupuesto global entre los modelos: cada proceso recibe núcleos según su
+costo relativo y las bibliotecas de hilos (OpenMP / BLAS) quedan limitadas a
+esos mismos núcleos. Ambos repartos usan aura_common.training (core_share,
+split_jobs y jobs_env). Los modelos que no caben esperan en cola y toman los
+núcleos que liberan los que terminan, así que en ningún momento corren más
+trabajadores que núcleos.
+
+    python train_all.py                       # todos, con os.cpu_count() núcleos
+    python train_all.py --jobs 4 agentcore chatlite
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+from typing import Optional, List
+
+from aura_common.training import core_share, jobs_env
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Costo relativo de cada entrenamiento (búsqueda de hiperparámetros de
+# AgentCore >> bosque de ChatLite > K-Means / árbol de decisión)
+ENGINES = {
+    "agentcore": {"weight": 8, "command": ["train.py"]},
+    "chatlite": {"weight": 3, "command": ["train.py"]},
+    # main() de GeoGuard levanta la API Flask al terminar; solo se entrena
+    "geoguard": {
+        "weight": 1,
+        "command": ["-c", "from train import GeoGuardTrainer, CONFIG; GeoGuardTrainer(CONFIG).train()"]
+    },
+    "resourcehub": {"weight": 1, "command": ["train.py"]}
+}
+
+
+class TrainingJob:
+    """Entrenamiento de un motor en su propio proceso"""
+
+    def __init__(self, name: str, weight: float, command: List[str]):
+        self.name = name
+        self.weight = weight
+        self.command = command
+        self.cores = 0
+        self.process: Optional[subprocess.Popen] = None
+        self.started = None
+        self.elapsed = None
+        self.returncode = None
+
+    def start(self, cores: int, verbose: bool = False):
+        env = dict(os.environ, **jobs_env(cores))
+        output = None if verbose else subprocess.DEVNULL
+        self.cores = cores
+        self.started = time.perf_counter()
+        self.process = subprocess.Popen(
+            [sys.executable] + self.command,
+            cwd=os.path.join(BASE_DIR, self.name),
+            env=env, stdout=output, stderr=output
+        )
+
+    def poll(self) -> bool:
+        """True si el proceso ya terminó"""
+        if self.returncode is None and self.process.poll() is not None:
+            self.returncode = self.process.returncode
+            self.elapsed = time.perf_counter() - self.started
+        return self.returncode is not None
+
+
+class TrainingScheduler:
+    """Reparte un presupuesto de núcleos entre entrenamientos concurrentes"""
+
+    def __init__(self, jobs: List[TrainingJob], cores: int, poll_seconds: float = 0.5):
+        """
+        Args:
+            jobs: Entrenamientos pendientes
+            cores: Núcleos totales que pueden usar entre todos
+            poll_seconds: Intervalo entre revisiones de los procesos
+        """
+        # Los más costosos primero: son los que más tardan en liberar núcleos
+        self.pending = sorted(jobs, key=lambda job: job.weight, reverse=True)
+        self.cores = max(1, cores)
+        self.poll_seconds = poll_seconds
+        self.running: List[TrainingJob] = []
+        self.finished: List[TrainingJob] = []
+
+    def free_cores(self) -> int:
+        return self.cores - sum(job.cores for job in self.running)
+
+    def _launch(self, verbose: bool):
+        """Arranca pendientes mientras haya núcleos libres"""
+        while self.pending and self.free_cores() > 0:
+            free = self.free_cores()
+            job = self.pending[0]
+            # Parte de los núcleos libres proporcional a su costo frente al
+            # resto de la cola; el último pendiente se lleva todo lo libre
+            cores = core_share(free, job.weight, sum(pending.weight for pending in self.pending))
+            self.pending.pop(0)
+            job.start(cores, verbose)
+            self.running.append(job)
+            print(f"[AuraTrain] {job.name}: iniciado con {cores} núcleo(s)")
+
+    def run(self, verbose: bool = False) -> List[TrainingJob]:
+        """Entrena todo y devuelve los trabajos en orden de término"""
+        self._launch(verbose)
+        while self.running:
+            time.sleep(self.poll_seconds)
+            for job in [job for job in self.running if job.poll()]:
+                self.running.remove(job)
+                self.finished.append(job)
+                status = "✓" if job.returncode == 0 else f"[WARN] código {job.returncode}"
+                print(f"  {status} {job.name}: {job.elapsed:.1f}s con {job.cores} núcleo(s)")
+            self._launch(verbose)
+        return self.finished
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Entrena los modelos de AURAAI_Lab en paralelo")
+    parser.add_argument("engines", nargs="*",
+                        help=f"Motores a entrenar: {', '.join(ENGINES)} (por defecto todos)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Núcleos totales para todos los entrenamientos")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Muestra la salida de cada entrenamiento (además de su training.log)")
+    args = parser.parse_args()
+
+    names = args.engines or list(ENGINES)
+    unknown = [name for name in names if name not in ENGINES]
+    if unknown:
+        parser.error(f"motores desconocidos: {', '.join(unknown)}")
+    jobs = [TrainingJob(name, ENGINES[name]["weight"], ENGINES[name]["command"]) for name in names]
+
+    print(f"[AuraTrain] Entrenando {len(jobs)} modelo(s) con {max(1, args.jobs)} núcleo(s)")
+    start = time.perf_counter()
+    finished = TrainingScheduler(jobs, args.jobs).run(verbose=args.verbose)
+    failed = [job.name for job in finished if job.returncode != 0]
+
+    print(f"[AuraTrain] Total: {time.perf_counter() - start:.1f}s")
+    if failed:
+        print(f"[AuraTrain] [WARN] Fallaron: {', '.join(failed)} (ver models/training.log o --verbose)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())